@@ -1,7 +1,7 @@
 // context/AuthContext.js
 import React, { createContext, useState, useEffect } from 'react';
 import AsyncStorage from '@react-native-async-storage/async-storage';
-import { postQuery } from './api/client';
+import { postQuery, subscribe } from './api/client';
 
 export const AuthContext = createContext();
 
@@ -80,16 +80,34 @@ export const AuthProvider = ({ children }) => {
         try {
             const result = await postQuery(CHECK_STATUS_QUERY, { userId: userInfo.id });
             const freshUserInfo = result.data.checkMyStatus;
-            if (freshUserInfo && freshUserInfo.tier !== userInfo.tier) {
-                const updatedUserInfo = { ...userInfo, tier: freshUserInfo.tier };
-                setUserInfo(updatedUserInfo);
-                await AsyncStorage.setItem('userInfo', JSON.stringify(updatedUserInfo));
+            if (freshUserInfo) {
+                await applyTier(freshUserInfo.tier);
             }
         } catch (error) {
             console.error("Failed to check status:", error);
         }
     };
 
+    const applyTier = async (tier) => {
+        if (!userInfo || tier === userInfo.tier) return;
+        const updatedUserInfo = { ...userInfo, tier };
+        setUserInfo(updatedUserInfo);
+        await AsyncStorage.setItem('userInfo', JSON.stringify(updatedUserInfo));
+    };
+
+    // รอให้ server ส่ง tier ใหม่มาทาง subscription แทนการ poll ทุก 5 วินาที
+    const watchTierAssigned = (onError) => {
+        if (!userInfo) return () => {};
+        const TIER_ASSIGNED_SUBSCRIPTION = `subscription TierAssigned($userId: Int!) { tierAssigned(userId: $userId) { id, tier } }`;
+        return subscribe(TIER_ASSIGNED_SUBSCRIPTION, { userId: userInfo.id }, {
+            onNext: (result) => {
+                const assigned = result.data?.tierAssigned;
+                if (assigned) applyTier(assigned.tier);
+            },
+            onError,
+        });
+    };
+
     const isLoggedIn = async () => {
         try {
             setIsLoading(true);
@@ -111,7 +129,7 @@ export const AuthProvider = ({ children }) => {
     }, []);
 
     return (
-        <AuthContext.Provider value={{ login, logout, checkStatus, isLoading, userToken, userInfo }}>
+        <AuthContext.Provider value={{ login, logout, checkStatus, watchTierAssigned, isLoading, userToken, userInfo }}>
             {children}
         </AuthContext.Provider>
     );
@@ -1,8 +1,11 @@
 import axios from 'axios';
+import { sha256 } from './sha256';
 
 // ❗️❗️❗️ สำคัญมาก ❗️❗️❗️
 // ให้เปลี่ยน 'YOUR_COMPUTER_IP' เป็น IP Address ที่ได้จากขั้นตอนที่ 1
 const API_URL = 'http://192.168.10.123:8000/graphql'; 
+// ค่าเดียวกับ ADMIN_API_KEY ของ server ใช้เฉพาะหน้าจอ admin (bulkAssignTier, users, ...)
+const ADMIN_API_KEY = '';
 
 const apiClient = axios.create({
     baseURL: API_URL,
@@ -11,13 +14,20 @@ const apiClient = axios.create({
     },
 });
 
+const isPersistedQueryNotFound = (body) =>
+    body?.errors?.some(error => error.extensions?.code === 'PERSISTED_QUERY_NOT_FOUND');
+
 // ฟังก์ชันสำหรับส่ง GraphQL request โดยเฉพาะ
-export const postQuery = async (query, variables = {}) => {
+// ส่งแค่ hash ของ query ก่อน (persisted query) ถ้า server ยังไม่รู้จักจึงส่งข้อความ query ตามไป
+// admin: true ส่ง X-Admin-Key ไปด้วยสำหรับ field ของ admin
+export const postQuery = async (query, variables = {}, { admin = false } = {}) => {
+    const extensions = { persistedQuery: { version: 1, sha256Hash: sha256(query) } };
+    const config = admin ? { headers: { 'X-Admin-Key': ADMIN_API_KEY } } : undefined;
     try {
-        const response = await apiClient.post('', {
-            query,
-            variables,
-        });
+        let response = await apiClient.post('', { variables, extensions }, config);
+        if (isPersistedQueryNotFound(response.data)) {
+            response = await apiClient.post('', { query, variables, extensions }, config);
+        }
         // GraphQL ส่งข้อมูลกลับมาใน key `data` เสมอ
         return response.data;
     } catch (error) {
@@ -36,4 +46,63 @@ export const postQuery = async (query, variables = {}) => {
             throw error;
         }
     }
-};
\ No newline at end of file
+};
+
+// key สำหรับกันการสร้าง order ซ้ำ: ใช้ key เดิมเมื่อกดส่ง order เดิมซ้ำหลังเน็ตหลุด
+export const newClientKey = () =>
+    `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 12)}`;
+
+// เปิด GraphQL subscription ผ่าน WebSocket (protocol: graphql-transport-ws)
+// คืนค่าฟังก์ชันสำหรับยกเลิก subscription
+export const subscribe = (query, variables = {}, { onNext, onError, onComplete } = {}) => {
+    const socket = new WebSocket(API_URL.replace(/^http/, 'ws'), 'graphql-transport-ws');
+    let finished = false;
+
+    socket.onopen = () => {
+        socket.send(JSON.stringify({ type: 'connection_init' }));
+    };
+
+    socket.onmessage = (event) => {
+        const message = JSON.parse(event.data);
+        switch (message.type) {
+            case 'connection_ack':
+                socket.send(JSON.stringify({ id: '1', type: 'subscribe', payload: { query, variables } }));
+                break;
+            case 'ping':
+                socket.send(JSON.stringify({ type: 'pong' }));
+                break;
+            case 'next':
+                onNext?.(message.payload);
+                break;
+            case 'error':
+                finished = true;
+                onError?.(new Error(message.payload?.[0]?.message || 'Subscription error'));
+                socket.close();
+                break;
+            case 'complete':
+                finished = true;
+                onComplete?.();
+                socket.close();
+                break;
+        }
+    };
+
+    socket.onerror = () => {
+        if (!finished) {
+            finished = true;
+            onError?.(new Error('Cannot connect to the server. Please check your network.'));
+        }
+    };
+
+    socket.onclose = () => {
+        if (!finished) {
+            finished = true;
+            onError?.(new Error('Connection closed.'));
+        }
+    };
+
+    return () => {
+        finished = true;
+        socket.close();
+    };
+};
@@ -0,0 +1,45 @@
+import { useEffect, useState } from 'react';
+import AsyncStorage from '@react-native-async-storage/async-storage';
+import { postQuery } from './client';
+
+const MENU_QUERY = `
+    query Menu($tier: String!, $knownVersion: Int) {
+        menu(tier: $tier, knownVersion: $knownVersion) {
+            version
+            notModified
+            items { name, exclusive }
+        }
+    }
+`;
+
+// โหลดเมนูของ tier จาก server โดยเก็บ version ไว้ในเครื่อง
+// ถ้าเมนูยังไม่เปลี่ยน server จะตอบ notModified และใช้รายการที่เก็บไว้แทน
+export const useMenu = (tier, fallbackItems = []) => {
+    const [items, setItems] = useState(fallbackItems);
+
+    useEffect(() => {
+        const storageKey = `menu:${tier}`;
+        let cancelled = false;
+
+        const loadMenu = async () => {
+            try {
+                const cached = JSON.parse(await AsyncStorage.getItem(storageKey) || 'null');
+                if (cached && !cancelled) setItems(cached.items);
+
+                const result = await postQuery(MENU_QUERY, { tier, knownVersion: cached?.version ?? null });
+                const menu = result.data.menu;
+                if (menu.notModified || cancelled) return;
+
+                setItems(menu.items);
+                await AsyncStorage.setItem(storageKey, JSON.stringify({ version: menu.version, items: menu.items }));
+            } catch (error) {
+                console.error("Failed to load menu:", error);
+            }
+        };
+
+        loadMenu();
+        return () => { cancelled = true; };
+    }, [tier]);
+
+    return items;
+};
@@ -3,23 +3,47 @@ import { View, Text, TextInput, Button, Alert } from 'react-native';
 import { postQuery } from '../api/client';
 
 const AdminDashboardScreen = () => {
-    const [userId, setUserId] = useState('');
-    
+    const [userIds, setUserIds] = useState('');
+
+    // ดึง id ของผู้ใช้ที่ยังรอ tier อยู่ (เรียงตามลำดับการสมัคร) มาใส่ในช่องกรอก
+    const handleLoadPending = async () => {
+        const PENDING_USERS_QUERY = `
+            query PendingUsers($first: Int!) {
+                users(tier: "PENDING", first: $first) { items { id } }
+            }
+        `;
+        try {
+            const result = await postQuery(PENDING_USERS_QUERY, { first: 100 }, { admin: true });
+            if (result.errors) throw new Error(result.errors[0].message);
+
+            const ids = result.data.users.items.map(user => user.id);
+            setUserIds(ids.join(', '));
+            Alert.alert("Pending Users", `${ids.length} user(s) waiting for a tier.`);
+        } catch (error) {
+            Alert.alert("Error", error.message);
+        }
+    };
+
     const handleAssignTier = async (tier) => {
-        if (!userId) {
-            Alert.alert("Error", "Please enter a User ID.");
+        const ids = userIds.split(',').map(id => parseInt(id.trim())).filter(id => !isNaN(id));
+        if (ids.length === 0) {
+            Alert.alert("Error", "Please enter at least one User ID.");
             return;
         }
-        const ASSIGN_TIER_MUTATION = `
-            mutation AssignTier($userId: Int!, $tierName: String!) {
-                assignTier(userId: $userId, tierName: $tierName) { id, tier }
+        const BULK_ASSIGN_TIER_MUTATION = `
+            mutation BulkAssignTier($userIds: [Int!]!, $tier: String!) {
+                bulkAssignTier(userIds: $userIds, tier: $tier) { userId, success, message }
             }
         `;
         try {
-            const result = await postQuery(ASSIGN_TIER_MUTATION, { userId: parseInt(userId), tierName: tier });
+            const result = await postQuery(BULK_ASSIGN_TIER_MUTATION, { userIds: ids, tier }, { admin: true });
             if (result.errors) throw new Error(result.errors[0].message);
-            
-            Alert.alert("Success", `User ${userId} has been assigned to ${result.data.assignTier.tier} tier.`);
+
+            const results = result.data.bulkAssignTier;
+            const failed = results.filter(r => !r.success);
+            const summary = `${results.length - failed.length} user(s) assigned to ${tier} tier.`;
+            const failures = failed.map(r => `User ${r.userId}: ${r.message}`).join('\n');
+            Alert.alert(failed.length ? "Partially Done" : "Success", failures ? `${summary}\n${failures}` : summary);
         } catch (error) {
             Alert.alert("Error", error.message);
         }
@@ -29,12 +53,14 @@ const AdminDashboardScreen = () => {
         <View style={{ padding: 20 }}>
             <Text style={{ fontSize: 24, fontWeight: 'bold' }}>Admin Dashboard</Text>
             <TextInput
-                placeholder="Enter User ID to assign tier"
-                value={userId}
-                onChangeText={setUserId}
-                keyboardType="numeric"
+                placeholder="Enter User IDs (comma separated)"
+                value={userIds}
+                onChangeText={setUserIds}
+                keyboardType="numbers-and-punctuation"
                 style={{ borderWidth: 1, padding: 10, marginVertical: 20 }}
             />
+            <Button title="Load PENDING users" onPress={handleLoadPending} color="#888" />
+            <View style={{ marginVertical: 5 }} />
             <Button title="Assign to SAVER" onPress={() => handleAssignTier('SAVER')} />
             <View style={{ marginVertical: 5 }} />
             <Button title="Assign to PREMIUM" onPress={() => handleAssignTier('PREMIUM')} color="green" />
@@ -44,4 +70,4 @@ const AdminDashboardScreen = () => {
     );
 };
 
-export default AdminDashboardScreen;
\ No newline at end of file
+export default AdminDashboardScreen;
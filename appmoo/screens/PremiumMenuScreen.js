@@ -1,4 +1,4 @@
-import React, { useState, useContext } from 'react';
+import React, { useState, useContext, useRef } from 'react';
 import {
     View,
     Text,
@@ -10,19 +10,28 @@ import {
     ActivityIndicator
 } from 'react-native';
 import { AuthContext } from '../AuthContext';
-import { postQuery } from '../api/client';
+import { postQuery, newClientKey } from '../api/client';
+import { useMenu } from '../api/menu';
 
 // รายการอาหารสำหรับ Premium (มีของ Saver + ของพิเศษ)
 const SAVER_ITEMS = ['หมูสามชั้น', 'สันคอหมู', 'ตับหมู', 'ผักกาดขาว', 'ผักบุ้ง', 'วุ้นเส้น', 'ไข่ไก่', 'น้ำจิ้มสุกี้'];
 const PREMIUM_EXCLUSIVE_ITEMS = ['กุ้งแม่น้ำ', 'เนื้อริบอาย', 'หอยเชลล์', 'ชีส'];
-const PREMIUM_MENU_ITEMS = [...SAVER_ITEMS, ...PREMIUM_EXCLUSIVE_ITEMS];
+// ใช้แสดงระหว่างรอเมนูจาก server เท่านั้น
+const PREMIUM_MENU_ITEMS = [
+    ...SAVER_ITEMS.map(name => ({ name, exclusive: false })),
+    ...PREMIUM_EXCLUSIVE_ITEMS.map(name => ({ name, exclusive: true })),
+];
 
 const PremiumMenuScreen = ({ navigation }) => {
     const { userInfo } = useContext(AuthContext);
     const [order, setOrder] = useState({});
     const [isLoading, setIsLoading] = useState(false);
+    // key ของ order ที่กำลังส่ง ใช้ซ้ำเมื่อกดส่งอีกครั้งหลังล้มเหลว เปลี่ยนใหม่เมื่อแก้รายการ
+    const clientKeyRef = useRef(null);
+    const menuItems = useMenu('PREMIUM', PREMIUM_MENU_ITEMS);
 
     const handleUpdateQuantity = (item, change) => {
+        clientKeyRef.current = null;
         setOrder(prevOrder => {
             const currentQuantity = prevOrder[item] || 0;
             const newQuantity = currentQuantity + change;
@@ -39,8 +48,8 @@ const PremiumMenuScreen = ({ navigation }) => {
 
     // ✅ อัปเดต Mutation ให้คืนค่าตาม OrderType ใหม่
     const CREATE_ORDER_MUTATION = `
-        mutation CreateOrder($userId: Int!, $itemNames: [String!]!) {
-            createOrder(userId: $userId, itemNames: $itemNames) {
+        mutation CreateOrder($userId: Int!, $itemNames: [String!]!, $clientKey: String) {
+            createOrder(userId: $userId, itemNames: $itemNames, clientKey: $clientKey) {
                 id
                 orderedAt
                 items
@@ -56,14 +65,17 @@ const PremiumMenuScreen = ({ navigation }) => {
             return;
         }
 
+        clientKeyRef.current = clientKeyRef.current || newClientKey();
         setIsLoading(true);
         try {
             const result = await postQuery(CREATE_ORDER_MUTATION, {
                 userId: userInfo.id,
-                itemNames: itemNames
+                itemNames: itemNames,
+                clientKey: clientKeyRef.current
             });
 
             setOrder({});
+            clientKeyRef.current = null;
 
             navigation.navigate('OrderConfirmation', { order: result.data.createOrder });
 
@@ -85,9 +97,8 @@ const PremiumMenuScreen = ({ navigation }) => {
 
             <Text style={styles.subHeader}>Please select your items:</Text>
 
-            {PREMIUM_MENU_ITEMS.map((item, index) => {
+            {menuItems.map(({ name: item, exclusive: isExclusive }, index) => {
                 const quantity = order[item] || 0;
-                const isExclusive = PREMIUM_EXCLUSIVE_ITEMS.includes(item);
                 return (
                     <View key={index} style={styles.itemContainer}>
                         <Text style={[styles.itemText, isExclusive && styles.exclusiveItemText]}>
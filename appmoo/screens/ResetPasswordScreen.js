@@ -9,11 +9,11 @@ const ResetPasswordScreen = ({ route, navigation }) => {
     const [isPasswordVisible, setIsPasswordVisible] = useState(false);
     const [isConfirmPasswordVisible, setIsConfirmPasswordVisible] = useState(false);
     const [loading, setLoading] = useState(false);
-    const { token } = route.params; 
+    const { token, email } = route.params; 
 
     const RESET_PASSWORD_MUTATION = `
-        mutation ResetPassword($token: String!, $newPassword: String!) {
-            resetPassword(token: $token, newPassword: $newPassword) {
+        mutation ResetPassword($token: String!, $newPassword: String!, $email: String!) {
+            resetPassword(token: $token, newPassword: $newPassword, email: $email) {
                 success
                 message
             }
@@ -31,7 +31,7 @@ const ResetPasswordScreen = ({ route, navigation }) => {
         }
         setLoading(true);
         try {
-            const result = await postQuery(RESET_PASSWORD_MUTATION, { token, newPassword: password });
+            const result = await postQuery(RESET_PASSWORD_MUTATION, { token, newPassword: password, email });
             const response = result.data.resetPassword;
 
             if (response.success) {
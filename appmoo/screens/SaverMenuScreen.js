@@ -1,4 +1,4 @@
-import React, { useState, useContext } from 'react';
+import React, { useState, useContext, useRef } from 'react';
 import {
     View,
     Text,
@@ -10,16 +10,23 @@ import {
     ActivityIndicator
 } from 'react-native';
 import { AuthContext } from '../AuthContext';
-import { postQuery } from '../api/client';
+import { postQuery, newClientKey } from '../api/client';
+import { useMenu } from '../api/menu';
 
-const SAVER_MENU_ITEMS = ['หมูสามชั้น', 'สันคอหมู', 'ตับหมู', 'ผักกาดขาว', 'ผักบุ้ง', 'วุ้นเส้น', 'ไข่ไก่', 'น้ำจิ้มสุกี้'];
+// ใช้แสดงระหว่างรอเมนูจาก server เท่านั้น
+const SAVER_MENU_ITEMS = ['หมูสามชั้น', 'สันคอหมู', 'ตับหมู', 'ผักกาดขาว', 'ผักบุ้ง', 'วุ้นเส้น', 'ไข่ไก่', 'น้ำจิ้มสุกี้']
+    .map(name => ({ name, exclusive: false }));
 
 const SaverMenuScreen = ({ navigation }) => {
     const { userInfo, logout } = useContext(AuthContext);
     const [order, setOrder] = useState({});
     const [isLoading, setIsLoading] = useState(false);
+    // key ของ order ที่กำลังส่ง ใช้ซ้ำเมื่อกดส่งอีกครั้งหลังล้มเหลว เปลี่ยนใหม่เมื่อแก้รายการ
+    const clientKeyRef = useRef(null);
+    const menuItems = useMenu('SAVER', SAVER_MENU_ITEMS);
 
     const handleUpdateQuantity = (item, change) => {
+        clientKeyRef.current = null;
         setOrder(prevOrder => {
             const currentQuantity = prevOrder[item] || 0;
             const newQuantity = currentQuantity + change;
@@ -36,8 +43,8 @@ const SaverMenuScreen = ({ navigation }) => {
     };
 
     const CREATE_ORDER_MUTATION = `
-        mutation CreateOrder($userId: Int!, $itemNames: [String!]!) {
-            createOrder(userId: $userId, itemNames: $itemNames) {
+        mutation CreateOrder($userId: Int!, $itemNames: [String!]!, $clientKey: String) {
+            createOrder(userId: $userId, itemNames: $itemNames, clientKey: $clientKey) {
                 id
                 items
             }
@@ -52,14 +59,17 @@ const SaverMenuScreen = ({ navigation }) => {
             return;
         }
 
+        clientKeyRef.current = clientKeyRef.current || newClientKey();
         setIsLoading(true);
         try {
             const result = await postQuery(CREATE_ORDER_MUTATION, {
                 userId: userInfo.id,
-                itemNames: itemNames
+                itemNames: itemNames,
+                clientKey: clientKeyRef.current
             });
 
             setOrder({});
+            clientKeyRef.current = null;
 
             navigation.navigate('OrderConfirmation', { order: result.data.createOrder });
 
@@ -81,7 +91,7 @@ const SaverMenuScreen = ({ navigation }) => {
 
             <Text style={styles.subHeader}>Please select your items:</Text>
 
-            {SAVER_MENU_ITEMS.map((item, index) => {
+            {menuItems.map(({ name: item }, index) => {
                 const quantity = order[item] || 0;
                 return (
                     <View key={index} style={styles.itemContainer}>
@@ -9,8 +9,8 @@ const VerifyTokenScreen = ({ route, navigation }) => {
     const { email } = route.params; 
 
     const VERIFY_TOKEN_MUTATION = `
-        mutation VerifyResetToken($token: String!) {
-            verifyResetToken(token: $token) {
+        mutation VerifyResetToken($token: String!, $email: String!) {
+            verifyResetToken(token: $token, email: $email) {
                 success
                 message
             }
@@ -24,11 +24,11 @@ const VerifyTokenScreen = ({ route, navigation }) => {
         }
         setLoading(true);
         try {
-            const result = await postQuery(VERIFY_TOKEN_MUTATION, { token: token.toUpperCase() });
+            const result = await postQuery(VERIFY_TOKEN_MUTATION, { token: token.toUpperCase(), email });
             const response = result.data.verifyResetToken;
 
             if (response.success) {
-                navigation.navigate('ResetPassword', { token: token.toUpperCase() });
+                navigation.navigate('ResetPassword', { token: token.toUpperCase(), email });
             } else {
                 throw new Error(response.message);
             }
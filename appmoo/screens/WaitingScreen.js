@@ -3,14 +3,22 @@ import { View, Text, StyleSheet, ActivityIndicator, Button } from 'react-native'
 import { AuthContext } from '../AuthContext';
 
 const WaitingScreen = () => {
-    const { checkStatus, userInfo, logout } = useContext(AuthContext);
+    const { checkStatus, watchTierAssigned, userInfo, logout } = useContext(AuthContext);
 
     useEffect(() => {
-        const interval = setInterval(() => {
+        let interval = null;
+        // ถ้าเปิด WebSocket ไม่ได้ ค่อยกลับไปใช้การ poll แบบห่าง ๆ แทน
+        const unsubscribe = watchTierAssigned(() => {
             checkStatus();
-        }, 5000);
+            interval = setInterval(() => {
+                checkStatus();
+            }, 30000);
+        });
 
-        return () => clearInterval(interval);
+        return () => {
+            unsubscribe();
+            if (interval) clearInterval(interval);
+        };
     }, []);
 
     return (
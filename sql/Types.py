@@ -10,6 +10,22 @@ class UserType:
     role: str  
     tier: str  
 
+    @classmethod
+    def from_model(cls, user) -> "UserType":
+        """แปลง model.User เป็น UserType (ที่เดียวที่ทำการแปลงนี้)"""
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            role=user.role.value,
+            tier=user.tier.value
+        )
+
+    @strawberry.field
+    async def recentOrders(self, info: strawberry.Info) -> List["OrderType"]:
+        """order ล่าสุดของผู้ใช้ โหลดผ่าน DataLoader ของ request จึงรวมเป็น query เดียวแม้ถามหลายคน"""
+        return await info.context["orders_by_user_id"].load(self.id)
+
 @strawberry.type
 class LoginResponse:
     success: bool
@@ -17,6 +33,19 @@ class LoginResponse:
     user: Optional[UserType]
     passwordExpired: Optional[bool] = False
 
+@strawberry.type
+class UserConnection:
+    items: List[UserType]
+    endCursor: Optional[str]
+    hasNextPage: bool
+
+@strawberry.type
+class TierAssignmentResult:
+    userId: int
+    success: bool
+    message: str
+    user: Optional[UserType]
+
 @strawberry.type
 class StatusResponse:
     success: bool
@@ -25,5 +54,57 @@ class StatusResponse:
 @strawberry.type
 class OrderType:
     id: int
+    userId: int
     orderedAt: datetime
-    items: List[str]
\ No newline at end of file
+    items: List[str]
+
+    @classmethod
+    def from_model(cls, order) -> "OrderType":
+        return cls(id=order.id, userId=order.user_id, orderedAt=order.ordered_at, items=order.items)
+
+    @strawberry.field
+    async def user(self, info: strawberry.Info) -> Optional[UserType]:
+        return await info.context["user_by_id"].load(self.userId)
+
+@strawberry.type
+class MenuItemType:
+    name: str
+    tier: str
+    exclusive: bool
+
+@strawberry.type
+class MenuResponse:
+    version: int
+    notModified: bool
+    items: List[MenuItemType]
+
+@strawberry.type
+class DemandLine:
+    bucketStart: datetime
+    itemName: str
+    quantity: int
+
+@strawberry.type
+class LoginStatsLine:
+    bucketStart: datetime
+    identifier: str
+    successCount: int
+    failureCount: int
+
+@strawberry.type
+class OrderConnection:
+    items: List[OrderType]
+    endCursor: Optional[str]
+    hasNextPage: bool
+@strawberry.input
+class OrderInput:
+    userId: int
+    itemNames: List[str]
+    clientKey: Optional[str] = None
+
+@strawberry.type
+class OrderResult:
+    clientKey: str
+    success: bool
+    message: str
+    order: Optional[OrderType]
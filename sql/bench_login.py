@@ -0,0 +1,108 @@
+"""
+นับจำนวน SQL statement และ commit ที่ UserGateway.login_user ใช้ในแต่ละเส้นทาง
+รันกับ SQLite ชั่วคราว: python bench_login.py
+"""
+import asyncio
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+_db_path = os.path.join(tempfile.mkdtemp(prefix='bench_login_'), 'bench.db')
+os.environ.setdefault('ASYNC_DATABASE_URL', f'sqlite+aiosqlite:///{_db_path}')
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{_db_path}')
+os.environ.setdefault('HASHER_ROUNDS', '4')
+
+from sqlalchemy import event, update
+
+from database import async_engine, AsyncSessionLocal
+from model import Base, User, UserRole, UserTier
+from password_hasher import password_hasher
+from login_log_sink import login_log_sink
+from user_gateway import UserGateway, PasswordExpiredError, PASSWORD_EXPIRY_DAYS, MAX_LOGIN_ATTEMPTS
+
+PASSWORD = 'Passw0rd!'
+
+
+class StatementCounter:
+    def __init__(self):
+        self.statements = []
+        self.commits = 0
+
+    def reset(self):
+        self.statements = []
+        self.commits = 0
+
+    def on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement.split(None, 1)[0].upper())
+
+    def on_commit(self, conn):
+        self.commits += 1
+
+
+async def _seed():
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    hashed = await password_hasher.hash_password(PASSWORD)
+    now = datetime.utcnow()
+    async with AsyncSessionLocal() as db:
+        for name in ('clean', 'dirty', 'wrong', 'locker', 'locked', 'unlock', 'expired'):
+            db.add(User(username=name, email=f'{name}@bench.local', password=hashed,
+                        role=UserRole.USER, tier=UserTier.SAVER, password_updated_at=now))
+        await db.commit()
+        await db.execute(update(User).where(User.username == 'dirty').values(failed_login_attempts=2))
+        await db.execute(update(User).where(User.username == 'locked')
+                         .values(is_locked=True, locked_until=now + timedelta(minutes=15)))
+        await db.execute(update(User).where(User.username == 'unlock')
+                         .values(is_locked=True, locked_until=now - timedelta(minutes=1)))
+        await db.execute(update(User).where(User.username == 'expired')
+                         .values(password_updated_at=now - timedelta(days=PASSWORD_EXPIRY_DAYS + 1)))
+        await db.commit()
+
+
+async def _attempt(identifier: str, password: str) -> str:
+    try:
+        await UserGateway.login_user(identifier, password, ip_address='127.0.0.1')
+        return 'ok'
+    except PasswordExpiredError:
+        return 'expired'
+    except ValueError as e:
+        return str(e)
+
+
+async def main():
+    await _seed()
+    counter = StatementCounter()
+    event.listen(async_engine.sync_engine, 'before_cursor_execute', counter.on_execute)
+    event.listen(async_engine.sync_engine, 'commit', counter.on_commit)
+
+    # ทำให้บัญชี locker เหลืออีกครั้งเดียวก่อนถูกล็อก
+    for _ in range(MAX_LOGIN_ATTEMPTS - 1):
+        await _attempt('locker', 'wrong')
+
+    paths = [
+        ('success', 'clean', PASSWORD),
+        ('success (reset counters)', 'dirty', PASSWORD),
+        ('wrong password', 'wrong', 'wrong'),
+        ('wrong password (locks account)', 'locker', 'wrong'),
+        ('locked (cold)', 'locked', PASSWORD),
+        ('locked (guard cache)', 'locked', PASSWORD),
+        ('lock expired + success', 'unlock', PASSWORD),
+        ('password expired', 'expired', PASSWORD),
+        ('unknown user', 'nobody', PASSWORD),
+    ]
+    print(f"{'path':<32} {'stmts':>5} {'commits':>7} {'queued logs':>11}  statements / result")
+    for label, identifier, password in paths:
+        await login_log_sink.flush()
+        counter.reset()
+        outcome = await _attempt(identifier, password)
+        queued = login_log_sink.get_metrics()['queued']
+        print(f"{label:<32} {len(counter.statements):>5} {counter.commits:>7} {queued:>11}  "
+              f"{','.join(counter.statements) or '-'} / {outcome}")
+
+    await login_log_sink.flush()
+    password_hasher.shutdown()
+    await async_engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,289 @@
+"""
+นำเข้าผู้ใช้จำนวนมากจากไฟล์ CSV หรือ JSONL (คอลัมน์ username, email, password และ tier ถ้ามี)
+ตัวอย่าง: python bulk_import.py cohort.csv --tier SAVER --batch-size 500
+อ่านไฟล์ทีละ batch: ตรวจความถูกต้องทั้ง batch, ตรวจซ้ำกับฐานข้อมูลด้วย query เดียว,
+hash รหัสผ่านบน process pool แล้ว INSERT แบบ executemany หนึ่ง transaction ต่อ batch
+ความคืบหน้า (แถวสุดท้ายที่ commit แล้ว) บันทึกในตาราง app_state ใน transaction เดียวกับ INSERT
+รันคำสั่งเดิมซ้ำจะทำต่อจากแถวที่ commit ไว้ (--restart เพื่อเริ่มใหม่)
+แถวที่นำเข้าไม่ได้เขียนลงไฟล์รายงาน (CSV: row, username, email, error)
+"""
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import islice
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import delete, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from config import Config
+from database import AsyncSessionLocal, dispose_engines
+from model import AppState, User, UserRole, UserTier
+from password_hasher import _hashpw, process_pool_context
+from password_policy import validate_password_complexity
+
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+MAX_FIELD_LENGTH = 255
+ERROR_REPORT_FIELDS = ('row', 'username', 'email', 'error')
+PROGRESS_FIELDS = ('rows_processed', 'imported', 'failed')
+
+
+def parse_args():
+    hasher_config = Config.load_hasher_config()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input', help='CSV (with header) or JSONL file')
+    parser.add_argument('--format', choices=('csv', 'jsonl'), help='default: from the file extension')
+    parser.add_argument('--tier', default=UserTier.PENDING.value, choices=[tier.value for tier in UserTier],
+                        help='tier for rows without a tier column')
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--workers', type=int, default=hasher_config['max_workers'], help='bcrypt processes')
+    parser.add_argument('--rounds', type=int, default=hasher_config['rounds'], help='bcrypt cost factor')
+    parser.add_argument('--errors', help='default: <input>.errors.csv')
+    parser.add_argument('--restart', action='store_true', help='forget the saved progress of this input and start over')
+    return parser.parse_args()
+
+
+def read_rows(path: str, file_format: str) -> Iterator[Tuple[int, dict]]:
+    """อ่านทีละแถวเป็น (ลำดับแถวเริ่มที่ 1, dict) แถว JSONL ที่ไม่ใช่ JSON object จะได้ dict ว่าง"""
+    if file_format == 'csv':
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            for row_number, row in enumerate(csv.DictReader(f), start=1):
+                yield row_number, row
+        return
+    with open(path, encoding='utf-8') as f:
+        row_number = 0
+        for line in f:
+            if not line.strip():
+                continue
+            row_number += 1
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield row_number, row if isinstance(row, dict) else {}
+
+
+def validate_row(row: dict, default_tier: UserTier) -> Tuple[Optional[dict], Optional[str]]:
+    """คืน (ข้อมูลผู้ใช้ที่พร้อม hash, None) หรือ (None, ข้อความ error) ตามกฎเดียวกับ registerCustomer"""
+    username = str(row.get('username') or '').strip()
+    email = str(row.get('email') or '').strip()
+    password = str(row.get('password') or '')
+    if not username or not email or not password:
+        return None, "username, email and password are required."
+    if len(username) > MAX_FIELD_LENGTH or len(email) > MAX_FIELD_LENGTH:
+        return None, f"username and email must be at most {MAX_FIELD_LENGTH} characters."
+    if not EMAIL_PATTERN.match(email):
+        return None, f"Invalid email address '{email}'."
+    password_errors = validate_password_complexity(password)
+    if password_errors:
+        return None, " ".join(password_errors)
+
+    tier_name = str(row.get('tier') or '').strip().upper()
+    if tier_name and tier_name not in UserTier.__members__:
+        return None, f"Invalid tier '{tier_name}'."
+    tier = UserTier[tier_name] if tier_name else default_tier
+    return {'username': username, 'email': email, 'password': password, 'tier': tier}, None
+
+
+class BulkImporter:
+    def __init__(self, args):
+        self.args = args
+        self.default_tier = UserTier(args.tier)
+        self.errors_path = args.errors or f"{args.input}.errors.csv"
+        # ความคืบหน้าเก็บใน app_state แยกตามไฟล์ input (path เต็ม)
+        input_id = hashlib.sha256(os.path.abspath(args.input).encode('utf-8')).hexdigest()[:16]
+        self.progress_keys = {name: f"bulk_import:{input_id}:{name}" for name in PROGRESS_FIELDS}
+        # username/email ที่เห็นแล้วในไฟล์นี้ (ตัวพิมพ์เล็ก) ใช้จับแถวซ้ำกันเองในไฟล์
+        self.seen_usernames = set()
+        self.seen_emails = set()
+        self.rows_processed = 0
+        self.imported = 0
+        self.failed = 0
+
+    async def load_progress(self):
+        async with AsyncSessionLocal() as db:
+            if self.args.restart:
+                await db.execute(delete(AppState).where(AppState.key.in_(self.progress_keys.values())))
+                await db.commit()
+                return
+            rows = (await db.execute(
+                select(AppState.key, AppState.value).where(AppState.key.in_(self.progress_keys.values()))
+            )).all()
+        values = {key: value for key, value in rows}
+        for name, key in self.progress_keys.items():
+            setattr(self, name, values.get(key, 0))
+        if self.rows_processed:
+            print(f"Resuming after row {self.rows_processed} ({self.imported} imported, {self.failed} failed).")
+
+    async def save_progress(self, db, progress: dict):
+        """เขียนความคืบหน้าใน transaction ของ db (ผู้เรียก commit พร้อม INSERT ของ batch)"""
+        for name, key in self.progress_keys.items():
+            value = progress[name]
+            result = await db.execute(update(AppState).where(AppState.key == key).values(value=value))
+            if result.rowcount == 0:
+                db.add(AppState(key=key, value=value))
+
+    def trim_error_report(self):
+        """ตัดแถวในรายงานที่เกินแถวที่ commit แล้ว (เขียนไว้ก่อน commit ของ batch ที่ไม่สำเร็จ) จะถูกเขียนใหม่ตอนทำต่อ"""
+        if not os.path.exists(self.errors_path):
+            return
+        with open(self.errors_path, newline='', encoding='utf-8') as f:
+            lines = list(csv.reader(f))
+        kept = [line for line in lines[1:] if line and line[0].isdigit() and int(line[0]) <= self.rows_processed]
+        with open(self.errors_path, 'w', newline='', encoding='utf-8') as f:
+            report = csv.writer(f)
+            report.writerow(ERROR_REPORT_FIELDS)
+            report.writerows(kept)
+
+    async def run(self):
+        file_format = self.args.format or ('jsonl' if self.args.input.endswith(('.jsonl', '.ndjson')) else 'csv')
+        await self.load_progress()
+        resuming = self.rows_processed > 0
+        if resuming:
+            self.trim_error_report()
+        started = time.perf_counter()
+        imported_before = self.imported
+
+        with open(self.errors_path, 'a' if resuming else 'w', newline='', encoding='utf-8') as errors_file, \
+                ProcessPoolExecutor(max_workers=self.args.workers, mp_context=process_pool_context()) as executor:
+            report = csv.writer(errors_file)
+            if not resuming or errors_file.tell() == 0:
+                report.writerow(ERROR_REPORT_FIELDS)
+
+            def write_failures(failures):
+                for row_number, row, error in failures:
+                    report.writerow((row_number, row.get('username', ''), row.get('email', ''), error))
+                errors_file.flush()
+
+            rows = read_rows(self.args.input, file_format)
+            if resuming:
+                # แถวที่นำเข้าไปแล้วยังต้องจำไว้ เพื่อจับแถวซ้ำกับมันในส่วนที่เหลือของไฟล์
+                for _, row in islice(rows, self.rows_processed):
+                    user, error = validate_row(row, self.default_tier)
+                    if error is None:
+                        self.seen_usernames.add(user['username'].lower())
+                        self.seen_emails.add(user['email'].lower())
+
+            while True:
+                batch = list(islice(rows, self.args.batch_size))
+                if not batch:
+                    break
+                await self.import_batch(batch, executor, write_failures)
+
+                elapsed = time.perf_counter() - started
+                rate = (self.imported - imported_before) / elapsed if elapsed else 0.0
+                print(f"Rows {batch[0][0]}-{batch[-1][0]}: {self.imported} imported, "
+                      f"{self.failed} failed ({rate:.0f} users/s)")
+
+        await dispose_engines()
+        print(f"Done: {self.imported} imported, {self.failed} failed. Error report: {self.errors_path}")
+
+    async def import_batch(self, batch: List[Tuple[int, dict]], executor, write_failures):
+        failures = []
+        candidates = []
+        for row_number, row in batch:
+            user, error = validate_row(row, self.default_tier)
+            if error is None:
+                username_key, email_key = user['username'].lower(), user['email'].lower()
+                if username_key in self.seen_usernames or email_key in self.seen_emails:
+                    error = "Duplicate username or email in the input file."
+                self.seen_usernames.add(username_key)
+                self.seen_emails.add(email_key)
+            if error is None:
+                candidates.append((row_number, row, user))
+            else:
+                failures.append((row_number, row, error))
+
+        accepted, hashes = [], []
+        if candidates:
+            accepted, rejected = await self.split_existing(candidates)
+            failures.extend(rejected)
+        if accepted:
+            # bcrypt เป็นงาน CPU ล้วน กระจายไปทุก process ใน pool พร้อมกัน
+            loop = asyncio.get_running_loop()
+            hashes = await asyncio.gather(*(
+                loop.run_in_executor(executor, _hashpw, user['password'], self.args.rounds)
+                for _, _, user in accepted
+            ))
+        write_failures(sorted(failures, key=lambda failure: failure[0]))
+        await self.commit_batch(batch[-1][0], list(zip(accepted, hashes)), len(failures), write_failures)
+
+    async def split_existing(self, candidates):
+        """แยกแถวที่ username/email มีอยู่แล้วในฐานข้อมูลออก คืน (แถวที่รับ, แถวที่ไม่ผ่าน)"""
+        existing_usernames, existing_emails = await self.find_existing(
+            [user['username'] for _, _, user in candidates], [user['email'] for _, _, user in candidates]
+        )
+        accepted, rejected = [], []
+        for candidate in candidates:
+            row_number, row, user = candidate
+            if user['username'].lower() in existing_usernames or user['email'].lower() in existing_emails:
+                rejected.append((row_number, row, "Username or email already in use."))
+            else:
+                accepted.append(candidate)
+        return accepted, rejected
+
+    @staticmethod
+    async def find_existing(usernames: List[str], emails: List[str]) -> Tuple[set, set]:
+        """username/email ที่มีอยู่แล้วในฐานข้อมูล (ตัวพิมพ์เล็ก) ด้วย SELECT ... IN ครั้งเดียวต่อ batch"""
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(
+                select(User.username, User.email)
+                .where(or_(User.username.in_(usernames), User.email.in_(emails)))
+            )).all()
+        return {row.username.lower() for row in rows}, {row.email.lower() for row in rows}
+
+    async def commit_batch(self, last_row: int, hashed: list, failed: int, write_failures):
+        """
+        INSERT ทั้ง batch พร้อมความคืบหน้าใน transaction เดียว แถวที่ผิดพลาดเขียนลงรายงานไว้ก่อน commit แล้ว
+        ถ้าชน unique (มีคนสมัครแทรกเข้ามา) ตัดแถวที่ชนออก เขียนลงรายงาน แล้วลองใหม่ทั้ง batch
+        """
+        while True:
+            now = datetime.utcnow()
+            records = [
+                {
+                    'username': user['username'], 'email': user['email'], 'password': password_hash,
+                    'role': UserRole.USER, 'tier': user['tier'], 'password_updated_at': now, 'created_at': now,
+                }
+                for (_, _, user), password_hash in hashed
+            ]
+            progress = {
+                'rows_processed': last_row,
+                'imported': self.imported + len(records),
+                'failed': self.failed + failed,
+            }
+            try:
+                async with AsyncSessionLocal() as db:
+                    if records:
+                        await db.execute(insert(User), records)
+                    await self.save_progress(db, progress)
+                    await db.commit()
+            except IntegrityError:
+                accepted, rejected = await self.split_existing([candidate for candidate, _ in hashed])
+                if not rejected:
+                    raise
+                write_failures(rejected)
+                kept = {row_number for row_number, _, _ in accepted}
+                hashed = [(candidate, password_hash) for candidate, password_hash in hashed if candidate[0] in kept]
+                failed += len(rejected)
+                continue
+            for name, value in progress.items():
+                setattr(self, name, value)
+            return
+
+
+def main():
+    args = parse_args()
+    if not os.path.exists(args.input):
+        raise SystemExit(f"Input file '{args.input}' not found.")
+    asyncio.run(BulkImporter(args).run())
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,47 @@
+import os
+
+from dotenv import load_dotenv
+
+# อ่าน .env ครั้งเดียวก่อนที่โมดูลใดจะอ่านค่าผ่าน Config (ค่าใน environment จริงมีสิทธิ์เหนือกว่า)
+load_dotenv()
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+# ค่าเริ่มต้นของ engine/connection pool แยกตามสภาพแวดล้อม (เลือกด้วย DB_PROFILE)
+ENGINE_PROFILES = {
+    'dev': {
+        'pool_size': 5,
+        'max_overflow': 5,
+        'pool_timeout': 30,
+        'pool_recycle': 1800,
+        'pool_pre_ping': True,
+        'echo': False,
+    },
+    'prod': {
+        'pool_size': 20,
+        'max_overflow': 10,
+        'pool_timeout': 10,
+        'pool_recycle': 1800,
+        'pool_pre_ping': True,
+        'echo': False,
+    },
+    'test': {
+        'pool_size': 2,
+        'max_overflow': 0,
+        'pool_timeout': 5,
+        'pool_recycle': -1,
+        'pool_pre_ping': False,
+        'echo': False,
+    },
+}
+
+
 class Config:
     """
     คลาสสำหรับเก็บค่า Configuration ทั้งหมดของโปรเจกต์โดยตรงในโค้ด
@@ -9,20 +53,247 @@ class Config:
         คืนค่าการตั้งค่าของฐานข้อมูล
         """
         db_config = {
-            'host': '127.0.0.1',
-            'user': 'root',
-            'password': '123456', 
-            'database': 'cyber'
+            'host': os.getenv('DB_HOST', '127.0.0.1'),
+            'port': int(os.getenv('DB_PORT', 3306)),
+            'user': os.getenv('DB_USER', 'root'),
+            'password': os.getenv('DB_PASSWORD', '123456'),
+            'database': os.getenv('DB_NAME', 'cyber')
         }
         return db_config
 
+    @staticmethod
+    def load_engine_config(profile: str = None):
+        """
+        คืนค่าการตั้งค่าของ SQLAlchemy engine ตาม profile (dev/prod/test)
+        แล้ว override ทีละค่าด้วย environment variable (DB_POOL_SIZE, DB_ECHO, ...)
+        """
+        profile = profile or os.getenv('DB_PROFILE', 'dev')
+        if profile not in ENGINE_PROFILES:
+            raise ValueError(f"Unknown DB_PROFILE '{profile}'. Expected one of: {', '.join(ENGINE_PROFILES)}")
+
+        defaults = ENGINE_PROFILES[profile]
+        engine_config = {
+            'profile': profile,
+            'pool_size': int(os.getenv('DB_POOL_SIZE', defaults['pool_size'])),
+            'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', defaults['max_overflow'])),
+            'pool_timeout': float(os.getenv('DB_POOL_TIMEOUT', defaults['pool_timeout'])),
+            'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', defaults['pool_recycle'])),
+            'pool_pre_ping': _env_bool('DB_POOL_PRE_PING', defaults['pool_pre_ping']),
+            'echo': _env_bool('DB_ECHO', defaults['echo']),
+        }
+        return engine_config
+
     @staticmethod
     def load_server_config():
         """
         คืนค่าการตั้งค่าของ Server
         """
         server_config = {
-            'port': 8000
+            'mode': os.getenv('APP_MODE', 'dev'),
+            'host': os.getenv('SERVER_HOST', '0.0.0.0'),
+            'port': int(os.getenv('SERVER_PORT', 8000)),
+            'workers': int(os.getenv('SERVER_WORKERS', 0)) or (os.cpu_count() or 1),
+            'graceful_timeout': int(os.getenv('SERVER_GRACEFUL_TIMEOUT', 30)),
+            # reverse proxy ที่เชื่อ X-Forwarded-For ได้ (IP หรือ CIDR คั่นด้วย comma)
+            'trusted_proxies': [
+                entry.strip() for entry in os.getenv('TRUSTED_PROXIES', '127.0.0.1,::1').split(',') if entry.strip()
+            ]
         }
         return server_config
 
+    @staticmethod
+    def load_hasher_config():
+        """
+        คืนค่าการตั้งค่าของ process pool ที่ใช้ hash รหัสผ่าน (bcrypt)
+        """
+        hasher_config = {
+            'max_workers': int(os.getenv('HASHER_WORKERS', os.cpu_count() or 1)),
+            'max_queue': int(os.getenv('HASHER_MAX_QUEUE', 64)),
+            'rounds': int(os.getenv('HASHER_ROUNDS', 12))
+        }
+        return hasher_config
+
+    @staticmethod
+    def load_login_log_config():
+        """
+        คืนค่าการตั้งค่าของคิวที่เขียน LoginLog แบบ batch
+        """
+        login_log_config = {
+            'batch_size': int(os.getenv('LOGIN_LOG_BATCH_SIZE', 200)),
+            'flush_interval_ms': int(os.getenv('LOGIN_LOG_FLUSH_MS', 500)),
+            'max_queue': int(os.getenv('LOGIN_LOG_MAX_QUEUE', 10000))
+        }
+        return login_log_config
+
+    @staticmethod
+    def load_mail_config():
+        """
+        คืนค่าการตั้งค่าของระบบส่งอีเมล (MAIL_TRANSPORT = smtp, file หรือ memory)
+        """
+        mail_config = {
+            'transport': os.getenv('MAIL_TRANSPORT', 'smtp'),
+            'smtp_host': os.getenv('SMTP_HOST', 'smtp.gmail.com'),
+            'smtp_port': int(os.getenv('SMTP_PORT', 465)),
+            'username': os.getenv('EMAIL_ADDRESS'),
+            'password': os.getenv('EMAIL_PASSWORD'),
+            'file_dir': os.getenv('MAIL_FILE_DIR', './outbox'),
+            'workers': int(os.getenv('MAIL_WORKERS', 1)),
+            'max_queue': int(os.getenv('MAIL_MAX_QUEUE', 1000)),
+            'max_retries': int(os.getenv('MAIL_MAX_RETRIES', 5))
+        }
+        return mail_config
+
+    @staticmethod
+    def load_pubsub_config():
+        """
+        คืนค่าการตั้งค่าของ pub/sub broker (PUBSUB_BACKEND = memory หรือ redis)
+        """
+        pubsub_config = {
+            'backend': os.getenv('PUBSUB_BACKEND', 'memory'),
+            'redis_url': os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+        }
+        return pubsub_config
+
+    @staticmethod
+    def load_user_cache_config():
+        """
+        คืนค่าการตั้งค่าของ cache ข้อมูลผู้ใช้ (USER_CACHE_BACKEND = memory หรือ redis)
+        """
+        user_cache_config = {
+            'backend': os.getenv('USER_CACHE_BACKEND', 'memory'),
+            'redis_url': os.getenv('REDIS_URL', 'redis://localhost:6379/0'),
+            'max_entries': int(os.getenv('USER_CACHE_MAX_ENTRIES', 10000)),
+            'ttl_seconds': int(os.getenv('USER_CACHE_TTL', 300))
+        }
+        return user_cache_config
+
+    @staticmethod
+    def load_login_guard_config():
+        """
+        คืนค่าการตั้งค่าของ rate limit และ lockout ของการ login (LOGIN_GUARD_BACKEND = memory หรือ redis)
+        """
+        login_guard_config = {
+            'backend': os.getenv('LOGIN_GUARD_BACKEND', 'memory'),
+            'redis_url': os.getenv('REDIS_URL', 'redis://localhost:6379/0'),
+            'identifier_limit': int(os.getenv('LOGIN_RATE_PER_IDENTIFIER', 10)),
+            'ip_limit': int(os.getenv('LOGIN_RATE_PER_IP', 50)),
+            'window_seconds': int(os.getenv('LOGIN_RATE_WINDOW_SECONDS', 60)),
+            'failure_ttl_seconds': int(os.getenv('LOGIN_FAILURE_TTL_SECONDS', 900)),
+            # การตรวจ/ใช้ reset token นับแยกจาก login ด้วย window ที่ยาวกว่า (token มีแค่ 6 ตัว เดาได้ถ้าไม่จำกัด)
+            'reset_email_limit': int(os.getenv('RESET_RATE_PER_EMAIL', 10)),
+            'reset_ip_limit': int(os.getenv('RESET_RATE_PER_IP', 20)),
+            'reset_window_seconds': int(os.getenv('RESET_RATE_WINDOW_SECONDS', 900)),
+            'max_keys': int(os.getenv('LOGIN_GUARD_MAX_KEYS', 100000))
+        }
+        return login_guard_config
+
+    @staticmethod
+    def load_graphql_config():
+        """
+        คืนค่าการตั้งค่าของ persisted query และ cache ของ document ที่ parse/validate แล้ว
+        PERSISTED_QUERIES_MODE = apq (รับ query ใหม่ได้), record (รับแล้วบันทึกลง manifest)
+        หรือ allowlist (รันได้เฉพาะ document ที่อยู่ใน manifest)
+        """
+        graphql_config = {
+            'persisted_queries_mode': os.getenv('PERSISTED_QUERIES_MODE', 'apq'),
+            'manifest_path': os.getenv('PERSISTED_QUERIES_MANIFEST', 'persisted_queries.json'),
+            'max_entries': int(os.getenv('PERSISTED_QUERIES_MAX_ENTRIES', 1000)),
+            'document_cache_size': int(os.getenv('GRAPHQL_DOCUMENT_CACHE_SIZE', 256))
+        }
+        return graphql_config
+
+    @staticmethod
+    def load_query_limits_config():
+        """
+        คืนค่าการตั้งค่าของ operation batching และขีดจำกัด cost/depth/alias ของ GraphQL document แยกตาม role
+        request ที่ส่ง header X-Admin-Key ตรงกับ ADMIN_API_KEY ได้ขีดจำกัดของ ADMIN และเรียก field ของ admin ได้
+        (bulkAssignTier, addMenuItem, removeMenuItem, users, loginStats) ถ้าไม่ตั้งค่าจะเรียก field เหล่านี้ไม่ได้
+        """
+        query_limits_config = {
+            'max_operations': int(os.getenv('GRAPHQL_MAX_BATCH_OPERATIONS', 10)),
+            'admin_api_key': os.getenv('ADMIN_API_KEY'),
+            'default_list_size': int(os.getenv('QUERY_DEFAULT_LIST_SIZE', 20)),
+            'limits': {
+                'USER': {
+                    'max_depth': int(os.getenv('QUERY_MAX_DEPTH', 6)),
+                    'max_cost': int(os.getenv('QUERY_MAX_COST', 1000)),
+                    'max_aliases': int(os.getenv('QUERY_MAX_ALIASES', 10)),
+                },
+                'ADMIN': {
+                    'max_depth': int(os.getenv('ADMIN_QUERY_MAX_DEPTH', 10)),
+                    'max_cost': int(os.getenv('ADMIN_QUERY_MAX_COST', 20000)),
+                    'max_aliases': int(os.getenv('ADMIN_QUERY_MAX_ALIASES', 50)),
+                },
+            }
+        }
+        return query_limits_config
+
+    @staticmethod
+    def load_metrics_config():
+        """
+        คืนค่าการตั้งค่าของ metrics (SLOW_REQUEST_MS = 0 คือปิด slow-request log)
+        METRICS_OPERATION_NAMES คือชื่อ operation เพิ่มเติม (คั่นด้วย comma) ที่ใช้เป็น label ได้
+        """
+        metrics_config = {
+            'slow_request_ms': int(os.getenv('SLOW_REQUEST_MS', 0)),
+            'operation_names': [
+                name.strip() for name in os.getenv('METRICS_OPERATION_NAMES', '').split(',') if name.strip()
+            ]
+        }
+        return metrics_config
+
+    @staticmethod
+    def load_order_writer_config():
+        """
+        คืนค่าการตั้งค่าของการรวม order หลาย request เป็น INSERT เดียว (ORDER_BATCHING = true เพื่อเปิด)
+        """
+        order_writer_config = {
+            'enabled': _env_bool('ORDER_BATCHING', False),
+            'batch_size': int(os.getenv('ORDER_BATCH_SIZE', 100)),
+            'max_wait_ms': int(os.getenv('ORDER_BATCH_WAIT_MS', 5))
+        }
+        return order_writer_config
+
+    @staticmethod
+    def load_login_retention_config():
+        """
+        คืนค่าการตั้งค่าของการสรุป login_logs เป็นรายชั่วโมงและการลบแถวดิบที่เก่ากว่า retention_days
+        """
+        login_retention_config = {
+            'retention_days': int(os.getenv('LOGIN_LOG_RETENTION_DAYS', 30)),
+            'interval_seconds': int(os.getenv('LOGIN_STATS_INTERVAL_SECONDS', 60)),
+            'batch_size': int(os.getenv('LOGIN_STATS_BATCH_SIZE', 5000))
+        }
+        return login_retention_config
+
+    @staticmethod
+    def load_menu_config():
+        """
+        คืนค่าการตั้งค่าของ cache เมนู (ตรวจ version ในฐานข้อมูลทุกกี่วินาที)
+        """
+        menu_config = {
+            'refresh_seconds': int(os.getenv('MENU_REFRESH_SECONDS', 30))
+        }
+        return menu_config
+
+    @staticmethod
+    def load_reset_token_config(mode: str = None):
+        """
+        คืนค่าการตั้งค่าของ reset token (อายุ, จำนวนครั้งที่ใช้ได้, รอบการลบ token ที่หมดอายุ)
+        RESET_TOKEN_SECRET ต้องตั้งค่าเสมอ ยกเว้นโหมด dev (APP_MODE) ที่ใช้ค่าสำหรับทดสอบในเครื่องได้
+        """
+        mode = mode or os.getenv('APP_MODE', 'dev')
+        secret = os.getenv('RESET_TOKEN_SECRET')
+        if not secret:
+            if mode != 'dev':
+                raise ValueError(f"RESET_TOKEN_SECRET must be set when running in '{mode}' mode.")
+            secret = 'mookrata-dev-reset-secret'
+        reset_token_config = {
+            'secret': secret,
+            'ttl_minutes': int(os.getenv('RESET_TOKEN_TTL_MINUTES', 15)),
+            'max_attempts': int(os.getenv('RESET_TOKEN_MAX_ATTEMPTS', 5)),
+            'length': int(os.getenv('RESET_TOKEN_LENGTH', 6)),
+            'sweep_interval_seconds': int(os.getenv('RESET_TOKEN_SWEEP_SECONDS', 300)),
+            'sweep_batch_size': int(os.getenv('RESET_TOKEN_SWEEP_BATCH', 500))
+        }
+        return reset_token_config
@@ -1,16 +1,26 @@
-from database import engine
-from model import Base, User, LoginLog, Order
+import asyncio
+
+from database import get_async_engine, AsyncSessionLocal, dispose_engines
+from model import Base
+from menu_catalog import MenuCatalog
+
+async def create_tables():
+    async with get_async_engine().begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as db:
+        await MenuCatalog.seed_defaults(db)
+    await dispose_engines()
 
 def main():
     """
-    ฟังก์ชันสำหรับสร้างตารางทั้งหมดในฐานข้อมูล
+    ฟังก์ชันสำหรับสร้างตารางทั้งหมดในฐานข้อมูล (ฐานข้อมูลเดียวกับที่ API ใช้งาน)
     """
     print("Connecting to the database engine...")
-    
-    Base.metadata.create_all(bind=engine)
-    
+
+    asyncio.run(create_tables())
+
     print("Tables created successfully!")
     print("You can now run your main application.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,21 +1,23 @@
-import smtplib
 from email.message import EmailMessage
-import os
-from dotenv import load_dotenv
 
-load_dotenv()
+from config import Config
+from mail_queue import MailQueue, build_transport_factory
 
-GMAIL_ADDRESS = os.getenv("EMAIL_ADDRESS")
-GMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD")
+mail_config = Config.load_mail_config()
+RESET_TOKEN_TTL_MINUTES = Config.load_reset_token_config()['ttl_minutes']
+GMAIL_ADDRESS = mail_config['username']
 
-def send_reset_email(recipient_email: str, token: str):
-    if not GMAIL_ADDRESS or not GMAIL_PASSWORD:
-        print("ERROR: Email credentials not set in .env file.")
-        raise ConnectionError("Email service is not configured.")
+mail_queue = MailQueue(
+    build_transport_factory(mail_config),
+    workers=mail_config['workers'],
+    max_queue=mail_config['max_queue'],
+    max_retries=mail_config['max_retries'],
+)
 
+def build_reset_email(recipient_email: str, token: str) -> EmailMessage:
     msg = EmailMessage()
     msg['Subject'] = 'Your Mookrata App Password Reset Code'
-    msg['From'] = GMAIL_ADDRESS
+    msg['From'] = GMAIL_ADDRESS or 'no-reply@mookrata.local'
     msg['To'] = recipient_email
     
     msg.set_content(f"""
@@ -23,19 +25,21 @@ def send_reset_email(recipient_email: str, token: str):
 
     Your password reset code is: {token}
 
-    This code will expire in 15 minutes.
+    This code will expire in {RESET_TOKEN_TTL_MINUTES} minutes.
 
     If you did not request a password reset, please ignore this email.
 
     Thanks,
     The Mookrata App Team
     """)
+    return msg
+
+def send_reset_email(recipient_email: str, token: str):
+    """
+    ใส่อีเมลลงคิวแล้วคืนค่าทันที worker ของ mail_queue จะเป็นคนส่งจริง
+    """
+    if mail_config['transport'] == 'smtp' and (not mail_config['username'] or not mail_config['password']):
+        print("ERROR: Email credentials not set in .env file.")
+        raise ConnectionError("Email service is not configured.")
 
-    try:
-        with smtplib.SMTP_SSL('smtp.gmail.com', 465) as smtp:
-            smtp.login(GMAIL_ADDRESS, GMAIL_PASSWORD)
-            smtp.send_message(msg)
-        print(f"Password reset email sent to {recipient_email}")
-    except Exception as e:
-        print(f"Failed to send email: {e}")
-        raise e
\ No newline at end of file
+    mail_queue.enqueue(build_reset_email(recipient_email, token))
@@ -0,0 +1,78 @@
+import asyncio
+from typing import Dict, List, Optional
+
+from sqlalchemy import select, func
+from strawberry.dataloader import DataLoader
+
+from model import User, Order
+from Types import UserType, OrderType
+from user_cache import user_cache
+
+# จำนวน order ล่าสุดต่อผู้ใช้ที่ UserType.recentOrders คืนให้
+RECENT_ORDERS_PER_USER = 10
+
+
+async def load_users(session, user_ids: List[int]) -> List[Optional[UserType]]:
+    """
+    โหลดผู้ใช้หลายคนในครั้งเดียว: อ่านจาก user_cache ก่อน
+    ที่เหลือใช้ SELECT ... WHERE id IN (...) ครั้งเดียวแล้วเติมกลับเข้า cache
+    """
+    found: Dict[int, UserType] = {}
+    missing = []
+    for user_id in user_ids:
+        cached = await user_cache.get_by_id(user_id)
+        if cached:
+            found[user_id] = cached
+        else:
+            missing.append(user_id)
+
+    if missing:
+        users = (await session.execute(select(User).where(User.id.in_(missing)))).scalars().all()
+        loaded = [UserType.from_model(user) for user in users]
+        await session.rollback()
+        for user_type in loaded:
+            found[user_type.id] = user_type
+            await user_cache.put(user_type)
+
+    return [found.get(user_id) for user_id in user_ids]
+
+
+async def load_recent_orders(session, user_ids: List[int]) -> List[List[OrderType]]:
+    """โหลด order ล่าสุดของผู้ใช้หลายคนด้วย query เดียว (ROW_NUMBER แยกตาม user_id)"""
+    position = func.row_number().over(
+        partition_by=Order.user_id, order_by=(Order.ordered_at.desc(), Order.id.desc())
+    ).label('position')
+    ranked = select(Order.id, position).where(Order.user_id.in_(set(user_ids))).subquery()
+    orders = (await session.execute(
+        select(Order)
+        .join(ranked, ranked.c.id == Order.id)
+        .where(ranked.c.position <= RECENT_ORDERS_PER_USER)
+        .order_by(Order.user_id, Order.ordered_at.desc(), Order.id.desc())
+    )).scalars().all()
+    loaded = [OrderType.from_model(order) for order in orders]
+    await session.rollback()
+
+    grouped: Dict[int, List[OrderType]] = {user_id: [] for user_id in user_ids}
+    for order in loaded:
+        grouped[order.userId].append(order)
+    return [grouped[user_id] for user_id in user_ids]
+
+
+def build_loaders(session) -> dict:
+    """
+    สร้าง DataLoader ชุดใหม่สำหรับหนึ่ง GraphQL request ใช้ session เดียวกันทั้ง request
+    แต่ละ batch จบ transaction ทันทีเพื่อคืน connection ให้ pool (สำคัญกับ subscription ที่เปิดค้างนาน)
+    """
+    # AsyncSession ใช้พร้อมกันหลาย coroutine ไม่ได้ (DataLoader คนละตัว หรือหลาย operation ใน batch เดียว)
+    lock = asyncio.Lock()
+
+    def serialized(load):
+        async def load_fn(keys):
+            async with lock:
+                return await load(session, keys)
+        return load_fn
+
+    return {
+        'user_by_id': DataLoader(load_fn=serialized(load_users)),
+        'orders_by_user_id': DataLoader(load_fn=serialized(load_recent_orders)),
+    }
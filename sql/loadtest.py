@@ -0,0 +1,318 @@
+"""
+load test ของ GraphQL API กับ SQLite ในเครื่อง (รัน app จาก main.py ใน process เดียวผ่าน httpx ASGITransport)
+ตัวอย่าง: python loadtest.py --users 500 --orders 5000 --requests 2000 --concurrency 50 --output run.json
+ผลลัพธ์ (throughput, p50/p95/p99, จำนวน SQL ต่อ operation) บันทึกเป็น JSON เพื่อเทียบระหว่างเวอร์ชัน
+"""
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+SCENARIOS = ('login_storm', 'status_polling', 'order_burst', 'admin_assign', 'mixed')
+MIXED_WEIGHTS = {'login': 10, 'status': 60, 'order': 25, 'assign': 5}
+PASSWORD = 'Passw0rd!'
+# admin_assign เปลี่ยน tier จริง (PENDING -> SAVER/PREMIUM) ไม่ใช่ตั้งค่าเดิมซ้ำ
+ASSIGN_TIERS = ('SAVER', 'PREMIUM')
+# bulkAssignTier เป็น field ของ admin ต้องส่ง X-Admin-Key
+ADMIN_API_KEY = 'loadtest-admin-key'
+ADMIN_OPERATIONS = {'bulkAssignTier'}
+
+LOGIN_MUTATION = 'mutation Login($u: String!, $p: String!) { loginUser(loginIdentifier: $u, password: $p) { success message } }'
+STATUS_QUERY = 'query CheckMyStatus($id: Int!) { checkMyStatus(userId: $id) { id tier } }'
+ORDER_MUTATION = 'mutation CreateOrder($id: Int!, $items: [String!]!) { createOrder(userId: $id, itemNames: $items) { id } }'
+BULK_ASSIGN_MUTATION = 'mutation BulkAssignTier($ids: [Int!]!, $tier: String!) { bulkAssignTier(userIds: $ids, tier: $tier) { success } }'
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--orders', type=int, default=1000)
+    parser.add_argument('--login-logs', type=int, default=5000)
+    parser.add_argument('--requests', type=int, default=500, help='requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS, help='repeatable; default: all')
+    parser.add_argument('--bcrypt-rounds', type=int, default=4, help='production uses 12')
+    parser.add_argument('--db', help='SQLite file (default: a fresh temp file)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='loadtest-results.json')
+    return parser.parse_args()
+
+
+def configure_environment(args):
+    """ต้องตั้งค่าก่อน import โมดูลของ app เพราะ engine และ singleton ถูกสร้างตอน import"""
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix='loadtest_'), 'loadtest.db')
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    os.environ['ASYNC_DATABASE_URL'] = f'sqlite+aiosqlite:///{db_path}'
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    os.environ['HASHER_ROUNDS'] = str(args.bcrypt_rounds)
+    os.environ.setdefault('MAIL_TRANSPORT', 'memory')
+    # ทุก request มาจาก IP เดียวกัน จึงยก rate limit ขึ้นเพื่อวัดตัว API ไม่ใช่ login_guard
+    os.environ.setdefault('LOGIN_RATE_PER_IP', '1000000000')
+    os.environ.setdefault('LOGIN_RATE_PER_IDENTIFIER', '1000000000')
+    os.environ['ADMIN_API_KEY'] = ADMIN_API_KEY
+    return db_path
+
+
+async def seed(args, rng: random.Random) -> dict:
+    from sqlalchemy import insert
+    from create_db import create_tables
+    from database import AsyncSessionLocal
+    from menu_catalog import DEFAULT_MENU
+    from model import User, UserRole, UserTier, Order, OrderItem, LoginLog
+    from password_hasher import _hashpw
+
+    await create_tables()
+    hashed = _hashpw(PASSWORD, args.bcrypt_rounds)
+    now = datetime.utcnow()
+    tiers = [UserTier.SAVER, UserTier.PREMIUM, UserTier.PENDING]
+    users = [
+        {
+            'username': f'user{i}', 'email': f'user{i}@loadtest.local', 'password': hashed,
+            'role': UserRole.USER, 'tier': tiers[i % len(tiers)], 'password_updated_at': now,
+            'created_at': now - timedelta(seconds=args.users - i),
+        }
+        for i in range(1, args.users + 1)
+    ]
+    saver_items = [name for name, tier in DEFAULT_MENU if tier == UserTier.SAVER]
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(User), users)
+        ordering_ids = [i for i in range(1, args.users + 1) if users[i - 1]['tier'] != UserTier.PENDING]
+        order_rows, item_rows = [], []
+        for order_id in range(1, args.orders + 1):
+            name = rng.choice(saver_items)
+            quantity = rng.randint(1, 5)
+            order_rows.append({
+                'id': order_id, 'user_id': rng.choice(ordering_ids), 'client_key': f'seed-{order_id}',
+                'ordered_at': now - timedelta(minutes=rng.randint(0, 60 * 24)),
+                'items': [f'{name}-{quantity}'],
+            })
+            item_rows.append({'order_id': order_id, 'item_name': name, 'quantity': quantity})
+        if order_rows:
+            await db.execute(insert(Order), order_rows)
+            await db.execute(insert(OrderItem), item_rows)
+        log_rows = [
+            {
+                'username_attempt': f'user{rng.randint(1, args.users)}', 'user_id': None,
+                'timestamp': now - timedelta(minutes=rng.randint(0, 60 * 24 * 30)),
+                'is_success': rng.random() < 0.9, 'ip_address': '10.0.0.1',
+            }
+            for _ in range(args.login_logs)
+        ]
+        if log_rows:
+            await db.execute(insert(LoginLog), log_rows)
+        await db.commit()
+
+    return {
+        'ordering_ids': ordering_ids,
+        'pending_ids': [i for i in range(1, args.users + 1) if users[i - 1]['tier'] == UserTier.PENDING],
+        'items': saver_items,
+    }
+
+
+async def reset_fixtures(data: dict):
+    """
+    คืนสภาพข้อมูลก่อนแต่ละ scenario: ผู้ใช้ pending กลับเป็น PENDING และปลดล็อกทุกบัญชี
+    เพื่อให้ admin_assign เปลี่ยน tier จริงทุกรอบ และบัญชีที่ login_storm ล็อกไว้ไม่กระทบ scenario ถัดไป
+    """
+    from sqlalchemy import update
+    from database import AsyncSessionLocal
+    from login_guard import login_guard
+    from model import User, UserTier
+    from user_cache import user_cache
+
+    async with AsyncSessionLocal() as db:
+        if data['pending_ids']:
+            await db.execute(update(User).where(User.id.in_(data['pending_ids'])).values(tier=UserTier.PENDING))
+        locked = (await db.execute(
+            update(User).where(User.is_locked.is_(True) | (User.failed_login_attempts > 0))
+            .values(is_locked=False, locked_until=None, failed_login_attempts=0)
+            .returning(User.id, User.username, User.email)
+        )).all()
+        await db.commit()
+
+    for user_id in data['pending_ids'] + [row.id for row in locked]:
+        await user_cache.invalidate(user_id)
+    for row in locked:
+        await login_guard.clear_lock((row.username, row.email))
+    for user_id in data['ordering_ids'] + data['pending_ids']:
+        await login_guard.clear_failures(user_id)
+
+
+async def count_locked_accounts() -> int:
+    from sqlalchemy import func, select
+    from database import AsyncSessionLocal
+    from model import User
+
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(select(func.count()).select_from(User).where(User.is_locked.is_(True)))).scalar()
+
+
+class StatementTracker:
+    """นับ SQL ต่อ request ผ่าน contextvar ส่วนที่เหลือ (เช่น login_log_sink) นับเป็น background"""
+
+    def __init__(self):
+        self.current: contextvars.ContextVar = contextvars.ContextVar('loadtest_statements', default=None)
+        self.background = 0
+
+    def install(self, sync_engine):
+        from sqlalchemy import event
+
+        @event.listens_for(sync_engine, 'before_cursor_execute')
+        def _count(conn, cursor, statement, parameters, context, executemany):
+            counter = self.current.get()
+            if counter is None:
+                self.background += 1
+            else:
+                counter[0] += 1
+
+
+def build_request(kind: str, data: dict, rng: random.Random):
+    if kind == 'login':
+        user_id = rng.choice(data['ordering_ids'] + data['pending_ids'])
+        password = PASSWORD if rng.random() < 0.9 else 'wrong-password'
+        return 'loginUser', LOGIN_MUTATION, {'u': f'user{user_id}', 'p': password}
+    if kind == 'status':
+        return 'checkMyStatus', STATUS_QUERY, {'id': rng.choice(data['ordering_ids'] + data['pending_ids'])}
+    if kind == 'order':
+        items = [f'{name}-{rng.randint(1, 3)}' for name in rng.sample(data['items'], 2)]
+        return 'createOrder', ORDER_MUTATION, {'id': rng.choice(data['ordering_ids']), 'items': items}
+    if kind == 'assign':
+        ids = rng.sample(data['pending_ids'], min(20, len(data['pending_ids'])))
+        return 'bulkAssignTier', BULK_ASSIGN_MUTATION, {'ids': ids, 'tier': rng.choice(ASSIGN_TIERS)}
+    raise ValueError(kind)
+
+
+def pick_kind(scenario: str, rng: random.Random) -> str:
+    if scenario == 'mixed':
+        return rng.choices(list(MIXED_WEIGHTS), weights=list(MIXED_WEIGHTS.values()))[0]
+    return {'login_storm': 'login', 'status_polling': 'status', 'order_burst': 'order', 'admin_assign': 'assign'}[scenario]
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples) -> dict:
+    latencies = sorted(sample['ms'] for sample in samples)
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for sample in samples if sample['error']),
+        'p50_ms': round(percentile(latencies, 0.50), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'p99_ms': round(percentile(latencies, 0.99), 2),
+        'max_ms': round(latencies[-1], 2) if latencies else 0.0,
+        'statements_per_op': round(sum(sample['statements'] for sample in samples) / len(samples), 2) if samples else 0.0,
+    }
+
+
+async def run_scenario(client, tracker: StatementTracker, scenario: str, data: dict, args, rng: random.Random) -> dict:
+    remaining = args.requests
+    samples = []
+    background_before = tracker.background
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            operation, query, variables = build_request(pick_kind(scenario, rng), data, rng)
+            counter = [0]
+            token = tracker.current.set(counter)
+            started = time.perf_counter()
+            try:
+                headers = {'X-Admin-Key': ADMIN_API_KEY} if operation in ADMIN_OPERATIONS else None
+                response = await client.post('/graphql', json={'query': query, 'variables': variables},
+                                             headers=headers)
+                error = response.status_code != 200 or bool(response.json().get('errors'))
+            except Exception:
+                error = True
+            finally:
+                tracker.current.reset(token)
+            samples.append({'op': operation, 'ms': (time.perf_counter() - started) * 1000,
+                            'statements': counter[0], 'error': error})
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    result = summarize(samples)
+    result.update(
+        duration_s=round(elapsed, 3),
+        throughput_rps=round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        background_statements=tracker.background - background_before,
+        locked_accounts=await count_locked_accounts(),
+        operations={
+            operation: summarize([sample for sample in samples if sample['op'] == operation])
+            for operation in sorted({sample['op'] for sample in samples})
+        },
+    )
+    return result
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or 'unknown'
+    except OSError:
+        return 'unknown'
+
+
+def print_report(results: dict):
+    print(f"{'scenario':<16} {'reqs':>6} {'errors':>6} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'stmts/op':>9} "
+          f"{'locked':>6}")
+    for scenario, result in results.items():
+        print(f"{scenario:<16} {result['requests']:>6} {result['errors']:>6} {result['throughput_rps']:>8} "
+              f"{result['p50_ms']:>8} {result['p95_ms']:>8} {result['p99_ms']:>8} {result['statements_per_op']:>9} "
+              f"{result['locked_accounts']:>6}")
+
+
+async def main(args):
+    import httpx
+    from database import get_async_engine
+    from main import create_app
+
+    app = create_app()
+
+    rng = random.Random(args.seed)
+    data = await seed(args, rng)
+    tracker = StatementTracker()
+    tracker.install(get_async_engine().sync_engine)
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url='http://loadtest') as client:
+            for scenario in args.scenario or SCENARIOS:
+                await reset_fixtures(data)
+                results[scenario] = await run_scenario(client, tracker, scenario, data, args, rng)
+
+    print_report(results)
+    report = {
+        'timestamp': datetime.utcnow().isoformat() + 'Z',
+        'revision': git_revision(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'parameters': {key: value for key, value in vars(args).items() if key != 'output'},
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    arguments = parse_args()
+    configure_environment(arguments)
+    asyncio.run(main(arguments))
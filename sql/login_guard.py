@@ -0,0 +1,230 @@
+import time
+from collections import OrderedDict, deque
+from typing import Optional
+
+from config import Config
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+
+class LoginRejectedError(ValueError):
+    """ถูก raise เมื่อปฏิเสธการ login ก่อนถึงฐานข้อมูล (ถูก rate limit หรือบัญชีถูกล็อกอยู่)"""
+
+
+class GuardBackend:
+    """interface ของที่เก็บสถานะ rate limit / lockout แชร์กันได้หลาย worker ถ้าใช้ backend ภายนอก"""
+
+    async def hit(self, key: str, limit: int, window_seconds: int) -> float:
+        """บันทึกการเรียกหนึ่งครั้ง คืนค่า 0 ถ้ายังไม่เกิน limit ภายใน window ไม่เช่นนั้นคืนจำนวนวินาทีที่ต้องรอ"""
+        raise NotImplementedError
+
+    async def incr(self, key: str, ttl_seconds: int) -> int:
+        raise NotImplementedError
+
+    async def get(self, key: str) -> Optional[float]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: float, ttl_seconds: int):
+        raise NotImplementedError
+
+    async def delete(self, *keys: str):
+        raise NotImplementedError
+
+
+class InMemoryGuardBackend(GuardBackend):
+    """เก็บสถานะใน process จำกัดจำนวน key ไม่เกิน max_keys (ทิ้ง key ที่ไม่ได้ใช้นานที่สุดก่อน)"""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._windows: OrderedDict = OrderedDict()
+        self._values: OrderedDict = OrderedDict()
+
+    def _trim(self, store: OrderedDict, key: str):
+        store.move_to_end(key)
+        while len(store) > self.max_keys:
+            store.popitem(last=False)
+
+    async def hit(self, key: str, limit: int, window_seconds: int) -> float:
+        now = time.monotonic()
+        hits = self._windows.get(key)
+        if hits is None:
+            hits = self._windows[key] = deque()
+        self._trim(self._windows, key)
+        while hits and hits[0] <= now - window_seconds:
+            hits.popleft()
+        if len(hits) >= limit:
+            return hits[0] + window_seconds - now
+        hits.append(now)
+        return 0.0
+
+    def _get_live(self, key: str):
+        entry = self._values.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._values[key]
+            return None
+        return value
+
+    async def incr(self, key: str, ttl_seconds: int) -> int:
+        value = int(self._get_live(key) or 0) + 1
+        self._values[key] = (value, time.monotonic() + ttl_seconds)
+        self._trim(self._values, key)
+        return value
+
+    async def get(self, key: str) -> Optional[float]:
+        return self._get_live(key)
+
+    async def set(self, key: str, value: float, ttl_seconds: int):
+        self._values[key] = (value, time.monotonic() + ttl_seconds)
+        self._trim(self._values, key)
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self._values.pop(key, None)
+
+
+class RedisGuardBackend(GuardBackend):
+    """เก็บสถานะใน Redis เพื่อให้ทุก worker เห็น rate limit และ lockout เดียวกัน"""
+
+    def __init__(self, url: str):
+        if aioredis is None:
+            raise ImportError("LOGIN_GUARD_BACKEND=redis requires the 'redis' package (pip install redis).")
+        self._client = aioredis.from_url(url)
+
+    async def hit(self, key: str, limit: int, window_seconds: int) -> float:
+        now = time.time()
+        async with self._client.pipeline(transaction=True) as pipe:
+            pipe.zremrangebyscore(key, 0, now - window_seconds)
+            pipe.zcard(key)
+            pipe.zrange(key, 0, 0, withscores=True)
+            _, count, oldest = await pipe.execute()
+        if count >= limit:
+            return oldest[0][1] + window_seconds - now if oldest else float(window_seconds)
+        async with self._client.pipeline(transaction=True) as pipe:
+            pipe.zadd(key, {f"{now}:{id(pipe)}": now})
+            pipe.expire(key, window_seconds)
+            await pipe.execute()
+        return 0.0
+
+    async def incr(self, key: str, ttl_seconds: int) -> int:
+        async with self._client.pipeline(transaction=True) as pipe:
+            pipe.incr(key)
+            pipe.expire(key, ttl_seconds)
+            value, _ = await pipe.execute()
+        return int(value)
+
+    async def get(self, key: str) -> Optional[float]:
+        value = await self._client.get(key)
+        return float(value) if value is not None else None
+
+    async def set(self, key: str, value: float, ttl_seconds: int):
+        await self._client.set(key, value, ex=max(int(ttl_seconds), 1))
+
+    async def delete(self, *keys: str):
+        if keys:
+            await self._client.delete(*keys)
+
+
+class LoginGuard:
+    """
+    ด่านหน้าของ UserGateway.login_user ตรวจ rate limit (แยกตาม identifier และ IP) และสถานะล็อกบัญชี
+    ก่อนแตะฐานข้อมูลหรือ bcrypt ทำให้การปฏิเสธ request ใช้เวลาระดับไมโครวินาที
+    นับจำนวนครั้งที่ใส่รหัสผิดไว้ที่นี่ และให้ gateway เขียนลงตาราง users เฉพาะตอนสถานะล็อกเปลี่ยน
+    """
+
+    def __init__(self, backend: GuardBackend, identifier_limit: int, ip_limit: int,
+                 window_seconds: int, failure_ttl_seconds: int,
+                 reset_email_limit: int, reset_ip_limit: int, reset_window_seconds: int):
+        self.backend = backend
+        self.identifier_limit = identifier_limit
+        self.ip_limit = ip_limit
+        self.window_seconds = window_seconds
+        self.failure_ttl_seconds = failure_ttl_seconds
+        self.reset_email_limit = reset_email_limit
+        self.reset_ip_limit = reset_ip_limit
+        self.reset_window_seconds = reset_window_seconds
+        self.rejected_locked = 0
+        self.rejected_rate_limited = 0
+        self.rejected_reset = 0
+
+    @staticmethod
+    def _lock_key(identifier: str) -> str:
+        return f"login:lock:{identifier.lower()}"
+
+    async def check(self, identifier: str, ip_address: Optional[str]):
+        locked_until = await self.backend.get(self._lock_key(identifier))
+        if locked_until is not None and locked_until > time.time():
+            self.rejected_locked += 1
+            minutes, _ = divmod(locked_until - time.time(), 60)
+            raise LoginRejectedError(f"Account is locked. Please try again in {int(minutes) + 1} minutes.")
+
+        retry_after = await self.backend.hit(f"login:rate:id:{identifier.lower()}", self.identifier_limit, self.window_seconds)
+        if not retry_after and ip_address:
+            retry_after = await self.backend.hit(f"login:rate:ip:{ip_address}", self.ip_limit, self.window_seconds)
+        if retry_after:
+            self.rejected_rate_limited += 1
+            raise LoginRejectedError(f"Too many login attempts. Please try again in {int(retry_after) + 1} seconds.")
+
+    async def check_reset(self, email: str, ip_address: Optional[str]):
+        """
+        จำกัดจำนวนครั้งที่ตรวจ/ใช้ reset token ต่อ email และต่อ IP
+        (reset_token_store นับ attempt ต่อ token ของ email นั้นอีกชั้นหนึ่ง)
+        """
+        retry_after = await self.backend.hit(f"reset:rate:email:{email.lower()}", self.reset_email_limit,
+                                             self.reset_window_seconds)
+        if not retry_after and ip_address:
+            retry_after = await self.backend.hit(f"reset:rate:ip:{ip_address}", self.reset_ip_limit,
+                                                 self.reset_window_seconds)
+        if retry_after:
+            self.rejected_reset += 1
+            minutes, _ = divmod(retry_after, 60)
+            raise LoginRejectedError(f"Too many reset attempts. Please try again in {int(minutes) + 1} minutes.")
+
+    async def remember_lock(self, identifiers, locked_until_epoch: float):
+        ttl = locked_until_epoch - time.time()
+        if ttl <= 0:
+            return
+        for identifier in identifiers:
+            await self.backend.set(self._lock_key(identifier), locked_until_epoch, int(ttl) + 1)
+
+    async def clear_lock(self, identifiers):
+        await self.backend.delete(*(self._lock_key(identifier) for identifier in identifiers))
+
+    async def record_failure(self, user_id: int) -> int:
+        return await self.backend.incr(f"login:failures:{user_id}", self.failure_ttl_seconds)
+
+    async def clear_failures(self, user_id: int):
+        await self.backend.delete(f"login:failures:{user_id}")
+
+    def get_metrics(self) -> dict:
+        return {
+            'rejected_locked': self.rejected_locked,
+            'rejected_rate_limited': self.rejected_rate_limited,
+            'rejected_reset': self.rejected_reset,
+        }
+
+
+def build_backend(guard_config: dict) -> GuardBackend:
+    if guard_config['backend'] == 'memory':
+        return InMemoryGuardBackend(guard_config['max_keys'])
+    if guard_config['backend'] == 'redis':
+        return RedisGuardBackend(guard_config['redis_url'])
+    raise ValueError(f"Unknown LOGIN_GUARD_BACKEND '{guard_config['backend']}'. Expected memory or redis.")
+
+
+_guard_config = Config.load_login_guard_config()
+login_guard = LoginGuard(
+    build_backend(_guard_config),
+    identifier_limit=_guard_config['identifier_limit'],
+    ip_limit=_guard_config['ip_limit'],
+    window_seconds=_guard_config['window_seconds'],
+    failure_ttl_seconds=_guard_config['failure_ttl_seconds'],
+    reset_email_limit=_guard_config['reset_email_limit'],
+    reset_ip_limit=_guard_config['reset_ip_limit'],
+    reset_window_seconds=_guard_config['reset_window_seconds'],
+)
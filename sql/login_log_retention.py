@@ -0,0 +1,149 @@
+import asyncio
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import delete, false, select, true, update
+from sqlalchemy.dialects import mysql, sqlite
+
+from config import Config
+from database import AsyncSessionLocal
+from model import LoginLog, LoginStatsHourly
+
+
+def hour_bucket(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def login_stats_upsert(dialect_name: str, rows: List[dict]):
+    """INSERT ... ON DUPLICATE KEY UPDATE (MySQL) หรือ ON CONFLICT DO UPDATE (SQLite) เพื่อบวกจำนวนเข้า rollup"""
+    table = LoginStatsHourly.__table__
+    if dialect_name == 'mysql':
+        stmt = mysql.insert(table).values(rows)
+        return stmt.on_duplicate_key_update(
+            success_count=table.c.success_count + stmt.inserted.success_count,
+            failure_count=table.c.failure_count + stmt.inserted.failure_count,
+        )
+    if dialect_name == 'sqlite':
+        stmt = sqlite.insert(table).values(rows)
+        return stmt.on_conflict_do_update(
+            index_elements=[table.c.bucket_start, table.c.identifier],
+            set_={
+                'success_count': table.c.success_count + stmt.excluded.success_count,
+                'failure_count': table.c.failure_count + stmt.excluded.failure_count,
+            },
+        )
+    raise NotImplementedError(f"Login stats rollup is not supported on '{dialect_name}'.")
+
+
+class LoginLogCompactor:
+    """
+    background task ที่ทุก interval_seconds จะ
+    1) สรุป login_logs ที่ commit แล้วแต่ยังไม่ได้สรุป (rolled_up = false) เป็นจำนวนต่อชั่วโมงต่อ identifier ใน login_stats_hourly
+    2) ลบแถวดิบที่เก่ากว่า retention_days และสรุปแล้วทีละ batch
+    ทำเครื่องหมายรายแถวแทน watermark ของ id เพราะแถวที่ได้ id น้อยกว่าอาจ commit ทีหลัง
+    การตั้ง rolled_up มีเงื่อนไข rolled_up = false และอยู่ใน transaction เดียวกับ rollup จึงรันหลาย worker พร้อมกันได้โดยไม่นับซ้ำ
+    """
+
+    def __init__(self, retention_days: int, interval_seconds: int, batch_size: int):
+        self.retention = timedelta(days=retention_days)
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+        self.rolled_up = 0
+        self.purged = 0
+        self.last_rolled_id = 0
+
+    async def compact(self) -> int:
+        """สรุปแถวที่ยังไม่ได้สรุปทั้งหมดเข้า rollup แล้วคืนจำนวนแถวที่สรุปได้"""
+        rolled = 0
+        while True:
+            async with AsyncSessionLocal() as db:
+                rows = (await db.execute(
+                    select(LoginLog.id, LoginLog.timestamp, LoginLog.username_attempt, LoginLog.is_success)
+                    .where(LoginLog.rolled_up == false())
+                    .order_by(LoginLog.id)
+                    .limit(self.batch_size)
+                )).all()
+                if not rows:
+                    break
+
+                ids = [row.id for row in rows]
+                claimed = await db.execute(
+                    update(LoginLog)
+                    .where(LoginLog.id.in_(ids), LoginLog.rolled_up == false())
+                    .values(rolled_up=True)
+                )
+                if claimed.rowcount != len(ids):
+                    # worker อื่นสรุปบางแถวในชุดนี้ไปแล้ว อ่านใหม่
+                    await db.rollback()
+                    continue
+
+                counts = defaultdict(lambda: [0, 0])
+                for row in rows:
+                    counts[(hour_bucket(row.timestamp), row.username_attempt.lower())][0 if row.is_success else 1] += 1
+                await db.execute(login_stats_upsert(db.bind.dialect.name, [
+                    {'bucket_start': bucket_start, 'identifier': identifier,
+                     'success_count': success, 'failure_count': failure}
+                    for (bucket_start, identifier), (success, failure) in counts.items()
+                ]))
+                await db.commit()
+            rolled += len(rows)
+            self.last_rolled_id = max(self.last_rolled_id, ids[-1])
+            if len(rows) < self.batch_size:
+                break
+        self.rolled_up += rolled
+        return rolled
+
+    async def purge(self) -> int:
+        """ลบ login_logs ที่เก่ากว่า retention ทีละ batch (เฉพาะแถวที่สรุปแล้ว)"""
+        cutoff = datetime.utcnow() - self.retention
+        deleted = 0
+        while True:
+            async with AsyncSessionLocal() as db:
+                ids = (await db.execute(
+                    select(LoginLog.id)
+                    .where(LoginLog.timestamp < cutoff, LoginLog.rolled_up == true())
+                    .limit(self.batch_size)
+                )).scalars().all()
+                if not ids:
+                    break
+                await db.execute(delete(LoginLog).where(LoginLog.id.in_(ids)))
+                await db.commit()
+            deleted += len(ids)
+            if len(ids) < self.batch_size:
+                break
+        self.purged += deleted
+        return deleted
+
+    async def _run_forever(self):
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.compact()
+                await self.purge()
+            except Exception as e:
+                print(f"Failed to compact login logs: {e}")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get_metrics(self) -> dict:
+        return {
+            'rolled_up': self.rolled_up,
+            'purged': self.purged,
+            'last_rolled_id': self.last_rolled_id,
+        }
+
+
+login_log_compactor = LoginLogCompactor(**Config.load_login_retention_config())
@@ -0,0 +1,108 @@
+import asyncio
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import insert
+
+from config import Config
+from database import AsyncSessionLocal
+from model import LoginLog
+
+
+class LoginLogSink:
+    """
+    คิวในหน่วยความจำสำหรับบันทึก LoginLog
+    background task จะเขียนลงฐานข้อมูลเป็น multi-row INSERT ทุก batch_size แถว
+    หรือทุก flush_interval_ms มิลลิวินาที แล้วแต่อย่างไหนถึงก่อน
+    ถ้าคิวเต็มจะทิ้งรายการนั้นและนับไว้ใน dropped
+    """
+
+    def __init__(self, batch_size: int, flush_interval_ms: int, max_queue: int):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+
+    def record(self, username: str, is_success: bool, user_id: int = None, ip_address: str = None):
+        try:
+            self._queue.put_nowait({
+                'username_attempt': username,
+                'is_success': is_success,
+                'user_id': user_id,
+                'ip_address': ip_address,
+                'timestamp': datetime.utcnow(),
+            })
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    def start(self):
+        if self._task is None:
+            self._closing = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """หยุด background task หลังจากเขียนทุกรายการที่ค้างอยู่ในคิวแล้ว"""
+        self._closing = True
+        if self._task is not None:
+            await self._task
+            self._task = None
+        else:
+            await self.flush()
+
+    async def flush(self):
+        while not self._queue.empty():
+            await self._write(self._drain_nowait())
+
+    async def _run(self):
+        while not (self._closing and self._queue.empty()):
+            batch = self._drain_nowait() if self._closing else await self._collect_batch()
+            if batch:
+                await self._write(batch)
+
+    def _drain_nowait(self) -> list:
+        batch = []
+        while len(batch) < self.batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _collect_batch(self) -> list:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+        batch = []
+        while len(batch) < self.batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _write(self, batch: list):
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(insert(LoginLog), batch)
+                await db.commit()
+            self.written += len(batch)
+            self.batches += 1
+        except Exception as e:
+            self.failed += len(batch)
+            print(f"Failed to write {len(batch)} login log rows: {e}")
+
+    def get_metrics(self) -> dict:
+        return {
+            'queued': self._queue.qsize(),
+            'written': self.written,
+            'batches': self.batches,
+            'dropped': self.dropped,
+            'failed': self.failed,
+        }
+
+
+login_log_sink = LoginLogSink(**Config.load_login_log_config())
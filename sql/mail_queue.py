@@ -0,0 +1,207 @@
+import logging
+import os
+import queue
+import smtplib
+import threading
+import time
+from email.message import EmailMessage
+from typing import Callable, List, Optional
+
+from metrics import smtp_send_seconds
+
+# worker ของคิวรันบน thread เบื้องหลัง รายงานผ่าน logger เพื่อให้กรองตาม level ได้ (ตัวนับอยู่ใน get_metrics)
+logger = logging.getLogger(__name__)
+
+
+class MailTransport:
+    """interface ของช่องทางส่งอีเมล แต่ละ worker จะมี transport เป็นของตัวเอง"""
+
+    def send(self, msg: EmailMessage):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SMTPTransport(MailTransport):
+    """
+    ส่งผ่าน SMTP over SSL โดยเปิด connection และ login ครั้งเดียวแล้วใช้ซ้ำ
+    ถ้า connection ว่างนานเกิน idle_check_seconds จะส่ง NOOP ตรวจก่อน และ reconnect เมื่อหลุด
+    """
+
+    def __init__(self, host: str, port: int, username: str, password: str, idle_check_seconds: int = 60):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.idle_check_seconds = idle_check_seconds
+        self._smtp: Optional[smtplib.SMTP_SSL] = None
+        self._last_used = 0.0
+
+    def _connect(self):
+        self.close()
+        smtp = smtplib.SMTP_SSL(self.host, self.port, timeout=30)
+        smtp.login(self.username, self.password)
+        self._smtp = smtp
+
+    def _ensure_connected(self):
+        if self._smtp is None:
+            self._connect()
+        elif time.monotonic() - self._last_used > self.idle_check_seconds:
+            try:
+                status, _ = self._smtp.noop()
+                if status != 250:
+                    self._connect()
+            except smtplib.SMTPException:
+                self._connect()
+
+    def send(self, msg: EmailMessage):
+        self._ensure_connected()
+        try:
+            self._smtp.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            self._connect()
+            self._smtp.send_message(msg)
+        self._last_used = time.monotonic()
+
+    def close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                pass
+            self._smtp = None
+
+
+class FileTransport(MailTransport):
+    """เขียนอีเมลเป็นไฟล์ .eml ลงในโฟลเดอร์ ใช้ทดสอบในเครื่องโดยไม่ต้องมี network"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def send(self, msg: EmailMessage):
+        filename = f"{time.time_ns()}-{threading.get_ident()}.eml"
+        with open(os.path.join(self.directory, filename), 'wb') as f:
+            f.write(msg.as_bytes())
+
+
+class MemoryTransport(MailTransport):
+    """เก็บอีเมลไว้ใน list (outbox) ใช้สำหรับทดสอบ"""
+
+    def __init__(self):
+        self.outbox: List[EmailMessage] = []
+
+    def send(self, msg: EmailMessage):
+        self.outbox.append(msg)
+
+
+def build_transport_factory(mail_config: dict) -> Callable[[], MailTransport]:
+    transport = mail_config['transport']
+    if transport == 'smtp':
+        return lambda: SMTPTransport(
+            mail_config['smtp_host'],
+            mail_config['smtp_port'],
+            mail_config['username'],
+            mail_config['password'],
+        )
+    if transport == 'file':
+        return lambda: FileTransport(mail_config['file_dir'])
+    if transport == 'memory':
+        shared = MemoryTransport()
+        return lambda: shared
+    raise ValueError(f"Unknown MAIL_TRANSPORT '{transport}'. Expected smtp, file or memory.")
+
+
+class MailQueue:
+    """
+    คิวส่งอีเมลในหน่วยความจำ ให้ mutation คืนค่าได้ทันทีโดยไม่ต้องรอ SMTP
+    worker แต่ละตัวใช้ transport ของตัวเองซ้ำ และ retry แบบ exponential backoff เมื่อส่งไม่สำเร็จ
+    """
+
+    def __init__(self, transport_factory: Callable[[], MailTransport], workers: int = 1,
+                 max_queue: int = 1000, max_retries: int = 5, backoff_seconds: float = 1.0):
+        self.transport_factory = transport_factory
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._threads: List[threading.Thread] = []
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+
+    def enqueue(self, msg: EmailMessage):
+        try:
+            self._queue.put_nowait(msg)
+        except queue.Full:
+            raise ConnectionError("Email service is busy. Please try again later.")
+
+    def start(self):
+        if self._threads:
+            return
+        self._stopping.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"mail-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 10.0):
+        """รอให้ส่งอีเมลที่ค้างในคิวจนหมด (ไม่เกิน timeout วินาที) แล้วหยุด worker"""
+        deadline = time.monotonic() + timeout
+        while self._threads and self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self._stopping.set()
+        for thread in self._threads:
+            thread.join(max(deadline - time.monotonic(), 0.1))
+        self._threads = []
+
+    def _worker(self):
+        transport = self.transport_factory()
+        try:
+            while not self._stopping.is_set():
+                try:
+                    msg = self._queue.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                try:
+                    self._deliver(transport, msg)
+                finally:
+                    self._queue.task_done()
+        finally:
+            transport.close()
+
+    def _deliver(self, transport: MailTransport, msg: EmailMessage):
+        for attempt in range(self.max_retries):
+            started = time.perf_counter()
+            try:
+                transport.send(msg)
+                smtp_send_seconds.observe(time.perf_counter() - started, outcome='sent')
+                with self._lock:
+                    self.sent += 1
+                logger.debug("Email '%s' sent to %s", msg['Subject'], msg['To'])
+                return
+            except Exception as e:
+                smtp_send_seconds.observe(time.perf_counter() - started, outcome='error')
+                logger.warning("Failed to send email to %s (attempt %d/%d): %s",
+                               msg['To'], attempt + 1, self.max_retries, e)
+                transport.close()
+                if attempt + 1 < self.max_retries:
+                    with self._lock:
+                        self.retried += 1
+                    if self._stopping.wait(self.backoff_seconds * (2 ** attempt)):
+                        break
+        logger.error("Giving up on email '%s' to %s", msg['Subject'], msg['To'])
+        with self._lock:
+            self.failed += 1
+
+    def get_metrics(self) -> dict:
+        with self._lock:
+            return {
+                'queued': self._queue.qsize(),
+                'sent': self.sent,
+                'retried': self.retried,
+                'failed': self.failed,
+            }
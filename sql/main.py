@@ -1,10 +1,12 @@
+import asyncio
+import importlib.util
 import socket
+import sys
+from contextlib import asynccontextmanager
+
 import uvicorn
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from schema import schema
-from strawberry.fastapi import GraphQLRouter
 from config import Config
+from startup_timing import StartupTimer
 
 def get_local_ip() -> str:
     try:
@@ -14,26 +16,167 @@ def get_local_ip() -> str:
     except Exception:
         return "127.0.0.1"
 
-app = FastAPI(title="Mookrata API")
+def create_app():
+    """
+    สร้าง FastAPI app พร้อม GraphQL router และ /metrics
+    โมดูลของ app ถูก import ที่นี่ (ไม่ใช่ตอน import main) engine และ pool ถูกสร้างตอน startup ใน lifespan
+    """
+    timer = StartupTimer()
+    with timer.phase('import'):
+        from fastapi import FastAPI
+        from fastapi.responses import PlainTextResponse
+        from fastapi.middleware.cors import CORSMiddleware
+        from schema import schema
+        from password_hasher import password_hasher
+        from login_log_sink import login_log_sink
+        from email_utils import mail_queue
+        from reset_tokens import reset_token_store
+        from order_writer import order_writer
+        from login_log_retention import login_log_compactor
+        from database import check_connection, dispose_engines, get_pool_stats
+        from metrics import registry
+        from user_cache import user_cache
+        from login_guard import login_guard
+        from request_context import get_graphql_context
+        from persisted_queries import PersistedQueryRouter, persisted_query_store
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        with timer.phase('database'):
+            await check_connection()
+        with timer.phase('background_tasks'):
+            login_log_sink.start()
+            mail_queue.start()
+            reset_token_store.start()
+            order_writer.start()
+            login_log_compactor.start()
+        print(timer.report())
+        yield
+        await login_log_compactor.stop()
+        await order_writer.stop()
+        await reset_token_store.stop()
+        await login_log_sink.stop()
+        await asyncio.to_thread(mail_queue.stop)
+        password_hasher.shutdown()
+        await dispose_engines()
+
+    with timer.phase('app'):
+        app = FastAPI(title="Mookrata API", lifespan=lifespan)
+
+        app.add_middleware(
+            CORSMiddleware,
+            allow_origins=["*"],
+            allow_credentials=True,
+            allow_methods=["*"],
+            allow_headers=["*"],
+        )
+
+        graphql_app = PersistedQueryRouter(schema, persisted_query_store, context_getter=get_graphql_context)
+        app.include_router(graphql_app, prefix="/graphql")
+
+        @app.get("/health/db-pool")
+        def db_pool_stats():
+            return get_pool_stats()
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+        registry.register_collector("startup", timer.get_metrics)
+        registry.register_collector("db_pool", get_pool_stats)
+        registry.register_collector("password_hasher", password_hasher.get_metrics)
+        registry.register_collector("login_log_sink", login_log_sink.get_metrics)
+        registry.register_collector("login_guard", login_guard.get_metrics)
+        registry.register_collector("mail_queue", mail_queue.get_metrics)
+        registry.register_collector("user_cache", user_cache.get_metrics)
+        registry.register_collector("persisted_queries", persisted_query_store.get_metrics)
+        registry.register_collector("order_writer", order_writer.get_metrics)
+        registry.register_collector("login_log_compactor", login_log_compactor.get_metrics)
 
-graphql_app = GraphQLRouter(schema)
-app.include_router(graphql_app, prefix="/graphql")
+        @app.get("/metrics", response_class=PlainTextResponse)
+        def metrics():
+            """metric ของ worker นี้ในรูปแบบ Prometheus text format"""
+            return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+    return app
+
+def run_dev(server_config: dict):
+    """โหมดพัฒนา: process เดียว เปิด reload เมื่อแก้ไฟล์"""
+    print(f"🚀 Starting dev server on http://{get_local_ip()}:{server_config['port']}/graphql")
+
+    uvicorn.run("main:create_app", factory=True, host=server_config['host'], port=server_config['port'], reload=True)
+
+def _memory_backends() -> list:
+    """backend ที่เก็บ state ไว้ใน process เดียว (worker อื่นมองไม่เห็น)"""
+    backends = {
+        'PUBSUB_BACKEND': Config.load_pubsub_config()['backend'],
+        'USER_CACHE_BACKEND': Config.load_user_cache_config()['backend'],
+        'LOGIN_GUARD_BACKEND': Config.load_login_guard_config()['backend'],
+    }
+    return [name for name, backend in backends.items() if backend == 'memory']
+
+def run_prod(server_config: dict):
+    """
+    โหมด production: หลาย worker process ตามจำนวน CPU
+    ถ้ามี gunicorn จะ preload app/schema ใน master ก่อน fork worker
+    ตอนปิด server จะรอ request ที่ค้างอยู่ (graceful_timeout) และ lifespan จะ flush คิวต่าง ๆ
+    """
+    try:
+        Config.load_reset_token_config('prod')
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+    memory_backends = _memory_backends()
+    if server_config['workers'] > 1 and memory_backends:
+        # event ของ tierAssigned, cache ของ tier และตัวนับ lockout ต้องเห็นร่วมกันทุก worker
+        raise SystemExit(
+            f"Refusing to start {server_config['workers']} workers while {', '.join(memory_backends)} "
+            f"= memory: state would not be shared between workers. "
+            f"Set them to redis (REDIS_URL) or run with SERVER_WORKERS=1."
+        )
+
+    print(f"🚀 Starting production server on {server_config['host']}:{server_config['port']} "
+          f"with {server_config['workers']} workers")
+
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        print("gunicorn is not installed, starting uvicorn workers without preloading.")
+        uvicorn.run(
+            "main:create_app",
+            factory=True,
+            host=server_config['host'],
+            port=server_config['port'],
+            workers=server_config['workers'],
+            timeout_graceful_shutdown=server_config['graceful_timeout'],
+        )
+        return
+
+    worker_class = (
+        "uvicorn_worker.UvicornWorker"
+        if importlib.util.find_spec("uvicorn_worker") is not None
+        else "uvicorn.workers.UvicornWorker"
+    )
+
+    class PreloadedApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f"{server_config['host']}:{server_config['port']}")
+            self.cfg.set('workers', server_config['workers'])
+            self.cfg.set('worker_class', worker_class)
+            self.cfg.set('preload_app', True)
+            self.cfg.set('graceful_timeout', server_config['graceful_timeout'])
+
+        def load(self):
+            return create_app()
+
+    PreloadedApplication().run()
 
 def run():
     server_config = Config.load_server_config()
-    host_ip = get_local_ip()
-    
-    print(f"🚀 Starting server on http://{host_ip}:{server_config['port']}/graphql")
-    
-    uvicorn.run("main:app", host=host_ip, port=int(server_config["port"]), reload=True)
+    mode = sys.argv[1] if len(sys.argv) > 1 else server_config['mode']
+
+    if mode == "prod":
+        run_prod(server_config)
+    elif mode == "dev":
+        run_dev(server_config)
+    else:
+        raise SystemExit(f"Unknown mode '{mode}'. Use 'dev' or 'prod'.")
 
 if __name__ == "__main__":
-    run()
\ No newline at end of file
+    run()
@@ -0,0 +1,135 @@
+import asyncio
+import time
+from typing import Dict, FrozenSet, List, Tuple
+
+from sqlalchemy import select, update, func
+
+from config import Config
+from database import AsyncSessionLocal
+from model import MenuItem, AppState, UserTier
+
+MENU_VERSION_KEY = 'menu_version'
+
+# เมนูเริ่มต้น (ย้ายมาจาก SAVER_ITEMS / PREMIUM_EXCLUSIVE_ITEMS ในแอป) ใช้ตอนสร้างฐานข้อมูลใหม่
+DEFAULT_MENU = [
+    ('หมูสามชั้น', UserTier.SAVER),
+    ('สันคอหมู', UserTier.SAVER),
+    ('ตับหมู', UserTier.SAVER),
+    ('ผักกาดขาว', UserTier.SAVER),
+    ('ผักบุ้ง', UserTier.SAVER),
+    ('วุ้นเส้น', UserTier.SAVER),
+    ('ไข่ไก่', UserTier.SAVER),
+    ('น้ำจิ้มสุกี้', UserTier.SAVER),
+    ('กุ้งแม่น้ำ', UserTier.PREMIUM),
+    ('เนื้อริบอาย', UserTier.PREMIUM),
+    ('หอยเชลล์', UserTier.PREMIUM),
+    ('ชีส', UserTier.PREMIUM),
+]
+
+# tier ไหนสั่งเมนูของ tier ใดได้บ้าง
+TIER_INCLUDES = {
+    UserTier.PENDING: (),
+    UserTier.SAVER: (UserTier.SAVER,),
+    UserTier.PREMIUM: (UserTier.SAVER, UserTier.PREMIUM),
+}
+
+
+class MenuCatalog:
+    """
+    cache ของเมนูในหน่วยความจำ พร้อม version สำหรับให้ client ตรวจว่าเมนูเปลี่ยนหรือยัง
+    ตรวจ version ในฐานข้อมูลไม่เกินทุก refresh_seconds วินาที และโหลดเมนูใหม่เมื่อ version เปลี่ยนเท่านั้น
+    """
+
+    def __init__(self, refresh_seconds: int):
+        self.refresh_seconds = refresh_seconds
+        self.version = -1
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+        self._menus: Dict[UserTier, List[Tuple[str, UserTier]]] = {}
+        self._allowed: Dict[UserTier, FrozenSet[str]] = {}
+
+    async def _ensure_fresh(self):
+        if time.monotonic() - self._checked_at < self.refresh_seconds:
+            return
+        async with self._lock:
+            if time.monotonic() - self._checked_at < self.refresh_seconds:
+                return
+            async with AsyncSessionLocal() as db:
+                version = await self._read_version(db)
+                if version != self.version:
+                    await self._load(db, version)
+            self._checked_at = time.monotonic()
+
+    @staticmethod
+    async def _read_version(db) -> int:
+        return (await db.execute(select(AppState.value).where(AppState.key == MENU_VERSION_KEY))).scalar() or 0
+
+    async def _load(self, db, version: int):
+        rows = (await db.execute(
+            select(MenuItem.name, MenuItem.tier)
+            .where(MenuItem.is_active.is_(True))
+            .order_by(MenuItem.sort_order, MenuItem.id)
+        )).all()
+        menus = {
+            tier: [(row.name, row.tier) for row in rows if row.tier in included]
+            for tier, included in TIER_INCLUDES.items()
+        }
+        self._menus = menus
+        self._allowed = {tier: frozenset(name for name, _ in items) for tier, items in menus.items()}
+        self.version = version
+
+    async def get_menu(self, tier: UserTier) -> Tuple[int, List[Tuple[str, UserTier]]]:
+        await self._ensure_fresh()
+        return self.version, self._menus.get(tier, [])
+
+    async def allowed_items(self, tier: UserTier) -> FrozenSet[str]:
+        await self._ensure_fresh()
+        return self._allowed.get(tier, frozenset())
+
+    async def add_item(self, name: str, tier: UserTier) -> int:
+        if tier == UserTier.PENDING:
+            raise ValueError("Menu items must belong to the SAVER or PREMIUM tier.")
+        async with AsyncSessionLocal() as db:
+            item = (await db.execute(select(MenuItem).where(MenuItem.name == name))).scalars().first()
+            if item:
+                item.tier = tier
+                item.is_active = True
+            else:
+                next_order = (await db.execute(select(func.max(MenuItem.sort_order)))).scalar() or 0
+                db.add(MenuItem(name=name, tier=tier, sort_order=next_order + 1))
+            return await self._bump_version(db)
+
+    async def remove_item(self, name: str) -> int:
+        async with AsyncSessionLocal() as db:
+            item = (await db.execute(select(MenuItem).where(MenuItem.name == name))).scalars().first()
+            if not item or not item.is_active:
+                raise ValueError(f"Menu item '{name}' not found.")
+            item.is_active = False
+            return await self._bump_version(db)
+
+    async def _bump_version(self, db) -> int:
+        """เพิ่ม version ใน transaction เดียวกับการแก้เมนู แล้วบังคับให้ worker นี้โหลดเมนูใหม่ทันที"""
+        result = await db.execute(
+            update(AppState).where(AppState.key == MENU_VERSION_KEY).values(value=AppState.value + 1)
+        )
+        if result.rowcount == 0:
+            db.add(AppState(key=MENU_VERSION_KEY, value=1))
+        await db.commit()
+        version = await self._read_version(db)
+        self._checked_at = 0.0
+        return version
+
+    @staticmethod
+    async def seed_defaults(db):
+        """ใส่เมนูเริ่มต้นเมื่อยังไม่มีเมนูในฐานข้อมูล"""
+        if (await db.execute(select(MenuItem.id).limit(1))).first():
+            return
+        db.add_all([
+            MenuItem(name=name, tier=tier, sort_order=index)
+            for index, (name, tier) in enumerate(DEFAULT_MENU)
+        ])
+        db.add(AppState(key=MENU_VERSION_KEY, value=1))
+        await db.commit()
+
+
+menu_catalog = MenuCatalog(Config.load_menu_config()['refresh_seconds'])
@@ -0,0 +1,252 @@
+import contextvars
+import inspect
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from strawberry.extensions import SchemaExtension
+
+from config import Config
+
+# operation ที่แอป (appmoo) ส่งมา ใช้เป็น label ได้เสมอ
+KNOWN_OPERATIONS = (
+    'BulkAssignTier', 'CheckStatus', 'CreateOrder', 'LoginUser', 'Menu', 'PendingUsers', 'RegisterCustomer',
+    'RequestPasswordReset', 'ResetPassword', 'TierAssigned', 'VerifyResetToken',
+)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{str(value)}"'.replace('\n', ' ') for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(self.labelnames, key)} {value}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        # ต่อ label: [จำนวนในแต่ละ bucket (ไม่สะสม) + ช่อง +Inf, sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                    cumulative += bucket_count
+                    le = 'le="+Inf"' if bound == float('inf') else f'le="{bound}"'
+                    lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}')
+                lines.append(f'{self.name}_sum{_format_labels(self.labelnames, key)} {total}')
+                lines.append(f'{self.name}_count{_format_labels(self.labelnames, key)} {count}')
+        return lines
+
+
+class MetricsRegistry:
+    """
+    เก็บ metric ของ process นี้และแปลงเป็น Prometheus text format สำหรับ /metrics
+    collector คือฟังก์ชัน get_metrics() เดิมของแต่ละ component ค่าตัวเลขจะออกเป็น gauge
+    (แต่ละ worker ของ gunicorn มี registry ของตัวเอง)
+    """
+
+    def __init__(self):
+        self._metrics: list = []
+        self._collectors: List[Tuple[str, Callable[[], dict]]] = []
+
+    def counter(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, help_text, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, help_text, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, prefix: str, collect: Callable[[], dict]):
+        self._collectors.append((prefix, collect))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for prefix, collect in self._collectors:
+            self._render_gauges(lines, prefix, collect())
+        return '\n'.join(lines) + '\n'
+
+    def _render_gauges(self, lines: List[str], prefix: str, values: dict):
+        for key, value in values.items():
+            name = f'{prefix}_{key}'
+            if isinstance(value, dict):
+                self._render_gauges(lines, name, value)
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                lines.append(f'# TYPE {name} gauge')
+                lines.append(f'{name} {value}')
+
+
+registry = MetricsRegistry()
+
+graphql_operation_seconds = registry.histogram(
+    'graphql_operation_seconds', 'GraphQL operation latency.', ('operation', 'type'))
+graphql_resolver_seconds = registry.histogram(
+    'graphql_resolver_seconds', 'Latency of async GraphQL resolvers.', ('field',))
+graphql_errors_total = registry.counter(
+    'graphql_errors_total', 'GraphQL operations that returned errors.', ('operation',))
+graphql_rejected_total = registry.counter(
+    'graphql_rejected_total', 'GraphQL documents rejected by depth/alias/cost limits.', ('reason', 'role'))
+db_statements_per_operation = registry.histogram(
+    'db_statements_per_operation', 'SQL statements executed per GraphQL operation.', ('operation',), COUNT_BUCKETS)
+db_seconds_per_operation = registry.histogram(
+    'db_seconds_per_operation', 'Time spent in SQL statements per GraphQL operation.', ('operation',))
+db_statement_seconds = registry.histogram(
+    'db_statement_seconds', 'Latency of individual SQL statements.', ('verb',))
+password_hash_seconds = registry.histogram(
+    'password_hash_seconds', 'bcrypt hash/check time including pool queueing.', ('op',))
+smtp_send_seconds = registry.histogram(
+    'smtp_send_seconds', 'Mail transport send time per attempt.', ('outcome',))
+
+
+class RequestStats:
+    """สถิติ SQL ของ GraphQL operation ปัจจุบัน (ผูกกับ contextvar จึงตามไปถึง DataLoader และ session)"""
+
+    def __init__(self):
+        self.statements: List[Tuple[str, float]] = []
+        self.db_seconds = 0.0
+
+
+_current_request: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar('request_stats', default=None)
+
+
+def instrument_engine(sync_engine):
+    """ติด event hook นับจำนวนและเวลาของทุก SQL statement ของ engine นี้"""
+
+    @event.listens_for(sync_engine, 'before_cursor_execute')
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, 'after_cursor_execute')
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_started'].pop()
+        db_statement_seconds.observe(elapsed, verb=statement.split(None, 1)[0].upper())
+        stats = _current_request.get()
+        if stats is not None:
+            stats.statements.append((statement, elapsed))
+            stats.db_seconds += elapsed
+
+    @event.listens_for(sync_engine, 'handle_error')
+    def _error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get('query_started'):
+            conn.info['query_started'].pop()
+
+
+class MetricsExtension(SchemaExtension):
+    """
+    วัดเวลาของแต่ละ operation และ resolver แบบ async (resolver ที่แค่อ่าน attribute ไม่ถูกจับเวลา)
+    พร้อมจำนวน SQL ต่อ operation และพิมพ์ slow-request log เมื่อเกิน slow_request_ms
+    """
+
+    def on_operation(self):
+        stats = RequestStats()
+        token = _current_request.set(stats)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            _current_request.reset(token)
+            elapsed = time.perf_counter() - started
+            context = self.execution_context
+            operation = _operation_label(context)
+            try:
+                operation_type = context.operation_type.value
+            except Exception:
+                operation_type = 'unknown'
+            graphql_operation_seconds.observe(elapsed, operation=operation, type=operation_type)
+            db_statements_per_operation.observe(len(stats.statements), operation=operation)
+            db_seconds_per_operation.observe(stats.db_seconds, operation=operation)
+            if context.result is not None and context.result.errors:
+                graphql_errors_total.inc(operation=operation)
+            if _slow_request_ms and elapsed * 1000 >= _slow_request_ms:
+                _log_slow_request(operation, elapsed, stats)
+
+    def resolve(self, _next, root, info, *args, **kwargs):
+        result = _next(root, info, *args, **kwargs)
+        if not inspect.isawaitable(result):
+            return result
+        return self._timed(result, f'{info.parent_type.name}.{info.field_name}')
+
+    @staticmethod
+    async def _timed(awaitable, field: str):
+        started = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            graphql_resolver_seconds.observe(time.perf_counter() - started, field=field)
+
+
+def allow_operation_labels(names):
+    """เพิ่มชื่อ operation ที่ใช้เป็น label ได้ (เช่นชื่อจาก manifest ของ persisted query)"""
+    _operation_labels.update(name for name in names if name)
+
+
+def _operation_label(context) -> str:
+    """
+    ชื่อ operation ที่ใช้เป็น label เฉพาะชื่อที่รู้จัก (KNOWN_OPERATIONS, METRICS_OPERATION_NAMES หรือ manifest)
+    ชื่ออื่นที่ client ตั้งมาเองรวมเป็น 'other' และ operation ที่ไม่มีชื่อเป็น 'anonymous' เพื่อไม่ให้จำนวน label โตไม่จำกัด
+    """
+    name = context.operation_name
+    if not name:
+        return 'anonymous'
+    return name if name in _operation_labels else 'other'
+
+
+def _log_slow_request(operation: str, elapsed: float, stats: RequestStats):
+    print(f"Slow GraphQL operation '{operation}': {elapsed * 1000:.1f} ms, "
+          f"{len(stats.statements)} statements, {stats.db_seconds * 1000:.1f} ms in DB")
+    for statement, statement_elapsed in stats.statements:
+        print(f"  {statement_elapsed * 1000:7.2f} ms  {' '.join(statement.split())[:200]}")
+
+
+_metrics_config = Config.load_metrics_config()
+_slow_request_ms = _metrics_config['slow_request_ms']
+_operation_labels = set(KNOWN_OPERATIONS) | set(_metrics_config['operation_names'])
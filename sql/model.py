@@ -1,6 +1,7 @@
 # model.py
 
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Enum, JSON, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Boolean, Enum, JSON, ForeignKey, Index, UniqueConstraint, false
+from sqlalchemy.dialects import mysql
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.sql import func
 import enum
@@ -18,6 +19,10 @@ class UserTier(enum.Enum):
 
 class User(Base):
     __tablename__ = 'users'
+    __table_args__ = (
+        # รายชื่อผู้ใช้ของ admin กรองตาม tier แล้วเรียงตาม (created_at, id)
+        Index('ix_users_tier_created_at_id', 'tier', 'created_at', 'id'),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     username = Column(String(255), unique=True, nullable=False, index=True)
@@ -32,17 +37,34 @@ class User(Base):
     is_locked = Column(Boolean, nullable=False, default=False)
     locked_until = Column(DateTime, nullable=True)
     
-    reset_token = Column(String(255), nullable=True, unique=True)
-    reset_token_expiry = Column(DateTime, nullable=True)
-
     created_at = Column(DateTime, nullable=False, default=func.now())
 
     def __repr__(self):
         return f"<User(id={self.id}, username={self.username}, role={self.role}, tier={self.tier})>"
 
 
+class PasswordResetToken(Base):
+    """reset token เก็บเป็น hash เท่านั้น แยกออกจากตาราง users ให้เป็นตารางเล็กที่ลบทิ้งได้"""
+    __tablename__ = 'password_reset_tokens'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False, index=True)
+    token_hash = Column(String(64), nullable=False, unique=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, nullable=False, default=func.now())
+
+
 class LoginLog(Base):
     __tablename__ = 'login_logs'
+    __table_args__ = (
+        # ไล่ดู login ตามช่วงเวลา รายผู้ใช้ และราย identifier ที่พิมพ์มา โดยไม่ต้อง scan ทั้งตาราง
+        Index('ix_login_logs_timestamp', 'timestamp'),
+        Index('ix_login_logs_user_id_timestamp', 'user_id', 'timestamp'),
+        Index('ix_login_logs_username_attempt_timestamp', 'username_attempt', 'timestamp'),
+        # login_log_compactor หาแถวที่ยังไม่ได้สรุปตามลำดับ id
+        Index('ix_login_logs_rolled_up_id', 'rolled_up', 'id'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     username_attempt = Column(String(255), nullable=False)
@@ -50,11 +72,67 @@ class LoginLog(Base):
     timestamp = Column(DateTime, nullable=False, default=func.now())
     is_success = Column(Boolean, nullable=False)
     ip_address = Column(String(50), nullable=True)
+    # สรุปเข้า login_stats_hourly แล้วหรือยัง (ตั้งใน transaction เดียวกับ rollup)
+    rolled_up = Column(Boolean, nullable=False, default=False, server_default=false())
+
+class LoginStatsHourly(Base):
+    """จำนวน login สำเร็จ/ไม่สำเร็จต่อชั่วโมงต่อ identifier สรุปจาก login_logs โดย login_log_retention"""
+    __tablename__ = 'login_stats_hourly'
+
+    bucket_start = Column(DateTime, primary_key=True)
+    identifier = Column(String(255), primary_key=True)
+    success_count = Column(Integer, nullable=False, default=0)
+    failure_count = Column(Integer, nullable=False, default=0)
 
 class Order(Base):
     __tablename__ = 'orders'
+    __table_args__ = (
+        # keyset pagination เรียงตาม (ordered_at, id) ทั้งรายผู้ใช้และทั้งระบบ
+        Index('ix_orders_user_ordered_at_id', 'user_id', 'ordered_at', 'id'),
+        Index('ix_orders_ordered_at_id', 'ordered_at', 'id'),
+        # client ส่ง order เดิมซ้ำ (retry) ด้วย client_key เดิม จะได้ order เดิมกลับไป
+        UniqueConstraint('user_id', 'client_key', name='uq_orders_user_client_key'),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
-    ordered_at = Column(DateTime, nullable=False, default=func.now())
-    items = Column(JSON, nullable=False)
\ No newline at end of file
+    client_key = Column(String(64), nullable=False)
+    # เก็บถึงระดับไมโครวินาทีบน MySQL ด้วย ให้ keyset pagination เรียง order ที่สร้างในวินาทีเดียวกันได้ตรงลำดับ
+    ordered_at = Column(DateTime().with_variant(mysql.DATETIME(fsp=6), 'mysql'), nullable=False, default=func.now())
+    items = Column(JSON, nullable=False)
+
+class OrderItem(Base):
+    __tablename__ = 'order_items'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    order_id = Column(Integer, ForeignKey('orders.id'), nullable=False, index=True)
+    item_name = Column(String(255), nullable=False)
+    quantity = Column(Integer, nullable=False)
+
+
+class KitchenDemandRollup(Base):
+    """ยอดรวมจำนวนที่สั่งของแต่ละเมนูต่อนาที อัปเดตทุกครั้งที่มี order ใหม่"""
+    __tablename__ = 'kitchen_demand_rollups'
+
+    bucket_start = Column(DateTime, primary_key=True)
+    item_name = Column(String(255), primary_key=True)
+    quantity = Column(Integer, nullable=False, default=0)
+
+
+class MenuItem(Base):
+    __tablename__ = 'menu_items'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String(255), unique=True, nullable=False)
+    # tier ต่ำสุดที่สั่งเมนูนี้ได้ (SAVER สั่งได้ทุก tier, PREMIUM เฉพาะ PREMIUM)
+    tier = Column(Enum(UserTier), nullable=False, default=UserTier.SAVER)
+    is_active = Column(Boolean, nullable=False, default=True)
+    sort_order = Column(Integer, nullable=False, default=0)
+
+
+class AppState(Base):
+    """ค่าตัวเลขระดับระบบแบบ key-value เช่น version ของเมนู"""
+    __tablename__ = 'app_state'
+
+    key = Column(String(100), primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
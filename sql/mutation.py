@@ -1,96 +1,128 @@
 # mutation.py
 import strawberry
-from Types import UserType, LoginResponse, StatusResponse, OrderType
+from Types import UserType, LoginResponse, StatusResponse, OrderType, TierAssignmentResult, OrderInput, OrderResult
 from user_gateway import UserGateway, PasswordExpiredError
+from password_hasher import HasherBusyError
+from request_context import get_client_ip
 from model import UserTier
-from typing import Optional
+from menu_catalog import menu_catalog
+from query_cost import IsAdmin
+from typing import List, Optional
 
 @strawberry.type
 class Mutation:
     @strawberry.mutation
-    def register_customer(self, username: str, email: str, password: str) -> LoginResponse:
+    async def register_customer(self, username: str, email: str, password: str) -> LoginResponse:
         try:
-            user = UserGateway.register_customer(username, email, password)
+            user = await UserGateway.register_customer(username, email, password)
             
             return LoginResponse(success=True, message="Customer account created successfully", user=user)
+        except HasherBusyError as e:
+            return LoginResponse(success=False, message=str(e), user=None)
         except ValueError as e:
             return LoginResponse(success=False, message=str(e), user=None)
 
     @strawberry.mutation
-    def create_admin(self, username: str, email: str, password: str) -> LoginResponse:
+    async def create_admin(self, username: str, email: str, password: str) -> LoginResponse:
         try:
-            admin_user = UserGateway.create_admin(username, email, password)
+            admin_user = await UserGateway.create_admin(username, email, password)
             
             return LoginResponse(success=True, message="Admin account created successfully", user=admin_user)
+        except HasherBusyError as e:
+            return LoginResponse(success=False, message=str(e), user=None)
         except ValueError as e:
             return LoginResponse(success=False, message=str(e), user=None)
         
     @strawberry.mutation
-    def login_user(self, login_identifier: str, password: str) -> LoginResponse:
+    async def login_user(self, info: strawberry.Info, login_identifier: str, password: str) -> LoginResponse:
         try:
-            user_type = UserGateway.login_user(login_identifier, password)
+            user_type = await UserGateway.login_user(login_identifier, password, ip_address=get_client_ip(info))
             return LoginResponse(success=True, message="Login successful", user=user_type)
+        except HasherBusyError as e:
+            return LoginResponse(success=False, message=str(e), user=None)
         except PasswordExpiredError as e: 
-            user = e.user
-            user_type = UserType(
-                id=user.id,
-                username=user.username,
-                email=user.email,
-                role=user.role.value,
-                tier=user.tier.value
-            )
-            return LoginResponse(success=False, message=str(e), user=user_type, passwordExpired=True)
+            return LoginResponse(success=False, message=str(e), user=UserType.from_model(e.user), passwordExpired=True)
         except ValueError as e:
             return LoginResponse(success=False, message=str(e), user=None)
         except Exception as e:
             return LoginResponse(success=False, message=f"An unexpected error occurred: {e}", user=None)
         
     @strawberry.mutation
-    def request_password_reset(self, email: str) -> StatusResponse:
+    async def request_password_reset(self, email: str) -> StatusResponse:
         try:
-            UserGateway.generate_and_send_reset_token(email)
+            await UserGateway.generate_and_send_reset_token(email)
             return StatusResponse(success=True, message="A reset code has been sent to your email.")
         except (ValueError, ConnectionError) as e:
             return StatusResponse(success=False, message=str(e))
 
     @strawberry.mutation
-    def verify_reset_token(self, token: str) -> StatusResponse:
+    async def verify_reset_token(self, info: strawberry.Info, email: str, token: str) -> StatusResponse:
         try:
-            UserGateway.verify_reset_token(token)
+            await UserGateway.verify_reset_token(token, email=email, ip_address=get_client_ip(info))
             return StatusResponse(success=True, message="Token is valid.")
         except ValueError as e:
             return StatusResponse(success=False, message=str(e))
     
     @strawberry.mutation
-    def reset_password(self, token: str, new_password: str) -> StatusResponse:
+    async def reset_password(self, info: strawberry.Info, email: str, token: str, new_password: str) -> StatusResponse:
         try:
-            success = UserGateway.reset_password_with_token(token, new_password)
+            success = await UserGateway.reset_password_with_token(token, new_password, email=email,
+                                                                  ip_address=get_client_ip(info))
             if success:
                 return StatusResponse(success=True, message="Password has been reset successfully.")
             else:
                 return StatusResponse(success=False, message="Invalid or expired token.")
-        except ValueError as e:
+        except (ValueError, HasherBusyError) as e:
             return StatusResponse(success=False, message=str(e))
     
     @strawberry.mutation
-    def assign_tier(self, user_id: int, tier_name: str) -> Optional[UserType]:
+    async def assign_tier(self, user_id: int, tier_name: str) -> Optional[UserType]:
         try:
             tier_enum = UserTier[tier_name.upper()]
-            return UserGateway.assign_user_tier(user_id, tier_enum)
+            return await UserGateway.assign_user_tier(user_id, tier_enum)
             
         except KeyError:
             raise Exception("Invalid tier name provided.")
         
+    @strawberry.mutation(permission_classes=[IsAdmin])
+    async def bulk_assign_tier(self, user_ids: List[int], tier: str) -> List[TierAssignmentResult]:
+        try:
+            tier_enum = UserTier[tier.upper()]
+        except KeyError:
+            raise Exception("Invalid tier name provided.")
+        return await UserGateway.bulk_assign_tier(user_ids, tier_enum)
+
+    @strawberry.mutation(permission_classes=[IsAdmin])
+    async def add_menu_item(self, name: str, tier: str) -> StatusResponse:
+        try:
+            version = await menu_catalog.add_item(name.strip(), UserTier[tier.upper()])
+            return StatusResponse(success=True, message=f"Menu updated to version {version}.")
+        except KeyError:
+            return StatusResponse(success=False, message="Invalid tier name provided.")
+        except ValueError as e:
+            return StatusResponse(success=False, message=str(e))
+
+    @strawberry.mutation(permission_classes=[IsAdmin])
+    async def remove_menu_item(self, name: str) -> StatusResponse:
+        try:
+            version = await menu_catalog.remove_item(name.strip())
+            return StatusResponse(success=True, message=f"Menu updated to version {version}.")
+        except ValueError as e:
+            return StatusResponse(success=False, message=str(e))
+
     @strawberry.mutation
-    def createOrder(self, userId: int, itemNames: list[str]) -> Optional[OrderType]:
+    async def createOrder(self, userId: int, itemNames: list[str], clientKey: Optional[str] = None) -> Optional[OrderType]:
         try:
-            order = UserGateway.create_order(user_id=userId, item_names=itemNames)
+            order = await UserGateway.create_order(user_id=userId, item_names=itemNames, client_key=clientKey)
             if order:
-                return OrderType(
-                    id=order.id,
-                    orderedAt=order.ordered_at,
-                    items=order.items
-                )
+                return OrderType.from_model(order)
             return None
         except Exception as e:
-            raise Exception(str(e))
\ No newline at end of file
+            raise Exception(str(e))
+
+    @strawberry.mutation
+    async def createOrders(self, orders: List[OrderInput]) -> List[OrderResult]:
+        try:
+            return await UserGateway.create_orders(orders)
+        except ValueError as e:
+            raise Exception(str(e))
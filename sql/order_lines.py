@@ -0,0 +1,69 @@
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.dialects import mysql, sqlite
+
+from model import KitchenDemandRollup
+
+MAX_ITEM_QUANTITY = 99
+
+DEMAND_BUCKETS = {
+    # bucket: (รูปแบบของ MySQL DATE_FORMAT, รูปแบบของ SQLite strftime)
+    'MINUTE': ('%Y-%m-%d %H:%i:00', '%Y-%m-%d %H:%M:00'),
+    'HOUR': ('%Y-%m-%d %H:00:00', '%Y-%m-%d %H:00:00'),
+    'DAY': ('%Y-%m-%d 00:00:00', '%Y-%m-%d 00:00:00'),
+}
+
+
+def parse_order_lines(item_names: List[str]) -> List[Tuple[str, int]]:
+    """
+    แปลงรายการจาก client รูปแบบ "ชื่อเมนู-จำนวน" (เช่น "หมูสามชั้น-3") เป็น (ชื่อเมนู, จำนวน)
+    รายการที่ชื่อซ้ำกันจะถูกรวมจำนวนเข้าด้วยกัน
+    """
+    lines: "OrderedDict[str, int]" = OrderedDict()
+    for raw in item_names:
+        name, sep, quantity = raw.rpartition('-')
+        if not sep:
+            name, quantity = raw, '1'
+        name = name.strip()
+        if not name or not quantity.strip().isdigit():
+            raise ValueError(f"Invalid order item '{raw}'. Expected 'name-quantity'.")
+        lines[name] = lines.get(name, 0) + int(quantity)
+
+    if not lines:
+        raise ValueError("Order must contain at least one item.")
+    for name, quantity in lines.items():
+        if quantity < 1 or quantity > MAX_ITEM_QUANTITY:
+            raise ValueError(f"Quantity of '{name}' must be between 1 and {MAX_ITEM_QUANTITY}.")
+    return list(lines.items())
+
+
+def minute_bucket(moment: datetime) -> datetime:
+    return moment.replace(second=0, microsecond=0)
+
+
+def demand_rollup_upsert(dialect_name: str, rows: List[dict]):
+    """INSERT ... ON DUPLICATE KEY UPDATE (MySQL) หรือ ON CONFLICT DO UPDATE (SQLite) เพื่อบวกยอดเข้า rollup"""
+    table = KitchenDemandRollup.__table__
+    if dialect_name == 'mysql':
+        stmt = mysql.insert(table).values(rows)
+        return stmt.on_duplicate_key_update(quantity=table.c.quantity + stmt.inserted.quantity)
+    if dialect_name == 'sqlite':
+        stmt = sqlite.insert(table).values(rows)
+        return stmt.on_conflict_do_update(
+            index_elements=[table.c.bucket_start, table.c.item_name],
+            set_={'quantity': table.c.quantity + stmt.excluded.quantity},
+        )
+    raise NotImplementedError(f"Kitchen demand rollup is not supported on '{dialect_name}'.")
+
+
+def demand_bucket_expression(dialect_name: str, bucket: str):
+    if bucket not in DEMAND_BUCKETS:
+        raise ValueError(f"Invalid bucket '{bucket}'. Expected one of: {', '.join(DEMAND_BUCKETS)}")
+    mysql_format, sqlite_format = DEMAND_BUCKETS[bucket]
+    column = KitchenDemandRollup.bucket_start
+    if dialect_name == 'mysql':
+        return func.date_format(column, mysql_format)
+    return func.strftime(sqlite_format, column)
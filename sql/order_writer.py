@@ -0,0 +1,196 @@
+import asyncio
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.dialects import mysql, sqlite
+
+from config import Config
+from database import AsyncSessionLocal
+from model import Order, OrderItem
+from order_lines import minute_bucket, demand_rollup_upsert
+
+
+@dataclass
+class OrderRequest:
+    """order ที่ตรวจความถูกต้องแล้ว รอเขียนลงฐานข้อมูล"""
+    user_id: int
+    client_key: str
+    lines: List[Tuple[str, int]]
+    ordered_at: datetime = field(default_factory=datetime.utcnow)
+
+    @property
+    def key(self) -> Tuple[int, str]:
+        return self.user_id, self.client_key
+
+    @property
+    def items(self) -> List[str]:
+        return [f"{name}-{quantity}" for name, quantity in self.lines]
+
+
+def order_insert_ignore(dialect_name: str, rows: List[dict]):
+    """INSERT IGNORE (MySQL) หรือ ON CONFLICT DO NOTHING (SQLite) ให้ unique (user_id, client_key) ตัด order ซ้ำ"""
+    table = Order.__table__
+    if dialect_name == 'mysql':
+        return mysql.insert(table).values(rows).prefix_with('IGNORE')
+    if dialect_name == 'sqlite':
+        return sqlite.insert(table).values(rows).on_conflict_do_nothing(
+            index_elements=[table.c.user_id, table.c.client_key]
+        )
+    raise NotImplementedError(f"Idempotent order insert is not supported on '{dialect_name}'.")
+
+
+class OrderNotWrittenError(ValueError):
+    """order ที่ INSERT ข้ามไปด้วยเหตุอื่นที่ไม่ใช่ key ซ้ำ (เช่น INSERT IGNORE ข้ามแถวที่ผิด foreign key)"""
+
+
+async def write_orders(db, requests: List[OrderRequest]) -> list:
+    """
+    เขียน order หลายรายการใน transaction เดียว:
+    SELECT ... FOR UPDATE หา key ที่มีอยู่แล้ว, multi-row INSERT ที่ข้าม key ซ้ำ, SELECT กลับตาม (user_id, client_key)
+    แล้วเพิ่ม order_items และ rollup เฉพาะ order ที่เพิ่งสร้างจริง
+    คืนผลตามลำดับของ requests: แถวของ order (key ที่เคยมีอยู่แล้วจะได้ order เดิม ถ้ารายการอาหารตรงกัน)
+    หรือ OrderNotWrittenError ถ้าหาแถวของ request นั้นไม่พบหลัง INSERT หรือใช้ clientKey ซ้ำกับรายการอาหารอื่น
+    """
+    unique = list({request.key: request for request in reversed(requests)}.values())[::-1]
+    keys = [request.key for request in unique]
+    # ล็อก key เหล่านี้ไว้จน commit เพื่อไม่ให้ transaction อื่นแทรก order ของ key เดียวกันระหว่างนี้
+    existing = set((await db.execute(
+        select(Order.user_id, Order.client_key)
+        .where(tuple_(Order.user_id, Order.client_key).in_(keys))
+        .with_for_update()
+    )).all())
+    new = [request for request in unique if request.key not in existing]
+    if new:
+        await db.execute(order_insert_ignore(db.bind.dialect.name, [
+            {
+                'user_id': request.user_id,
+                'client_key': request.client_key,
+                'ordered_at': request.ordered_at,
+                'items': request.items,
+            }
+            for request in new
+        ]))
+    rows = (await db.execute(
+        select(Order.id, Order.user_id, Order.client_key, Order.ordered_at, Order.items)
+        .where(tuple_(Order.user_id, Order.client_key).in_(keys))
+    )).all()
+    by_key = {(row.user_id, row.client_key): row for row in rows}
+
+    created = [request for request in new if request.key in by_key]
+    if created:
+        await db.execute(insert(OrderItem), [
+            {'order_id': by_key[request.key].id, 'item_name': name, 'quantity': quantity}
+            for request in created
+            for name, quantity in request.lines
+        ])
+        demand = defaultdict(int)
+        for request in created:
+            for name, quantity in request.lines:
+                demand[(minute_bucket(request.ordered_at), name)] += quantity
+        await db.execute(demand_rollup_upsert(db.bind.dialect.name, [
+            {'bucket_start': bucket_start, 'item_name': name, 'quantity': quantity}
+            for (bucket_start, name), quantity in demand.items()
+        ]))
+    await db.commit()
+    return [_result_for(request, by_key.get(request.key)) for request in requests]
+
+
+def _result_for(request: OrderRequest, row):
+    if row is None:
+        return OrderNotWrittenError(f"Order '{request.client_key}' could not be saved.")
+    if list(row.items) != request.items:
+        return OrderNotWrittenError(f"clientKey '{request.client_key}' reused with different items.")
+    return row
+
+
+class OrderWriter:
+    """
+    รวม order ที่เข้ามาพร้อมกันจากหลาย request เป็น batch เดียว (ไม่เกิน batch_size รายการ
+    หรือรอไม่เกิน max_wait_ms) แล้วเขียนด้วย write_orders ครั้งเดียว
+    ถ้า batch ล้มเหลวทุก request ใน batch จะได้ exception เดียวกัน ส่วน order ที่เขียนไม่ได้เฉพาะรายการได้ error ของตัวเอง
+    """
+
+    def __init__(self, enabled: bool, batch_size: int, max_wait_ms: int):
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.written = 0
+
+    async def submit(self, request: OrderRequest):
+        if self._task is None:
+            async with AsyncSessionLocal() as db:
+                result = (await write_orders(db, [request]))[0]
+            if isinstance(result, Exception):
+                raise result
+            return result
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((request, future))
+        return await future
+
+    def start(self):
+        if self.enabled and self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            task, self._task = self._task, None
+            await self._queue.join()
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._write(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    async def _write(self, batch: list):
+        try:
+            async with AsyncSessionLocal() as db:
+                rows = await write_orders(db, [request for request, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self.batches += 1
+        self.written += len(batch)
+        for (_, future), row in zip(batch, rows):
+            if future.done():
+                continue
+            if isinstance(row, Exception):
+                future.set_exception(row)
+            else:
+                future.set_result(row)
+
+    def get_metrics(self) -> dict:
+        return {
+            'enabled': self.enabled,
+            'queued': self._queue.qsize() if self._queue else 0,
+            'batches': self.batches,
+            'written': self.written,
+        }
+
+
+order_writer = OrderWriter(**Config.load_order_writer_config())
@@ -0,0 +1,39 @@
+import base64
+from datetime import datetime
+from typing import Tuple
+
+from sqlalchemy import and_, or_
+
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(sort_value: datetime, row_id: int) -> str:
+    """สร้าง cursor แบบ opaque จากค่าที่ใช้เรียง (datetime) และ id ของแถวสุดท้ายในหน้า"""
+    raw = f"{sort_value.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        sort_value, row_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(sort_value), int(row_id)
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid cursor.")
+
+
+def clamp_page_size(first: int) -> int:
+    if first < 1:
+        raise ValueError("'first' must be at least 1.")
+    return min(first, MAX_PAGE_SIZE)
+
+
+def keyset_condition(sort_column, id_column, cursor: str, descending: bool = True):
+    """
+    เงื่อนไขสำหรับอ่านหน้าถัดไปต่อจาก cursor โดยเรียงตาม (sort_column, id_column)
+    เขียนเป็น OR/AND แทน row comparison เพื่อให้ MySQL ใช้ composite index เป็น range scan ได้
+    """
+    sort_value, row_id = decode_cursor(cursor)
+    if descending:
+        return or_(sort_column < sort_value, and_(sort_column == sort_value, id_column < row_id))
+    return or_(sort_column > sort_value, and_(sort_column == sort_value, id_column > row_id))
@@ -0,0 +1,113 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import bcrypt
+
+from config import Config
+from metrics import password_hash_seconds
+
+
+class HasherBusyError(Exception):
+    """ถูก raise เมื่อคิวของ password hasher เต็ม ให้ resolver ตอบกลับทันทีแทนการรอ"""
+
+
+def process_pool_context():
+    """
+    start method ของ process pool: parent มี event loop, thread ของ mail queue และ DB pool อยู่แล้ว
+    fork จึงอาจคัดลอก lock ที่ค้างอยู่ไปด้วย ใช้ forkserver (หรือ spawn บนระบบที่ไม่มี forkserver)
+    """
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(method)
+
+
+def _hashpw(password: str, rounds: int) -> str:
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _checkpw(password: str, hashed: str) -> bool:
+    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+
+
+class PasswordHasher:
+    """
+    รัน bcrypt บน process pool แยกต่างหาก เพื่อไม่ให้ event loop และ GIL ถูกบล็อก
+    จำกัดจำนวนงานค้าง (max_queue) ถ้าเกินจะ raise HasherBusyError ทันที
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, rounds: int = 12):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.rounds = rounds
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._max_pending_seen = 0
+        self._completed = 0
+        self._rejected = 0
+        self._total_hash_seconds = 0.0
+        self._max_hash_seconds = 0.0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=process_pool_context())
+        return self._executor
+
+    def _acquire_slot(self):
+        with self._lock:
+            if self._pending >= self.max_queue:
+                self._rejected += 1
+                raise HasherBusyError("Server is busy. Please try again in a moment.")
+            self._pending += 1
+            self._max_pending_seen = max(self._max_pending_seen, self._pending)
+
+    def _release_slot(self, elapsed: float):
+        with self._lock:
+            self._pending -= 1
+            self._completed += 1
+            self._total_hash_seconds += elapsed
+            self._max_hash_seconds = max(self._max_hash_seconds, elapsed)
+
+    async def _run(self, op: str, fn, *args):
+        self._acquire_slot()
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            elapsed = time.perf_counter() - started
+            self._release_slot(elapsed)
+            password_hash_seconds.observe(elapsed, op=op)
+
+    async def hash_password(self, password: str) -> str:
+        return await self._run('hash', _hashpw, password, self.rounds)
+
+    async def check_password(self, password: str, hashed: str) -> bool:
+        return await self._run('check', _checkpw, password, hashed)
+
+    def get_metrics(self) -> dict:
+        with self._lock:
+            completed = self._completed
+            return {
+                'queue_depth': self._pending,
+                'max_queue_depth': self._max_pending_seen,
+                'max_queue': self.max_queue,
+                'workers': self.max_workers,
+                'completed': completed,
+                'rejected': self._rejected,
+                'avg_hash_ms': (self._total_hash_seconds / completed * 1000) if completed else 0.0,
+                'max_hash_ms': self._max_hash_seconds * 1000,
+            }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(**Config.load_hasher_config())
@@ -0,0 +1,18 @@
+import re
+from typing import List
+
+
+def validate_password_complexity(password: str) -> List[str]:
+    """คืนรายการข้อที่รหัสผ่านยังไม่ผ่าน (list ว่างคือผ่าน) ใช้ทั้งตอนสมัครสมาชิกและ bulk_import"""
+    errors = []
+    if len(password) < 8:
+        errors.append("Password must be at least 8 characters long.")
+    if not re.search(r"[a-z]", password):
+        errors.append("Password must contain a lowercase letter (a-z).")
+    if not re.search(r"[A-Z]", password):
+        errors.append("Password must contain an uppercase letter (A-Z).")
+    if not re.search(r"[0-9]", password):
+        errors.append("Password must contain a number (0-9).")
+    if not re.search(r"[!@#$%^&*()_+\-=\[\]{};':\"\\|,.<>\/?~]", password):
+        errors.append("Password must contain a special character (e.g., !@#$%).")
+    return errors
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from graphql import GraphQLError, GraphQLSyntaxError, OperationDefinitionNode, parse
+from strawberry.fastapi import GraphQLRouter
+from strawberry.types import ExecutionResult
+
+from config import Config
+from metrics import allow_operation_labels
+
+PERSISTED_QUERY_MODES = ('apq', 'record', 'allowlist')
+
+
+class PersistedQueryError(Exception):
+    """ตอบกลับเป็น GraphQL error (HTTP 200) พร้อม extensions.code ตามแบบ Automatic Persisted Queries"""
+
+    def __init__(self, code: str, message: str):
+        super().__init__(message)
+        self.code = code
+
+    def to_result(self) -> ExecutionResult:
+        return ExecutionResult(data=None, errors=[GraphQLError(str(self), extensions={'code': self.code})])
+
+
+def query_hash(query: str) -> str:
+    return hashlib.sha256(query.encode('utf-8')).hexdigest()
+
+
+def operation_names(query: str) -> list:
+    """ชื่อ operation ทั้งหมดใน document (ไม่นับ operation ที่ไม่มีชื่อ)"""
+    try:
+        document = parse(query)
+    except GraphQLSyntaxError:
+        return []
+    return [
+        definition.name.value for definition in document.definitions
+        if isinstance(definition, OperationDefinitionNode) and definition.name is not None
+    ]
+
+
+class PersistedQueryStore:
+    """
+    เก็บข้อความ query ตาม sha256 ให้ client ส่งแค่ hash ได้ (extensions.persistedQuery.sha256Hash)
+    document จาก manifest อยู่ถาวร ส่วน document ที่ client ลงทะเบียนเองอยู่ใน LRU ขนาด max_entries
+    เนื่องจาก query ของ hash เดียวกันเป็นข้อความเดียวกันเสมอ ParserCache/ValidationCache ของ schema
+    จึงทำหน้าที่เป็น cache ของ document ที่ parse และ validate แล้วตาม hash
+    """
+
+    def __init__(self, mode: str, manifest_path: str, max_entries: int):
+        if mode not in PERSISTED_QUERY_MODES:
+            raise ValueError(f"Unknown PERSISTED_QUERIES_MODE '{mode}'. Expected one of {', '.join(PERSISTED_QUERY_MODES)}.")
+        self.mode = mode
+        self.manifest_path = manifest_path
+        self.max_entries = max_entries
+        self._manifest: Dict[str, str] = self._load_manifest()
+        self._registered: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+
+    def _load_manifest(self) -> Dict[str, str]:
+        if not os.path.exists(self.manifest_path):
+            if self.mode == 'allowlist':
+                raise FileNotFoundError(f"PERSISTED_QUERIES_MODE=allowlist requires a manifest at {self.manifest_path}.")
+            return {}
+        with open(self.manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        for sha, query in manifest.items():
+            if query_hash(query) != sha:
+                raise ValueError(f"Persisted query manifest entry {sha} does not match its query text.")
+            allow_operation_labels(operation_names(query))
+        return manifest
+
+    def _lookup(self, sha: str) -> Optional[str]:
+        query = self._manifest.get(sha)
+        if query is None:
+            query = self._registered.get(sha)
+            if query is not None:
+                self._registered.move_to_end(sha)
+        return query
+
+    def _register(self, sha: str, query: str):
+        if self.mode == 'record':
+            with self._lock:
+                if sha not in self._manifest:
+                    self._manifest[sha] = query
+                    with open(self.manifest_path, 'w', encoding='utf-8') as f:
+                        json.dump(self._manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+            return
+        self._registered[sha] = query
+        self._registered.move_to_end(sha)
+        while len(self._registered) > self.max_entries:
+            self._registered.popitem(last=False)
+
+    def resolve(self, request_data):
+        """เติม request_data.query จาก hash หรือลงทะเบียน query ใหม่ และบังคับ allow-list ถ้าเปิดไว้"""
+        persisted = (request_data.extensions or {}).get('persistedQuery')
+        sha = persisted.get('sha256Hash') if isinstance(persisted, dict) else None
+
+        if sha is None:
+            if self.mode == 'allowlist' and request_data.query is not None \
+                    and query_hash(request_data.query) not in self._manifest:
+                self.rejected += 1
+                raise PersistedQueryError('PERSISTED_QUERY_NOT_ALLOWED', "Only persisted queries are allowed.")
+            return
+
+        if request_data.query is None:
+            query = self._lookup(sha)
+            if query is None:
+                self.misses += 1
+                if self.mode == 'allowlist':
+                    self.rejected += 1
+                    raise PersistedQueryError('PERSISTED_QUERY_NOT_ALLOWED', "Only persisted queries are allowed.")
+                raise PersistedQueryError('PERSISTED_QUERY_NOT_FOUND', "PersistedQueryNotFound")
+            self.hits += 1
+            request_data.query = query
+            return
+
+        if query_hash(request_data.query) != sha:
+            raise PersistedQueryError('PERSISTED_QUERY_HASH_MISMATCH', "provided sha does not match query")
+        if self._lookup(sha) is None:
+            if self.mode == 'allowlist':
+                self.rejected += 1
+                raise PersistedQueryError('PERSISTED_QUERY_NOT_ALLOWED', "Only persisted queries are allowed.")
+            self._register(sha, request_data.query)
+
+    def get_metrics(self) -> dict:
+        return {
+            'mode': self.mode,
+            'manifest_entries': len(self._manifest),
+            'registered_entries': len(self._registered),
+            'hits': self.hits,
+            'misses': self.misses,
+            'rejected': self.rejected,
+        }
+
+
+class PersistedQueryRouter(GraphQLRouter):
+    """GraphQLRouter ที่แปลง hash เป็นข้อความ query ผ่าน PersistedQueryStore ก่อน execute"""
+
+    def __init__(self, schema, store: PersistedQueryStore, **kwargs):
+        super().__init__(schema, **kwargs)
+        self.persisted_queries = store
+
+    async def execute_operation(self, request, request_adapter, request_data, context, root_value, sub_response):
+        try:
+            for item in (request_data if isinstance(request_data, list) else [request_data]):
+                self.persisted_queries.resolve(item)
+        except PersistedQueryError as e:
+            if isinstance(request_data, list):
+                return [e.to_result() for _ in request_data]
+            return e.to_result()
+        return await super().execute_operation(
+            request=request,
+            request_adapter=request_adapter,
+            request_data=request_data,
+            context=context,
+            root_value=root_value,
+            sub_response=sub_response,
+        )
+
+
+_graphql_config = Config.load_graphql_config()
+persisted_query_store = PersistedQueryStore(
+    mode=_graphql_config['persisted_queries_mode'],
+    manifest_path=_graphql_config['manifest_path'],
+    max_entries=_graphql_config['max_entries'],
+)
@@ -0,0 +1,98 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Set
+
+from config import Config
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+
+class PubSubBackend:
+    """interface ของ backend สำหรับส่งข้อความ publish/subscribe ตามชื่อ channel"""
+
+    async def publish(self, channel: str, message: dict):
+        raise NotImplementedError
+
+    def subscribe(self, channel: str):
+        """คืนค่า async context manager ที่ให้ async iterator ของข้อความใน channel"""
+        raise NotImplementedError
+
+
+class InMemoryBackend(PubSubBackend):
+    """ส่งข้อความภายใน process เดียว (ใช้ได้เมื่อรัน worker เดียว)"""
+
+    def __init__(self, max_pending: int = 100):
+        self.max_pending = max_pending
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+    async def publish(self, channel: str, message: dict):
+        for subscriber in list(self._subscribers.get(channel, ())):
+            try:
+                subscriber.put_nowait(message)
+            except asyncio.QueueFull:
+                pass
+
+    @asynccontextmanager
+    async def subscribe(self, channel: str):
+        subscriber: asyncio.Queue = asyncio.Queue(maxsize=self.max_pending)
+        self._subscribers.setdefault(channel, set()).add(subscriber)
+        try:
+            yield self._iterate(subscriber)
+        finally:
+            subscribers = self._subscribers.get(channel)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[channel]
+
+    @staticmethod
+    async def _iterate(subscriber: asyncio.Queue) -> AsyncIterator[dict]:
+        while True:
+            yield await subscriber.get()
+
+
+class RedisBackend(PubSubBackend):
+    """ส่งข้อความผ่าน Redis pub/sub เพื่อให้ทุก worker process ได้รับข้อความเดียวกัน"""
+
+    def __init__(self, url: str):
+        if aioredis is None:
+            raise ImportError("PUBSUB_BACKEND=redis requires the 'redis' package (pip install redis).")
+        self._client = aioredis.from_url(url)
+
+    async def publish(self, channel: str, message: dict):
+        await self._client.publish(channel, json.dumps(message))
+
+    @asynccontextmanager
+    async def subscribe(self, channel: str):
+        pubsub = self._client.pubsub()
+        await pubsub.subscribe(channel)
+        try:
+            yield self._iterate(pubsub)
+        finally:
+            await pubsub.unsubscribe(channel)
+            await pubsub.close()
+
+    @staticmethod
+    async def _iterate(pubsub) -> AsyncIterator[dict]:
+        async for raw in pubsub.listen():
+            if raw.get('type') == 'message':
+                yield json.loads(raw['data'])
+
+
+def build_backend(pubsub_config: dict) -> PubSubBackend:
+    if pubsub_config['backend'] == 'memory':
+        return InMemoryBackend()
+    if pubsub_config['backend'] == 'redis':
+        return RedisBackend(pubsub_config['redis_url'])
+    raise ValueError(f"Unknown PUBSUB_BACKEND '{pubsub_config['backend']}'. Expected memory or redis.")
+
+
+def tier_channel(user_id: int) -> str:
+    return f"user-tier:{user_id}"
+
+
+broker = build_backend(Config.load_pubsub_config())
@@ -1,35 +1,73 @@
 import strawberry
 from typing import List, Optional
+from datetime import datetime
 from user_gateway import UserGateway
-from Types import UserType
+from Types import UserType, OrderConnection, UserConnection, DemandLine, MenuResponse, MenuItemType, LoginStatsLine
+from menu_catalog import menu_catalog
+from query_cost import IsAdmin
+from model import UserTier, UserRole
 
 @strawberry.type
 class Query:
     @strawberry.field
-    def get_user_by_id(self, id: int) -> Optional[UserType]:
-        user = UserGateway.get_user_by_id(id)
-        if user:
-            return UserType(
-                id=user.id, 
-                username=user.username, 
-                email=user.email,
-                role=user.role.value,
-                tier=user.tier.value
-            )
-        return None
+    async def get_user_by_id(self, info: strawberry.Info, id: int) -> Optional[UserType]:
+        return await info.context["user_by_id"].load(id)
     
     @strawberry.field
-    def check_my_status(self, user_id: int) -> Optional[UserType]:
-        user = UserGateway.get_user_by_id(user_id)
-        if user:
-            return UserType(
-                id=user.id,
-                username=user.username,
-                email=user.email,
-                role=user.role.value, # แปลง enum เป็น string
-                tier=user.tier.value, # แปลง enum เป็น string
-            )
-        return None
+    async def check_my_status(self, info: strawberry.Info, user_id: int) -> Optional[UserType]:
+        return await info.context["user_by_id"].load(user_id)
+
+    @strawberry.field(permission_classes=[IsAdmin])
+    async def users(self, tier: Optional[str] = None, role: Optional[str] = None,
+                    created_after: Optional[datetime] = None, after: Optional[str] = None,
+                    first: int = 50) -> UserConnection:
+        try:
+            tier_enum = UserTier[tier.upper()] if tier else None
+            role_enum = UserRole[role.upper()] if role else None
+        except KeyError:
+            raise Exception("Invalid tier or role name provided.")
+        return await UserGateway.list_users(
+            tier=tier_enum, role=role_enum, created_after=created_after, after=after, first=first
+        )
+
+    @strawberry.field
+    async def menu(self, tier: str, known_version: Optional[int] = None) -> MenuResponse:
+        """
+        คืนเมนูของ tier นั้น ถ้า client ส่ง known_version ที่ตรงกับ version ปัจจุบันมา
+        จะตอบ notModified=True โดยไม่ส่งรายการเมนูซ้ำ
+        """
+        try:
+            tier_enum = UserTier[tier.upper()]
+        except KeyError:
+            raise Exception("Invalid tier name provided.")
+        version, items = await menu_catalog.get_menu(tier_enum)
+        if known_version == version:
+            return MenuResponse(version=version, notModified=True, items=[])
+        return MenuResponse(
+            version=version,
+            notModified=False,
+            items=[
+                MenuItemType(name=name, tier=item_tier.value, exclusive=item_tier == UserTier.PREMIUM)
+                for name, item_tier in items
+            ]
+        )
+
+    @strawberry.field
+    async def kitchen_demand(self, since: datetime, until: datetime, bucket: str = "HOUR") -> List[DemandLine]:
+        return await UserGateway.kitchen_demand(since, until, bucket.upper())
+
+    @strawberry.field(permission_classes=[IsAdmin])
+    async def login_stats(self, since: datetime, identifier: Optional[str] = None) -> List[LoginStatsLine]:
+        return await UserGateway.login_stats(since, identifier)
+
+    @strawberry.field
+    async def orders_by_user(self, user_id: int, after: Optional[str] = None, first: int = 20) -> OrderConnection:
+        return await UserGateway.list_orders_by_user(user_id, after=after, first=first)
+
+    @strawberry.field
+    async def recent_orders(self, after: Optional[str] = None, first: int = 50,
+                            since: Optional[datetime] = None) -> OrderConnection:
+        return await UserGateway.list_recent_orders(after=after, first=first, since=since)
     
 
     
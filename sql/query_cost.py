@@ -0,0 +1,184 @@
+import hmac
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from graphql import (
+    FieldNode, FragmentDefinitionNode, FragmentSpreadNode, GraphQLError, InlineFragmentNode,
+    IntValueNode, ListValueNode, VariableNode, get_named_type, get_nullable_type, get_operation_ast,
+    is_list_type,
+)
+from strawberry.extensions import SchemaExtension
+from strawberry.permission import BasePermission
+
+from config import Config
+from metrics import graphql_rejected_total
+from model import UserRole
+
+# field ระดับบนสุด (Query/Mutation) คือการเรียก UserGateway หนึ่งครั้ง จึงแพงกว่า field ทั่วไป
+ROOT_FIELD_COST = 10
+
+
+@dataclass
+class QueryCost:
+    depth: int = 0
+    cost: int = 0
+    aliases: int = 0
+
+
+class _CostAnalyzer:
+    """
+    เดิน AST ของ operation โดยอิงชนิดจาก schema (ไม่ execute):
+    แต่ละ field มีค่า 1 (root field มีค่า ROOT_FIELD_COST) field ที่คืน list คูณค่าของ field ลูกด้วยขนาดที่คาดไว้
+    ขนาดมาจาก argument first หรือ list ที่ส่งมา (เช่น userIds) ของ field นั้นหรือ field แม่ ถ้าไม่มีใช้ default_list_size
+    field ของ introspection (__schema, __typename, ...) ไม่นับ
+    """
+
+    def __init__(self, schema, document, variables: Optional[dict], default_list_size: int):
+        self.schema = schema
+        self.variables = variables or {}
+        self.default_list_size = default_list_size
+        self.fragments: Dict[str, FragmentDefinitionNode] = {
+            definition.name.value: definition
+            for definition in document.definitions
+            if isinstance(definition, FragmentDefinitionNode)
+        }
+        self.result = QueryCost()
+
+    def analyze(self, operation) -> QueryCost:
+        root_type = self.schema.get_root_type(operation.operation)
+        if root_type is not None:
+            self.result.cost = self._selection_cost(root_type, operation.selection_set, 1, None, frozenset())
+        return self.result
+
+    def _fields(self, parent_type, selection_set, visited: frozenset):
+        """field ทั้งหมดใน selection set โดยกาง fragment ออก (คืนคู่ parent type กับ field)"""
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                yield parent_type, selection
+            elif isinstance(selection, InlineFragmentNode):
+                fragment_type = self._condition_type(selection, parent_type)
+                yield from self._fields(fragment_type, selection.selection_set, visited)
+            elif isinstance(selection, FragmentSpreadNode):
+                name = selection.name.value
+                fragment = self.fragments.get(name)
+                if fragment is not None and name not in visited:
+                    yield from self._fields(self._condition_type(fragment, parent_type),
+                                            fragment.selection_set, visited | {name})
+
+    def _condition_type(self, fragment, parent_type):
+        if fragment.type_condition is None:
+            return parent_type
+        return self.schema.get_type(fragment.type_condition.name.value) or parent_type
+
+    def _selection_cost(self, parent_type, selection_set, depth: int, size_hint: Optional[int],
+                        visited: frozenset) -> int:
+        cost = 0
+        for field_parent, field in self._fields(parent_type, selection_set, visited):
+            name = field.name.value
+            if name.startswith('__'):
+                continue
+            if field.alias is not None:
+                self.result.aliases += 1
+            self.result.depth = max(self.result.depth, depth)
+
+            definition = getattr(field_parent, 'fields', {}).get(name)
+            if definition is None:
+                continue
+            hint = self._argument_size(field) or size_hint
+            multiplier = 1
+            if is_list_type(get_nullable_type(definition.type)):
+                multiplier = hint or self.default_list_size
+                hint = None
+
+            own = ROOT_FIELD_COST if depth == 1 else 1
+            children = 0
+            if field.selection_set is not None:
+                children = self._selection_cost(get_named_type(definition.type), field.selection_set,
+                                                depth + 1, hint, visited)
+            cost += own + multiplier * children
+        return cost
+
+    def _argument_size(self, field: FieldNode) -> Optional[int]:
+        sizes = []
+        for argument in field.arguments or ():
+            value = argument.value
+            if isinstance(value, VariableNode):
+                value = self.variables.get(value.name.value)
+            elif isinstance(value, IntValueNode):
+                value = int(value.value)
+            elif isinstance(value, ListValueNode):
+                value = value.values
+            if argument.name.value == 'first' and isinstance(value, int):
+                return max(value, 0)
+            if isinstance(value, (list, tuple)):
+                sizes.append(len(value))
+        return max(sizes) if sizes else None
+
+
+def analyze_query(schema, document, operation_name: Optional[str] = None,
+                  variables: Optional[dict] = None, default_list_size: int = 20) -> QueryCost:
+    """คำนวณ depth, cost และจำนวน alias ของ operation ใน document (ไม่แตะฐานข้อมูล)"""
+    operation = get_operation_ast(document, operation_name)
+    if operation is None:
+        return QueryCost()
+    return _CostAnalyzer(schema, document, variables, default_list_size).analyze(operation)
+
+
+def request_role(request) -> UserRole:
+    """request ที่ส่ง X-Admin-Key ตรงกับ ADMIN_API_KEY เป็น ADMIN นอกนั้นเป็น USER"""
+    provided = request.headers.get('x-admin-key') if request is not None else None
+    if _admin_api_key and provided and hmac.compare_digest(provided, _admin_api_key):
+        return UserRole.ADMIN
+    return UserRole.USER
+
+
+class IsAdmin(BasePermission):
+    """
+    ใช้กับ field ที่เป็นงานของ admin (permission_classes=[IsAdmin]) ด้วยการตรวจ role เดียวกับที่เลือกขีดจำกัดของ query
+    ถ้าไม่ตั้ง ADMIN_API_KEY จะไม่มี request ใดเป็น ADMIN จึงเรียก field เหล่านี้ไม่ได้
+    """
+    message = "Admin access required."
+
+    def has_permission(self, source, info, **kwargs) -> bool:
+        return request_role(info.context.get('request')) == UserRole.ADMIN
+
+
+def check_query_limits(cost: QueryCost, limits: dict) -> Optional[Tuple[str, str]]:
+    """คืน (เหตุผล, ข้อความ) ถ้า document เกินขีดจำกัด ไม่เช่นนั้นคืน None"""
+    if cost.depth > limits['max_depth']:
+        return 'depth', f"Query depth {cost.depth} exceeds the limit of {limits['max_depth']}."
+    if cost.aliases > limits['max_aliases']:
+        return 'aliases', f"Query uses {cost.aliases} aliases, the limit is {limits['max_aliases']}."
+    if cost.cost > limits['max_cost']:
+        return 'cost', f"Query cost {cost.cost} exceeds the limit of {limits['max_cost']}."
+    return None
+
+
+class QueryCostExtension(SchemaExtension):
+    """
+    ปฏิเสธ document ที่ลึก ใช้ alias หรือมี cost เกินขีดจำกัดของ role ก่อน execute
+    ต้องอยู่หลัง ValidationCache ใน extensions เพื่อวิเคราะห์เฉพาะ document ที่ผ่าน validation แล้ว
+    """
+
+    def on_validate(self):
+        context = self.execution_context
+        if not context.pre_execution_errors and context.graphql_document is not None:
+            request = context.context.get('request') if isinstance(context.context, dict) else None
+            role = request_role(request)
+            cost = analyze_query(context.schema._schema, context.graphql_document, context.operation_name,
+                                 context.variables, _query_limits_config['default_list_size'])
+            rejection = check_query_limits(cost, _query_limits_config['limits'][role.value])
+            if rejection is not None:
+                reason, message = rejection
+                graphql_rejected_total.inc(reason=reason, role=role.value)
+                context.pre_execution_errors = [GraphQLError(message, extensions={
+                    'code': 'QUERY_TOO_COMPLEX',
+                    'depth': cost.depth,
+                    'cost': cost.cost,
+                    'aliases': cost.aliases,
+                })]
+        yield
+
+
+_query_limits_config = Config.load_query_limits_config()
+_admin_api_key = _query_limits_config['admin_api_key']
@@ -0,0 +1,60 @@
+import ipaddress
+from typing import Optional
+
+import strawberry
+
+from config import Config
+from database import AsyncSessionLocal
+from loaders import build_loaders
+
+
+def _parse_networks(entries) -> list:
+    networks = []
+    for entry in entries:
+        try:
+            networks.append(ipaddress.ip_network(entry, strict=False))
+        except ValueError:
+            raise ValueError(f"Invalid TRUSTED_PROXIES entry '{entry}'. Expected an IP address or CIDR.")
+    return networks
+
+
+def _is_trusted_proxy(host: Optional[str]) -> bool:
+    if not host:
+        return False
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in _trusted_proxies)
+
+
+def get_client_ip(info: strawberry.Info) -> Optional[str]:
+    """
+    คืนค่า IP ของผู้เรียก request
+    X-Forwarded-For จะเชื่อเฉพาะเมื่อ request มาจาก proxy ใน TRUSTED_PROXIES เท่านั้น (client ทั่วไปปลอม header ได้)
+    โดยไล่จากขวาไปซ้ายแล้วใช้ address แรกที่ไม่ใช่ proxy ที่เชื่อถือ
+    """
+    request = info.context.get("request")
+    if request is None or request.client is None:
+        return None
+    peer = request.client.host
+    forwarded_for = request.headers.get("x-forwarded-for")
+    if not forwarded_for or not _is_trusted_proxy(peer):
+        return peer
+    hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _is_trusted_proxy(hop):
+            return hop
+    return hops[0] if hops else peer
+
+
+async def get_graphql_context():
+    """
+    context ของแต่ละ GraphQL request (ใช้เป็น context_getter ของ GraphQLRouter)
+    เปิด session เดียวต่อ request ให้ DataLoader ใช้ร่วมกัน และปิดเมื่อ request จบ
+    """
+    async with AsyncSessionLocal() as session:
+        yield {'session': session, **build_loaders(session)}
+
+
+_trusted_proxies = _parse_networks(Config.load_server_config()['trusted_proxies'])
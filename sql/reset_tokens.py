@@ -0,0 +1,139 @@
+import asyncio
+import hashlib
+import hmac
+import secrets
+import string
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import select, update, delete
+
+from config import Config
+from database import AsyncSessionLocal
+from model import PasswordResetToken, User
+
+TOKEN_ALPHABET = string.ascii_uppercase + string.digits
+
+
+@dataclass
+class ResetTokenEntry:
+    token_id: int
+    user_id: int
+    expires_at: datetime
+
+
+class ResetTokenStore:
+    """
+    เก็บ reset token แยกจากตาราง users โดยเก็บเฉพาะ HMAC-SHA256 ของ token
+    ตรวจ token คู่กับ email เสมอ: อ่าน token ปัจจุบันของผู้ใช้ (ผู้ใช้หนึ่งคนมี token เดียว) แล้วเทียบ hash
+    ทุกครั้งที่ตรวจนับเป็น attempt ของ token นั้น ไม่ว่าจะเดาถูกหรือผิด จึงเดาได้ไม่เกิน max_attempts ครั้งต่อ token
+    """
+
+    def __init__(self, secret: str, ttl_minutes: int, max_attempts: int, length: int,
+                 sweep_interval_seconds: int, sweep_batch_size: int):
+        self._secret = secret.encode('utf-8')
+        self.ttl = timedelta(minutes=ttl_minutes)
+        self.max_attempts = max_attempts
+        self.length = length
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self.sweep_batch_size = sweep_batch_size
+        self._sweeper: Optional[asyncio.Task] = None
+        self.swept = 0
+
+    def hash_token(self, token: str) -> str:
+        return hmac.new(self._secret, token.strip().upper().encode('utf-8'), hashlib.sha256).hexdigest()
+
+    def generate_token(self) -> str:
+        return ''.join(secrets.choice(TOKEN_ALPHABET) for _ in range(self.length))
+
+    async def issue(self, db, user_id: int) -> str:
+        """สร้าง token ใหม่ (ยกเลิก token เก่าของผู้ใช้คนนี้) ผู้เรียกต้อง commit เอง"""
+        await db.execute(delete(PasswordResetToken).where(PasswordResetToken.user_id == user_id))
+        token = self.generate_token()
+        db.add(PasswordResetToken(
+            user_id=user_id,
+            token_hash=self.hash_token(token),
+            expires_at=datetime.utcnow() + self.ttl
+        ))
+        return token
+
+    async def check(self, db, token: str, email: str) -> Optional[ResetTokenEntry]:
+        """
+        คืนค่า entry ถ้า token ตรงกับ token ปัจจุบันของ email นี้และยังใช้ได้ และนับการใช้งานหนึ่งครั้ง
+        คืนค่า None เมื่อไม่พบ, ไม่ตรง, หมดอายุ หรือใช้เกิน max_attempts แล้ว
+        """
+        row = (await db.execute(
+            select(PasswordResetToken.id, PasswordResetToken.user_id, PasswordResetToken.expires_at,
+                   PasswordResetToken.token_hash)
+            .join(User, User.id == PasswordResetToken.user_id)
+            .where(User.email == email)
+        )).first()
+        if row is None or row.expires_at < datetime.utcnow():
+            return None
+
+        result = await db.execute(
+            update(PasswordResetToken)
+            .where(PasswordResetToken.id == row.id, PasswordResetToken.attempts < self.max_attempts)
+            .values(attempts=PasswordResetToken.attempts + 1)
+        )
+        await db.commit()
+        if result.rowcount == 0 or not hmac.compare_digest(row.token_hash, self.hash_token(token)):
+            return None
+        return ResetTokenEntry(token_id=row.id, user_id=row.user_id, expires_at=row.expires_at)
+
+    async def consume(self, db, entry: ResetTokenEntry) -> bool:
+        """
+        ลบ token ทั้งหมดของผู้ใช้หลัง reset สำเร็จ ผู้เรียกต้อง commit เอง
+        คืนค่า False ถ้า token นี้ถูกใช้ไปแล้ว (reset พร้อมกันสองครั้งด้วย token เดียว)
+        """
+        result = await db.execute(delete(PasswordResetToken).where(PasswordResetToken.id == entry.token_id))
+        if result.rowcount == 0:
+            return False
+        await db.execute(delete(PasswordResetToken).where(PasswordResetToken.user_id == entry.user_id))
+        return True
+
+    async def sweep_expired(self) -> int:
+        """ลบ token ที่หมดอายุทีละ batch เพื่อไม่ให้ lock ตารางนาน"""
+        now = datetime.utcnow()
+        deleted = 0
+        while True:
+            async with AsyncSessionLocal() as db:
+                ids = (await db.execute(
+                    select(PasswordResetToken.id)
+                    .where(PasswordResetToken.expires_at < now)
+                    .limit(self.sweep_batch_size)
+                )).scalars().all()
+                if not ids:
+                    break
+                await db.execute(delete(PasswordResetToken).where(PasswordResetToken.id.in_(ids)))
+                await db.commit()
+            deleted += len(ids)
+            if len(ids) < self.sweep_batch_size:
+                break
+        self.swept += deleted
+        return deleted
+
+    async def _sweep_forever(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval_seconds)
+            try:
+                await self.sweep_expired()
+            except Exception as e:
+                print(f"Failed to sweep expired reset tokens: {e}")
+
+    def start(self):
+        if self._sweeper is None:
+            self._sweeper = asyncio.create_task(self._sweep_forever())
+
+    async def stop(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+
+
+reset_token_store = ResetTokenStore(**Config.load_reset_token_config())
@@ -1,5 +1,28 @@
 import strawberry
+from strawberry.extensions import ParserCache, ValidationCache
+from strawberry.schema.config import StrawberryConfig
+from config import Config
+from metrics import MetricsExtension
+from query_cost import QueryCostExtension
 from mutation import Mutation
 from query import Query
+from subscription import Subscription
 
-schema = strawberry.Schema(query=Query, mutation=Mutation)
\ No newline at end of file
+# เก็บ document ที่ parse และ validate แล้ว (ตามข้อความ query) ไม่ต้องทำซ้ำทุก request
+# ส่งเป็น factory ให้สร้าง extension ใหม่ทุก request (LRU cache ของ strawberry อยู่ระดับโมดูล จึงยังใช้ร่วมกัน)
+_document_cache_size = Config.load_graphql_config()['document_cache_size']
+# client ส่งหลาย operation เป็น JSON array ใน request เดียวได้ (รันพร้อมกันโดยใช้ context เดียวกัน)
+_max_batch_operations = Config.load_query_limits_config()['max_operations']
+
+schema = strawberry.Schema(
+    query=Query,
+    mutation=Mutation,
+    subscription=Subscription,
+    extensions=[
+        MetricsExtension,
+        lambda: ParserCache(maxsize=_document_cache_size),
+        lambda: ValidationCache(maxsize=_document_cache_size),
+        QueryCostExtension,
+    ],
+    config=StrawberryConfig(batching_config={'max_operations': _max_batch_operations}),
+)
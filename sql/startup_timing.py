@@ -0,0 +1,33 @@
+import os
+import time
+from contextlib import contextmanager
+from typing import List, Tuple
+
+
+class StartupTimer:
+    """
+    จับเวลาแต่ละขั้นของการเริ่ม worker (import โมดูล, สร้าง app, ต่อฐานข้อมูล, เริ่ม background task)
+    แล้วพิมพ์สรุปบรรทัดเดียวเมื่อ startup เสร็จ ค่าเดียวกันออกใน /metrics ด้วย
+    """
+
+    def __init__(self):
+        self.phases: List[Tuple[str, float]] = []
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - started))
+
+    def total_seconds(self) -> float:
+        # รวมเฉพาะเวลาของแต่ละขั้น (gunicorn preload สร้าง app ใน master ก่อน fork แล้ว worker ค่อยรัน lifespan)
+        return sum(seconds for _, seconds in self.phases)
+
+    def report(self) -> str:
+        parts = ', '.join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in self.phases)
+        return f"Startup (pid {os.getpid()}): {parts}; total {self.total_seconds() * 1000:.1f} ms"
+
+    def get_metrics(self) -> dict:
+        return {f'{name}_ms': seconds * 1000 for name, seconds in self.phases}
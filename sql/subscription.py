@@ -0,0 +1,28 @@
+import strawberry
+from typing import AsyncGenerator
+
+from Types import UserType
+from model import UserTier
+from pubsub import broker, tier_channel
+from user_gateway import UserGateway
+
+@strawberry.type
+class Subscription:
+    @strawberry.subscription
+    async def tier_assigned(self, user_id: int) -> AsyncGenerator[UserType, None]:
+        """
+        ส่งข้อมูลผู้ใช้กลับไปครั้งเดียวเมื่อ admin กำหนด tier ให้ (แทนการ poll checkMyStatus)
+        subscribe ก่อนอ่านสถานะปัจจุบัน เพื่อไม่ให้พลาดการเปลี่ยนแปลงที่เกิดขึ้นระหว่างนั้น
+        """
+        async with broker.subscribe(tier_channel(user_id)) as messages:
+            user = await UserGateway.get_user_view(user_id)
+            if not user:
+                return
+            if user.tier != UserTier.PENDING.value:
+                yield user
+                return
+
+            async for message in messages:
+                if message['tier'] != UserTier.PENDING.value:
+                    yield UserType(**message)
+                    return
@@ -0,0 +1,87 @@
+"""
+ตั้งค่าสำหรับทดสอบ: ฐานข้อมูล SQLite ชั่วคราว, bcrypt รอบต่ำ, อีเมลเก็บใน memory
+ต้องตั้ง environment ก่อน import โมดูลของแอป เพราะ singleton อ่านค่าตอน import
+"""
+import asyncio
+import os
+import sys
+import tempfile
+
+import pytest
+
+SQL_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SQL_DIR)
+
+_tmp_dir = tempfile.mkdtemp(prefix='cyber-tests-')
+os.environ.update({
+    'APP_MODE': 'dev',
+    'DB_PROFILE': 'test',
+    'DATABASE_URL': f"sqlite:///{_tmp_dir}/test.db",
+    'ASYNC_DATABASE_URL': f"sqlite+aiosqlite:///{_tmp_dir}/test.db",
+    'HASHER_ROUNDS': '4',
+    'HASHER_WORKERS': '2',
+    'MAIL_TRANSPORT': 'memory',
+    # ทุก request ของ TestClient มาจาก IP เดียวกัน
+    'LOGIN_RATE_PER_IP': '1000',
+    'RESET_RATE_PER_IP': '1000',
+    'PERSISTED_QUERIES_MANIFEST': f"{_tmp_dir}/persisted_queries.json",
+    'ADMIN_API_KEY': 'test-admin-key',
+})
+ADMIN_HEADERS = {'X-Admin-Key': 'test-admin-key'}
+
+
+@pytest.fixture(scope='session')
+def client():
+    from fastapi.testclient import TestClient
+
+    from create_db import create_tables
+    from main import create_app
+
+    asyncio.run(create_tables())
+    with TestClient(create_app()) as test_client:
+        yield test_client
+
+
+def _executor(client, headers=None):
+    def execute(query: str, **variables) -> dict:
+        response = client.post('/graphql', json={'query': query, 'variables': variables}, headers=headers)
+        body = response.json()
+        assert 'errors' not in body, body
+        return body['data']
+    return execute
+
+
+@pytest.fixture
+def graphql(client):
+    return _executor(client)
+
+
+@pytest.fixture
+def admin_graphql(client):
+    """เหมือน graphql แต่ส่ง X-Admin-Key สำหรับ field ของ admin"""
+    return _executor(client, ADMIN_HEADERS)
+
+
+@pytest.fixture
+def run(client):
+    """รัน coroutine บน event loop ของแอป (loop เดียวกับ engine และ background task)"""
+    def call(function, *args):
+        return client.portal.call(function, *args)
+    return call
+
+
+@pytest.fixture
+def register(graphql):
+    def create(username: str, password: str = 'Passw0rd!1', tier: str = None) -> int:
+        data = graphql(
+            'mutation($u: String!, $e: String!, $p: String!) {'
+            ' registerCustomer(username: $u, email: $e, password: $p) { success message user { id } } }',
+            u=username, e=f"{username}@example.com", p=password,
+        )['registerCustomer']
+        assert data['success'], data['message']
+        user_id = data['user']['id']
+        if tier:
+            graphql('mutation($id: Int!, $t: String!) { assignTier(userId: $id, tierName: $t) { id } }',
+                    id=user_id, t=tier)
+        return user_id
+    return create
@@ -0,0 +1,105 @@
+import csv
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import func, select
+
+from bulk_import import BulkImporter
+from database import AsyncSessionLocal
+from model import User
+
+
+def _args(path, **overrides) -> SimpleNamespace:
+    args = dict(input=str(path), format=None, tier='PENDING', batch_size=10, workers=2, rounds=4,
+                errors=None, restart=False)
+    args.update(overrides)
+    return SimpleNamespace(**args)
+
+
+async def _count_imported(prefix: str) -> int:
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(select(func.count(User.id)).where(User.email.like(f'{prefix}%@import.test')))).scalar()
+
+
+async def _add_user(username: str, email: str):
+    async with AsyncSessionLocal() as db:
+        db.add(User(username=username, email=email, password='x'))
+        await db.commit()
+
+
+def _write_input(path, prefix: str):
+    """30 แถว: แถว 5 email ผิดรูปแบบ, แถว 13 ซ้ำกับแถว 3 ในไฟล์"""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['username', 'email', 'password'])
+        for index in range(1, 31):
+            if index == 5:
+                writer.writerow([f'{prefix}-bad', 'nope', 'x'])
+            elif index == 13:
+                writer.writerow([f'{prefix}3', f'{prefix}-dup@import.test', 'Passw0rd!1'])
+            else:
+                writer.writerow([f'{prefix}{index}', f'{prefix}{index}@import.test', 'Passw0rd!1'])
+    return path
+
+
+@pytest.fixture
+def input_csv(tmp_path):
+    return _write_input(tmp_path / 'users.csv', 'imp')
+
+
+def test_resume_after_crash_and_concurrent_signup(client, run, monkeypatch, input_csv):
+    commit_batch = BulkImporter.commit_batch
+    commits = []
+
+    async def crash_after_second_commit(self, *args):
+        await commit_batch(self, *args)
+        commits.append(args[0])
+        if len(commits) == 2:
+            raise RuntimeError('crash')
+
+    monkeypatch.setattr(BulkImporter, 'commit_batch', crash_after_second_commit)
+    with pytest.raises(RuntimeError):
+        run(BulkImporter(_args(input_csv)).run)
+    # batch ที่ commit แล้วอยู่ครบ (แถว 1-20 ลบแถวที่ผิด 2 แถว)
+    assert run(_count_imported, 'imp') == 18
+    monkeypatch.setattr(BulkImporter, 'commit_batch', commit_batch)
+
+    # มีคนสมัครด้วย username ในไฟล์ระหว่างนั้น และ find_existing มองไม่เห็นในรอบแรก จึงไปชนตอน INSERT
+    run(_add_user, 'imp25', 'imp25@elsewhere.test')
+    find_existing = BulkImporter.find_existing
+    missed = []
+
+    async def miss_once(usernames, emails):
+        if not missed and 'imp25' in usernames:
+            missed.append(True)
+            return set(), set()
+        return await find_existing(usernames, emails)
+
+    monkeypatch.setattr(BulkImporter, 'find_existing', staticmethod(miss_once))
+    importer = BulkImporter(_args(input_csv))
+    run(importer.run)
+
+    assert missed
+    assert (importer.rows_processed, importer.imported, importer.failed) == (30, 27, 3)
+    assert run(_count_imported, 'imp') == 27
+    with open(f"{input_csv}.errors.csv", newline='', encoding='utf-8') as f:
+        report = list(csv.DictReader(f))
+    # แถวที่เขียนไว้ก่อน crash ไม่ถูกเขียนซ้ำตอนทำต่อ
+    assert [(line['row'], line['username']) for line in report] == [('5', 'imp-bad'), ('13', 'imp3'), ('25', 'imp25')]
+    assert report[2]['error'] == 'Username or email already in use.'
+
+
+def test_restart_forgets_saved_progress(client, run, tmp_path):
+    path = _write_input(tmp_path / 'restart.csv', 'rst')
+    run(BulkImporter(_args(path)).run)
+
+    resumed = BulkImporter(_args(path))
+    run(resumed.run)
+    # ทำครบแล้ว รอบถัดไปอ่านความคืบหน้าเดิมและไม่ทำแถวใดซ้ำ
+    assert (resumed.rows_processed, resumed.imported, resumed.failed) == (30, 28, 2)
+
+    restarted = BulkImporter(_args(path, restart=True))
+    run(restarted.run)
+    # เริ่มใหม่ทั้งไฟล์: ทุกแถวที่ถูกต้องมีอยู่แล้วในฐานข้อมูล
+    assert (restarted.rows_processed, restarted.imported, restarted.failed) == (30, 0, 30)
+    assert run(_count_imported, 'rst') == 28
@@ -0,0 +1,32 @@
+from user_gateway import MAX_LOGIN_ATTEMPTS
+
+LOGIN = 'mutation($i: String!, $p: String!) { loginUser(loginIdentifier: $i, password: $p) { success message } }'
+
+
+def test_login_success(graphql, register):
+    register('alice')
+    result = graphql(LOGIN, i='alice', p='Passw0rd!1')['loginUser']
+    assert result['success'], result['message']
+
+
+def test_lockout_after_max_failed_attempts(graphql, register):
+    register('mallory')
+    for _ in range(MAX_LOGIN_ATTEMPTS):
+        result = graphql(LOGIN, i='mallory', p='wrong-password')['loginUser']
+        assert not result['success']
+
+    # ถูกล็อกแล้ว รหัสผ่านถูกก็เข้าไม่ได้ ทั้งผ่าน username และ email
+    for identifier in ('mallory', 'mallory@example.com'):
+        result = graphql(LOGIN, i=identifier, p='Passw0rd!1')['loginUser']
+        assert not result['success']
+        assert 'locked' in result['message']
+
+
+def test_failures_reset_after_successful_login(graphql, register):
+    register('bob')
+    for _ in range(MAX_LOGIN_ATTEMPTS - 1):
+        assert not graphql(LOGIN, i='bob', p='wrong-password')['loginUser']['success']
+    assert graphql(LOGIN, i='bob', p='Passw0rd!1')['loginUser']['success']
+    # นับใหม่หลัง login สำเร็จ จึงยังไม่ล็อก
+    assert not graphql(LOGIN, i='bob', p='wrong-password')['loginUser']['success']
+    assert graphql(LOGIN, i='bob', p='Passw0rd!1')['loginUser']['success']
@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from database import AsyncSessionLocal
+from login_log_retention import hour_bucket, login_log_compactor
+from model import LoginLog
+
+STATS = ('query($since: DateTime!, $i: String) {'
+         ' loginStats(since: $since, identifier: $i) { bucketStart identifier successCount failureCount } }')
+
+
+async def _insert_logs(rows):
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(LoginLog), rows)
+        await db.commit()
+
+
+def _log(identifier: str, moment: datetime, is_success: bool, **extra) -> dict:
+    return {'username_attempt': identifier, 'timestamp': moment, 'is_success': is_success,
+            'ip_address': '127.0.0.1', **extra}
+
+
+def test_compactor_rolls_up_hourly_counts(admin_graphql, run):
+    now = datetime.utcnow()
+    earlier = now - timedelta(hours=2)
+    run(_insert_logs, [
+        _log('Judy', now, True), _log('judy', now, False), _log('JUDY', now, False),
+        _log('judy', earlier, True),
+    ])
+    run(login_log_compactor.compact)
+
+    stats = admin_graphql(STATS, since=(now - timedelta(days=1)).isoformat(), i='Judy')['loginStats']
+    counts = {line['bucketStart']: (line['successCount'], line['failureCount']) for line in stats}
+    assert counts == {
+        hour_bucket(earlier).isoformat(): (1, 0),
+        hour_bucket(now).isoformat(): (1, 2),
+    }
+    # รันซ้ำไม่นับซ้ำ
+    run(login_log_compactor.compact)
+    assert admin_graphql(STATS, since=(now - timedelta(days=1)).isoformat(), i='judy')['loginStats'] == stats
+
+
+def test_row_committed_after_a_higher_id_is_still_counted(admin_graphql, run):
+    now = datetime.utcnow()
+    run(_insert_logs, [_log('ken', now, True, id=900000)])
+    run(login_log_compactor.compact)
+    # แถวที่ได้ id น้อยกว่าแต่ commit ทีหลังรอบก่อนของ compactor
+    run(_insert_logs, [_log('ken', now, False, id=899999)])
+    run(login_log_compactor.compact)
+
+    stats = admin_graphql(STATS, since=(now - timedelta(hours=1)).isoformat(), i='ken')['loginStats']
+    assert [(line['successCount'], line['failureCount']) for line in stats] == [(1, 1)]
+
+
+def test_purge_keeps_rows_that_are_not_rolled_up(run):
+    old = datetime.utcnow() - login_log_compactor.retention - timedelta(days=1)
+    run(_insert_logs, [_log('leo', old, True)])
+    assert run(login_log_compactor.purge) == 0
+    run(login_log_compactor.compact)
+    assert run(login_log_compactor.purge) >= 1
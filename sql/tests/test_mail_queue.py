@@ -0,0 +1,90 @@
+import logging
+from email.message import EmailMessage
+
+import pytest
+
+from mail_queue import FileTransport, MailQueue, MailTransport
+
+
+class FlakyTransport(MailTransport):
+    """ส่งไม่สำเร็จ failures ครั้งแรก แล้วจึงส่งได้"""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.attempts = 0
+        self.closed = 0
+        self.outbox = []
+
+    def send(self, msg: EmailMessage):
+        self.attempts += 1
+        if self.attempts <= self.failures:
+            raise OSError("connection reset")
+        self.outbox.append(msg)
+
+    def close(self):
+        self.closed += 1
+
+
+def _message(recipient: str = 'someone@example.com') -> EmailMessage:
+    msg = EmailMessage()
+    msg['Subject'] = 'Test'
+    msg['To'] = recipient
+    msg.set_content('hello')
+    return msg
+
+
+def _deliver(transport: MailTransport, *messages, max_retries: int = 3) -> MailQueue:
+    created = []
+
+    def factory():
+        created.append(transport)
+        return transport
+
+    mail_queue = MailQueue(factory, workers=1, max_retries=max_retries, backoff_seconds=0.01)
+    mail_queue.start()
+    for msg in messages:
+        mail_queue.enqueue(msg)
+    mail_queue.stop()
+    assert len(created) == 1
+    return mail_queue
+
+
+def test_retries_until_sent(caplog):
+    transport = FlakyTransport(failures=2)
+    with caplog.at_level(logging.WARNING, logger='mail_queue'):
+        mail_queue = _deliver(transport, _message())
+    assert len(transport.outbox) == 1
+    # ปิด connection ที่เสียทุกครั้ง แล้วเปิดใหม่ในรอบถัดไป (และปิดอีกครั้งตอน worker หยุด)
+    assert transport.closed == 3
+    assert mail_queue.get_metrics() == {'queued': 0, 'sent': 1, 'retried': 2, 'failed': 0}
+    assert len([record for record in caplog.records if record.levelno == logging.WARNING]) == 2
+
+
+def test_gives_up_after_max_retries(caplog):
+    transport = FlakyTransport(failures=10)
+    with caplog.at_level(logging.WARNING, logger='mail_queue'):
+        mail_queue = _deliver(transport, _message(), max_retries=3)
+    assert transport.attempts == 3 and not transport.outbox
+    assert mail_queue.get_metrics() == {'queued': 0, 'sent': 0, 'retried': 2, 'failed': 1}
+    assert any(record.levelno == logging.ERROR for record in caplog.records)
+
+
+def test_one_transport_is_reused_for_every_message():
+    transport = FlakyTransport(failures=0)
+    mail_queue = _deliver(transport, *(_message(f"user{index}@example.com") for index in range(5)))
+    assert [msg['To'] for msg in transport.outbox] == [f"user{index}@example.com" for index in range(5)]
+    assert mail_queue.get_metrics()['sent'] == 5
+
+
+def test_enqueue_rejects_when_queue_is_full():
+    mail_queue = MailQueue(lambda: FlakyTransport(failures=0), max_queue=1)
+    mail_queue.enqueue(_message())
+    with pytest.raises(ConnectionError):
+        mail_queue.enqueue(_message())
+
+
+def test_file_transport_writes_eml(tmp_path):
+    FileTransport(str(tmp_path)).send(_message())
+    [written] = tmp_path.iterdir()
+    assert written.suffix == '.eml'
+    assert b'someone@example.com' in written.read_bytes()
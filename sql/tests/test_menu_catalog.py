@@ -0,0 +1,63 @@
+from menu_catalog import MenuCatalog
+from model import UserTier
+
+MENU = ('query($t: String!, $v: Int) {'
+        ' menu(tier: $t, knownVersion: $v) { version notModified items { name tier exclusive } } }')
+ADD = 'mutation($n: String!, $t: String!) { addMenuItem(name: $n, tier: $t) { success message } }'
+REMOVE = 'mutation($n: String!) { removeMenuItem(name: $n) { success message } }'
+CREATE_ORDER = ('mutation($u: Int!, $items: [String!]!) {'
+                ' createOrder(userId: $u, itemNames: $items) { id } }')
+
+
+def _names(menu: dict) -> set:
+    return {item['name'] for item in menu['items']}
+
+
+def test_premium_menu_includes_saver_items(graphql):
+    saver = graphql(MENU, t='saver')['menu']
+    premium = graphql(MENU, t='premium')['menu']
+    assert saver['version'] == premium['version']
+    assert _names(saver) < _names(premium)
+    assert not any(item['exclusive'] for item in saver['items'])
+
+
+def test_known_version_is_not_modified(graphql):
+    version = graphql(MENU, t='saver')['menu']['version']
+    assert graphql(MENU, t='saver', v=version)['menu'] == {'version': version, 'notModified': True, 'items': []}
+
+
+def test_menu_changes_bump_the_version(graphql, admin_graphql):
+    version = graphql(MENU, t='premium')['menu']['version']
+    assert admin_graphql(ADD, n='Wagyu', t='premium')['addMenuItem']['success']
+
+    menu = graphql(MENU, t='premium', v=version)['menu']
+    assert menu['version'] == version + 1 and not menu['notModified']
+    assert 'Wagyu' in _names(menu)
+    assert 'Wagyu' not in _names(graphql(MENU, t='saver')['menu'])
+
+    assert admin_graphql(REMOVE, n='Wagyu')['removeMenuItem']['success']
+    menu = graphql(MENU, t='premium')['menu']
+    assert menu['version'] == version + 2 and 'Wagyu' not in _names(menu)
+    assert not admin_graphql(REMOVE, n='Wagyu')['removeMenuItem']['success']
+
+
+def test_orders_are_validated_against_the_current_menu(client, graphql, admin_graphql, register):
+    user_id = register('uma', tier='PREMIUM')
+    admin_graphql(ADD, n='Kurobuta', t='premium')
+    assert graphql(CREATE_ORDER, u=user_id, items=['Kurobuta-1'])['createOrder']['id']
+
+    admin_graphql(REMOVE, n='Kurobuta')
+    response = client.post('/graphql', json={'query': CREATE_ORDER,
+                                             'variables': {'u': user_id, 'items': ['Kurobuta-1']}}).json()
+    assert 'not available' in response['errors'][0]['message']
+
+
+def test_another_worker_reloads_when_the_version_changes(admin_graphql, run):
+    other_worker = MenuCatalog(refresh_seconds=0)
+    version, _ = run(other_worker.get_menu, UserTier.PREMIUM)
+
+    admin_graphql(ADD, n='Iberico', t='premium')
+    new_version, items = run(other_worker.get_menu, UserTier.PREMIUM)
+    assert new_version == version + 1
+    assert ('Iberico', UserTier.PREMIUM) in items
+    admin_graphql(REMOVE, n='Iberico')
@@ -0,0 +1,103 @@
+from sqlalchemy import func, select
+
+from database import AsyncSessionLocal
+from model import KitchenDemandRollup, OrderItem
+
+CREATE_ORDER = ('mutation($u: Int!, $items: [String!]!, $k: String) {'
+                ' createOrder(userId: $u, itemNames: $items, clientKey: $k) { id items } }')
+CREATE_ORDERS = ('mutation($orders: [OrderInput!]!) {'
+                 ' createOrders(orders: $orders) { clientKey success message order { id } } }')
+ORDERS_BY_USER = ('query($u: Int!, $after: String, $first: Int!) {'
+                  ' ordersByUser(userId: $u, after: $after, first: $first) { items { id } endCursor hasNextPage } }')
+
+
+async def _order_totals(order_id: int):
+    async with AsyncSessionLocal() as db:
+        items = (await db.execute(
+            select(func.count(OrderItem.id)).where(OrderItem.order_id == order_id)
+        )).scalar()
+        demand = (await db.execute(
+            select(func.sum(KitchenDemandRollup.quantity)).where(KitchenDemandRollup.item_name == 'ตับหมู')
+        )).scalar()
+    return items, demand
+
+
+async def _order_items(order_id: int):
+    async with AsyncSessionLocal() as db:
+        return list((await db.execute(select(OrderItem.item_name).where(OrderItem.order_id == order_id))).scalars())
+
+
+def test_create_order_replay_returns_same_order(graphql, register, run):
+    user_id = register('grant', tier='SAVER')
+    first = graphql(CREATE_ORDER, u=user_id, items=['ตับหมู-2'], k='retry-1')['createOrder']
+    items_before, demand_before = run(_order_totals, first['id'])
+
+    replay = graphql(CREATE_ORDER, u=user_id, items=['ตับหมู-2'], k='retry-1')['createOrder']
+    assert replay == first
+    # ส่งซ้ำไม่เพิ่ม order_items และไม่บวกยอดเข้า rollup อีก
+    assert run(_order_totals, first['id']) == (items_before, demand_before) == (1, 2)
+
+
+def test_create_orders_replay_in_batch(graphql, register):
+    user_id = register('heidi', tier='SAVER')
+    orders = [
+        {'userId': user_id, 'itemNames': ['ผักบุ้ง-1'], 'clientKey': 'batch-a'},
+        {'userId': user_id, 'itemNames': ['ผักบุ้ง-1'], 'clientKey': 'batch-a'},
+        {'userId': user_id, 'itemNames': ['ไข่ไก่-1'], 'clientKey': 'batch-b'},
+    ]
+    results = graphql(CREATE_ORDERS, orders=orders)['createOrders']
+    assert all(result['success'] for result in results)
+    assert results[0]['order']['id'] == results[1]['order']['id'] != results[2]['order']['id']
+
+    replay = graphql(CREATE_ORDERS, orders=orders)['createOrders']
+    assert [result['order']['id'] for result in replay] == [result['order']['id'] for result in results]
+
+
+def test_create_order_replay_with_different_items_is_rejected(client, graphql, register, run):
+    user_id = register('judy', tier='SAVER')
+    first = graphql(CREATE_ORDER, u=user_id, items=['ตับหมู-1'], k='reuse-1')['createOrder']
+
+    response = client.post('/graphql', json={
+        'query': CREATE_ORDER, 'variables': {'u': user_id, 'items': ['ไข่ไก่-1'], 'k': 'reuse-1'},
+    }).json()
+    assert 'reused with different items' in response['errors'][0]['message']
+    # order เดิมไม่ถูกแก้
+    assert run(_order_items, first['id']) == ['ตับหมู']
+
+
+def test_create_orders_key_reused_in_batch_with_different_items(graphql, register):
+    user_id = register('kate', tier='SAVER')
+    results = graphql(CREATE_ORDERS, orders=[
+        {'userId': user_id, 'itemNames': ['ผักบุ้ง-1'], 'clientKey': 'batch-c'},
+        {'userId': user_id, 'itemNames': ['ผักบุ้ง-2'], 'clientKey': 'batch-c'},
+    ])['createOrders']
+    assert results[0]['success']
+    assert not results[1]['success']
+    assert 'reused with different items' in results[1]['message']
+
+
+def test_orders_cursor_pagination(graphql, register):
+    user_id = register('ivan', tier='SAVER')
+    created = [
+        graphql(CREATE_ORDER, u=user_id, items=['วุ้นเส้น-1'], k=f"page-{index}")['createOrder']['id']
+        for index in range(5)
+    ]
+
+    seen, after = [], None
+    while True:
+        page = graphql(ORDERS_BY_USER, u=user_id, after=after, first=2)['ordersByUser']
+        assert len(page['items']) <= 2
+        seen.extend(item['id'] for item in page['items'])
+        if not page['hasNextPage']:
+            break
+        after = page['endCursor']
+
+    # ใหม่ไปเก่า ไม่ซ้ำและไม่ขาด
+    assert seen == sorted(created, reverse=True)
+
+
+def test_invalid_cursor_is_rejected(client):
+    response = client.post('/graphql', json={
+        'query': ORDERS_BY_USER, 'variables': {'u': 1, 'after': 'not-a-cursor', 'first': 2},
+    }).json()
+    assert response.get('errors')
@@ -0,0 +1,50 @@
+import asyncio
+import os
+
+import pytest
+
+from password_hasher import HasherBusyError, PasswordHasher
+
+REGISTER = ('mutation($u: String!, $e: String!, $p: String!) {'
+            ' registerCustomer(username: $u, email: $e, password: $p) { success message } }')
+
+
+@pytest.fixture
+def hasher():
+    hasher = PasswordHasher(max_workers=1, max_queue=2, rounds=4)
+    yield hasher
+    hasher.shutdown()
+
+
+def test_hash_and_check_run_in_the_pool(hasher):
+    async def scenario():
+        hashed = await hasher.hash_password('Passw0rd!1')
+        return hashed, await hasher.check_password('Passw0rd!1', hashed), \
+            await hasher.check_password('wrong', hashed)
+
+    hashed, matches, mismatches = asyncio.run(scenario())
+    assert hashed.startswith('$2b$04$')
+    assert matches and not mismatches
+    assert hasher._get_executor().submit(os.getpid).result() != os.getpid()
+    metrics = hasher.get_metrics()
+    assert metrics['completed'] == 3 and metrics['queue_depth'] == 0
+
+
+def test_rejects_when_queue_is_full(hasher):
+    async def scenario():
+        return await asyncio.gather(*(hasher.hash_password('Passw0rd!1') for _ in range(3)),
+                                    return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert [isinstance(result, HasherBusyError) for result in results] == [False, False, True]
+    assert hasher.get_metrics()['rejected'] == 1
+    assert hasher.get_metrics()['queue_depth'] == 0
+
+
+def test_busy_hasher_is_reported_to_the_client(graphql, monkeypatch):
+    from password_hasher import password_hasher
+
+    monkeypatch.setattr(password_hasher, 'max_queue', 0)
+    result = graphql(REGISTER, u='busy', e='busy@example.com', p='Passw0rd!1')['registerCustomer']
+    assert not result['success']
+    assert result['message'] == "Server is busy. Please try again in a moment."
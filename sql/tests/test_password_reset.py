@@ -0,0 +1,79 @@
+import re
+import time
+
+from email_utils import mail_queue
+
+LOGIN = 'mutation($i: String!, $p: String!) { loginUser(loginIdentifier: $i, password: $p) { success message } }'
+REQUEST = 'mutation($e: String!) { requestPasswordReset(email: $e) { success message } }'
+VERIFY = 'mutation($t: String!, $e: String!) { verifyResetToken(token: $t, email: $e) { success message } }'
+RESET = ('mutation($t: String!, $p: String!, $e: String!) {'
+         ' resetPassword(token: $t, newPassword: $p, email: $e) { success message } }')
+
+
+def _latest_token(recipient: str) -> str:
+    outbox = mail_queue.transport_factory().outbox
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        for msg in reversed(outbox):
+            if msg['To'] == recipient:
+                body = msg.get_content()
+                assert 'expire in 15 minutes' in body
+                return re.search(r'reset code is: (\S+)', body).group(1)
+        time.sleep(0.05)
+    raise AssertionError(f"No reset email sent to {recipient}")
+
+
+def test_reset_password_with_emailed_token(graphql, register):
+    register('carol')
+    assert graphql(REQUEST, e='carol@example.com')['requestPasswordReset']['success']
+    token = _latest_token('carol@example.com')
+
+    assert graphql(VERIFY, t=token, e='carol@example.com')['verifyResetToken']['success']
+    result = graphql(RESET, t=token, p='N3wPassw0rd!', e='carol@example.com')['resetPassword']
+    assert result['success'], result['message']
+
+    assert not graphql(LOGIN, i='carol', p='Passw0rd!1')['loginUser']['success']
+    assert graphql(LOGIN, i='carol', p='N3wPassw0rd!')['loginUser']['success']
+    # token ใช้ได้ครั้งเดียว
+    assert not graphql(RESET, t=token, p='An0therPass!', e='carol@example.com')['resetPassword']['success']
+
+
+def test_token_is_bound_to_its_email(graphql, register):
+    register('dave')
+    register('erin')
+    graphql(REQUEST, e='dave@example.com')
+    token = _latest_token('dave@example.com')
+
+    assert not graphql(VERIFY, t=token, e='erin@example.com')['verifyResetToken']['success']
+    assert graphql(VERIFY, t=token, e='dave@example.com')['verifyResetToken']['success']
+
+
+def test_guessing_is_throttled_per_email(graphql, register):
+    from login_guard import login_guard
+
+    register('frank')
+    messages = [
+        graphql(VERIFY, t='ZZZZZZ', e='frank@example.com')['verifyResetToken']['message']
+        for _ in range(login_guard.reset_email_limit + 1)
+    ]
+    assert all(message == 'Invalid or expired token.' for message in messages[:-1])
+    assert messages[-1].startswith('Too many reset attempts')
+
+
+def test_email_is_required(client):
+    response = client.post('/graphql', json={'query': 'mutation { verifyResetToken(token: "ABCDEF") { success } }'})
+    assert response.json()['errors']
+
+
+def test_wrong_guesses_use_up_the_token(graphql, register):
+    from reset_tokens import reset_token_store
+
+    register('grace')
+    graphql(REQUEST, e='grace@example.com')
+    token = _latest_token('grace@example.com')
+    wrong = 'A' * len(token) if token != 'A' * len(token) else 'B' * len(token)
+
+    for _ in range(reset_token_store.max_attempts):
+        assert not graphql(VERIFY, t=wrong, e='grace@example.com')['verifyResetToken']['success']
+    # token จริงก็ใช้ไม่ได้แล้ว เพราะ attempt ของ token นี้หมด
+    assert not graphql(VERIFY, t=token, e='grace@example.com')['verifyResetToken']['success']
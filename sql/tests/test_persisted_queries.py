@@ -0,0 +1,77 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from persisted_queries import PersistedQueryError, PersistedQueryStore, query_hash
+
+QUERY = 'query MenuNames { menuCatalog { name } }'
+
+
+def _persisted(sha: str) -> dict:
+    return {'persistedQuery': {'version': 1, 'sha256Hash': sha}}
+
+
+def _error_code(body: dict) -> str:
+    return body['errors'][0]['extensions']['code']
+
+
+def test_apq_miss_register_then_hit(client):
+    query = 'query ApqFlow { __typename }'
+    sha = query_hash(query)
+
+    miss = client.post('/graphql', json={'extensions': _persisted(sha)}).json()
+    assert _error_code(miss) == 'PERSISTED_QUERY_NOT_FOUND'
+
+    registered = client.post('/graphql', json={'query': query, 'extensions': _persisted(sha)}).json()
+    assert registered['data'] == {'__typename': 'Query'}
+
+    hit = client.post('/graphql', json={'extensions': _persisted(sha)}).json()
+    assert hit['data'] == {'__typename': 'Query'}
+
+
+def test_apq_hash_mismatch(client):
+    body = client.post('/graphql', json={'query': '{ __typename }', 'extensions': _persisted('0' * 64)}).json()
+    assert _error_code(body) == 'PERSISTED_QUERY_HASH_MISMATCH'
+
+
+def test_batched_operations_get_their_own_results(client):
+    # ParserCache/ValidationCache ถูกสร้างใหม่ต่อ operation จึงไม่ใช้ execution_context ปนกันใน batch
+    body = client.post('/graphql', json=[
+        {'query': 'query A { __typename }'},
+        {'query': 'query B { b: __typename }'},
+    ]).json()
+    assert body == [{'data': {'__typename': 'Query'}}, {'data': {'b': 'Query'}}]
+
+
+@pytest.fixture
+def allowlist_store(tmp_path):
+    manifest = tmp_path / 'manifest.json'
+    manifest.write_text(json.dumps({query_hash(QUERY): QUERY}), encoding='utf-8')
+    return PersistedQueryStore('allowlist', str(manifest), max_entries=10)
+
+
+def test_allowlist_accepts_manifest_queries(allowlist_store):
+    by_hash = SimpleNamespace(query=None, extensions=_persisted(query_hash(QUERY)))
+    allowlist_store.resolve(by_hash)
+    assert by_hash.query == QUERY
+
+    allowlist_store.resolve(SimpleNamespace(query=QUERY, extensions=None))
+    assert allowlist_store.get_metrics()['rejected'] == 0
+
+
+@pytest.mark.parametrize('request_data', [
+    SimpleNamespace(query='{ __typename }', extensions=None),
+    SimpleNamespace(query=None, extensions=_persisted(query_hash('{ __typename }'))),
+    SimpleNamespace(query='{ __typename }', extensions=_persisted(query_hash('{ __typename }'))),
+])
+def test_allowlist_rejects_other_queries(allowlist_store, request_data):
+    with pytest.raises(PersistedQueryError) as excinfo:
+        allowlist_store.resolve(request_data)
+    assert excinfo.value.code == 'PERSISTED_QUERY_NOT_ALLOWED'
+    assert allowlist_store.get_metrics()['manifest_entries'] == 1
+
+
+def test_allowlist_requires_manifest(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        PersistedQueryStore('allowlist', str(tmp_path / 'missing.json'), max_entries=10)
@@ -0,0 +1,59 @@
+import pytest
+
+from conftest import ADMIN_HEADERS
+
+# UserType.recentOrders -> OrderType.user วนกลับได้ จึงสร้าง query ลึกเท่าไรก็ได้ (ลึก 7 ชั้น)
+DEEP = ('query Deep { getUserById(id: 1) { recentOrders { user { recentOrders { user {'
+        ' recentOrders { id } } } } } } }')
+ALIASES = 'query Aliases { ' + ' '.join(f'm{index}: menu(tier: "saver") {{ version }}' for index in range(11)) + ' }'
+EXPENSIVE = 'query Expensive { recentOrders(first: 1000) { items { id userId } } }'
+USERS = 'query Users { users(first: 5) { items { id } } }'
+BULK_ASSIGN = ('mutation BulkAssign($ids: [Int!]!) {'
+               ' bulkAssignTier(userIds: $ids, tier: "SAVER") { userId success } }')
+
+
+def _post(client, query: str, headers=None, **variables) -> dict:
+    return client.post('/graphql', json={'query': query, 'variables': variables}, headers=headers).json()
+
+
+@pytest.mark.parametrize('query, extension', [
+    (DEEP, ('depth', 7)),
+    (ALIASES, ('aliases', 11)),
+    (EXPENSIVE, ('cost', 2011)),
+])
+def test_user_limits_reject_before_execution(client, query, extension):
+    body = _post(client, query)
+    assert body['data'] is None
+    error = body['errors'][0]
+    assert error['extensions']['code'] == 'QUERY_TOO_COMPLEX'
+    key, value = extension
+    assert error['extensions'][key] == value
+
+
+@pytest.mark.parametrize('query', [DEEP, ALIASES, EXPENSIVE])
+def test_admin_limits_allow_the_same_queries(client, query):
+    assert 'errors' not in _post(client, query, ADMIN_HEADERS)
+
+
+def test_wrong_admin_key_gets_user_limits(client):
+    body = _post(client, DEEP, {'X-Admin-Key': 'not-the-key'})
+    assert body['errors'][0]['extensions']['code'] == 'QUERY_TOO_COMPLEX'
+
+
+@pytest.mark.parametrize('query, variables', [
+    (USERS, {}),
+    (BULK_ASSIGN, {'ids': [1]}),
+    ('mutation { addMenuItem(name: "Foie gras", tier: "premium") { success } }', {}),
+    ('mutation { removeMenuItem(name: "Foie gras") { success } }', {}),
+    ('query { loginStats(since: "2020-01-01T00:00:00") { identifier } }', {}),
+])
+def test_admin_fields_require_the_admin_key(client, query, variables):
+    body = _post(client, query, **variables)
+    assert body['errors'][0]['message'] == 'Admin access required.'
+
+
+def test_admin_key_can_list_users(client, register):
+    register('leon')
+    body = _post(client, USERS, ADMIN_HEADERS)
+    assert 'errors' not in body
+    assert body['data']['users']['items']
@@ -0,0 +1,33 @@
+from contextlib import contextmanager
+
+TIER_ASSIGNED = 'subscription($u: Int!) { tierAssigned(userId: $u) { id tier } }'
+ASSIGN = 'mutation($u: Int!, $t: String!) { assignTier(userId: $u, tierName: $t) { id tier } }'
+
+
+@contextmanager
+def _subscribe(client, user_id: int):
+    with client.websocket_connect('/graphql', subprotocols=['graphql-transport-ws']) as session:
+        session.send_json({'type': 'connection_init'})
+        assert session.receive_json()['type'] == 'connection_ack'
+        session.send_json({'id': '1', 'type': 'subscribe',
+                           'payload': {'query': TIER_ASSIGNED, 'variables': {'u': user_id}}})
+        yield session
+
+
+def test_pushes_the_assigned_tier_once(client, graphql, register):
+    user_id = register('nina')
+    with _subscribe(client, user_id) as session:
+        graphql(ASSIGN, u=user_id, t='premium')
+        message = session.receive_json()
+        assert message['type'] == 'next'
+        assert message['payload']['data']['tierAssigned'] == {'id': user_id, 'tier': 'PREMIUM'}
+        # ส่งครั้งเดียวแล้วจบ subscription
+        assert session.receive_json() == {'id': '1', 'type': 'complete'}
+
+
+def test_user_with_a_tier_gets_it_immediately(client, register):
+    user_id = register('oscar', tier='SAVER')
+    with _subscribe(client, user_id) as session:
+        message = session.receive_json()
+        assert message['payload']['data']['tierAssigned'] == {'id': user_id, 'tier': 'SAVER'}
+        assert session.receive_json()['type'] == 'complete'
@@ -0,0 +1,64 @@
+import asyncio
+
+from model import UserTier
+from user_cache import LocalLRUBackend, UserCache, user_cache
+from user_gateway import UserGateway
+
+GET_USER = 'query($id: Int!) { getUserById(id: $id) { id tier } }'
+ASSIGN = 'mutation($u: Int!, $t: String!) { assignTier(userId: $u, tierName: $t) { id tier } }'
+
+
+def test_repeated_lookups_are_served_from_cache(graphql, register):
+    user_id = register('peggy')
+    graphql(GET_USER, id=user_id)
+    hits = user_cache.hits
+    assert graphql(GET_USER, id=user_id)['getUserById'] == {'id': user_id, 'tier': 'PENDING'}
+    assert user_cache.hits == hits + 1
+
+
+def test_only_the_id_key_is_cached(graphql, register):
+    user_id = register('quentin')
+    graphql(GET_USER, id=user_id)
+    keys = list(user_cache.backend._entries)
+    assert f"user:id:{user_id}" in keys
+    # ไม่มี key รองตาม username/email ที่ invalidate() ไม่ได้ลบ
+    assert all(key.startswith('user:id:') for key in keys)
+
+
+def test_assign_tier_invalidates_the_cached_user(graphql, register):
+    user_id = register('rupert')
+    assert graphql(GET_USER, id=user_id)['getUserById']['tier'] == 'PENDING'
+    graphql(ASSIGN, u=user_id, t='saver')
+    assert graphql(GET_USER, id=user_id)['getUserById']['tier'] == 'SAVER'
+
+
+def test_bulk_assign_invalidates_every_cached_user(graphql, register, run):
+    user_ids = [register('sybil'), register('trent')]
+    for user_id in user_ids:
+        graphql(GET_USER, id=user_id)
+    run(UserGateway.bulk_assign_tier, user_ids, UserTier.PREMIUM)
+    assert [graphql(GET_USER, id=user_id)['getUserById']['tier'] for user_id in user_ids] == ['PREMIUM', 'PREMIUM']
+
+
+def test_local_backend_evicts_least_recently_used():
+    cache = UserCache(LocalLRUBackend(max_entries=2), ttl_seconds=60)
+
+    async def scenario():
+        for key in ('a', 'b'):
+            await cache.backend.set(key, {'key': key}, 60)
+        await cache.backend.get('a')
+        await cache.backend.set('c', {'key': 'c'}, 60)
+        return [await cache.backend.get(key) for key in ('a', 'b', 'c')]
+
+    assert asyncio.run(scenario()) == [{'key': 'a'}, None, {'key': 'c'}]
+    assert cache.get_metrics()['evictions'] == 1
+
+
+def test_local_backend_expires_entries():
+    backend = LocalLRUBackend(max_entries=10)
+
+    async def scenario():
+        await backend.set('a', {'key': 'a'}, ttl=-1)
+        return await backend.get('a')
+
+    assert asyncio.run(scenario()) is None
@@ -0,0 +1,135 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from config import Config
+from Types import UserType
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+
+class CacheBackend:
+    """interface ของที่เก็บ cache (key -> dict) ต้องรองรับ TTL ต่อ key"""
+
+    async def get(self, key: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: dict, ttl: int):
+        raise NotImplementedError
+
+    async def delete(self, *keys: str):
+        raise NotImplementedError
+
+
+class LocalLRUBackend(CacheBackend):
+    """cache ภายใน process แบบ LRU + TTL จำกัดจำนวน entry ไม่เกิน max_entries"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    async def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    async def set(self, key: str, value: dict, ttl: int):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    async def delete(self, *keys: str):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+
+class RedisCacheBackend(CacheBackend):
+    """cache ที่แชร์กันทุก worker ผ่าน Redis เมื่อ invalidate แล้วทุก worker เห็นผลพร้อมกัน"""
+
+    def __init__(self, url: str):
+        if aioredis is None:
+            raise ImportError("USER_CACHE_BACKEND=redis requires the 'redis' package (pip install redis).")
+        self._client = aioredis.from_url(url)
+        self.evictions = 0
+
+    async def get(self, key: str) -> Optional[dict]:
+        raw = await self._client.get(key)
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: dict, ttl: int):
+        await self._client.set(key, json.dumps(value), ex=ttl)
+
+    async def delete(self, *keys: str):
+        if keys:
+            await self._client.delete(*keys)
+
+
+class UserCache:
+    """
+    read-through cache ของ UserType แยกตาม id (login ต้องใช้ password hash จึงอ่านจากฐานข้อมูลเสมอ ไม่มี key รองตาม username/email)
+    ผู้ที่แก้ข้อมูลผู้ใช้ต้องเรียก invalidate() เองหลัง commit
+    """
+
+    def __init__(self, backend: CacheBackend, ttl_seconds: int):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _id_key(user_id: int) -> str:
+        return f"user:id:{user_id}"
+
+    async def get_by_id(self, user_id: int) -> Optional[UserType]:
+        value = await self.backend.get(self._id_key(user_id))
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return UserType(**value)
+
+    async def put(self, user: UserType):
+        await self.backend.set(self._id_key(user.id), vars(user), self.ttl_seconds)
+
+    async def invalidate(self, user_id: int):
+        await self.backend.delete(self._id_key(user_id))
+        self.invalidations += 1
+
+    def get_metrics(self) -> dict:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.backend.evictions,
+            'invalidations': self.invalidations,
+        }
+
+
+def build_backend(cache_config: dict) -> CacheBackend:
+    if cache_config['backend'] == 'memory':
+        return LocalLRUBackend(cache_config['max_entries'])
+    if cache_config['backend'] == 'redis':
+        return RedisCacheBackend(cache_config['redis_url'])
+    raise ValueError(f"Unknown USER_CACHE_BACKEND '{cache_config['backend']}'. Expected memory or redis.")
+
+
+_cache_config = Config.load_user_cache_config()
+user_cache = UserCache(build_backend(_cache_config), _cache_config['ttl_seconds'])
@@ -1,21 +1,39 @@
-import bcrypt
-from sqlalchemy.orm import Session
-from sqlalchemy.exc import NoResultFound
-from datetime import datetime, timedelta
-import secrets
-import re 
-import string 
-import random 
-
-from database import SessionLocal
-from model import User, LoginLog, UserTier, Order, UserRole
-from sqlalchemy import or_
+from datetime import datetime, timedelta, timezone
+import uuid
+
+from database import AsyncSessionLocal
+from model import User, UserTier, Order, UserRole, KitchenDemandRollup, LoginLog, LoginStatsHourly
+from sqlalchemy import or_, select, update, func
+from sqlalchemy.orm import load_only
 from email_utils import send_reset_email
 from typing import List, Optional
-from Types import UserType
+from Types import UserType, OrderType, OrderConnection, UserConnection, TierAssignmentResult, DemandLine, OrderInput, OrderResult, LoginStatsLine
+from menu_catalog import menu_catalog
+from order_lines import parse_order_lines, minute_bucket, demand_bucket_expression
+from order_writer import OrderRequest, order_writer, write_orders
+from pagination import clamp_page_size, encode_cursor, keyset_condition
+from password_hasher import password_hasher
+from password_policy import validate_password_complexity
+from login_log_sink import login_log_sink
+from pubsub import broker, tier_channel
+from user_cache import user_cache
+from reset_tokens import reset_token_store
+from login_guard import login_guard, LoginRejectedError
+from login_log_retention import hour_bucket
 
 MAX_LOGIN_ATTEMPTS = 5
+LOCKOUT_MINUTES = 15
 PASSWORD_EXPIRY_DAYS = 90
+MAX_BULK_ASSIGN = 1000
+MAX_BATCH_ORDERS = 100
+MAX_CLIENT_KEY_LENGTH = 64
+GENERIC_LOGIN_ERROR = "Invalid username or password"
+
+# คอลัมน์ที่ login_user ต้องใช้ (คอลัมน์อื่นของ users ไม่ถูกโหลด)
+LOGIN_COLUMNS = (
+    User.id, User.username, User.email, User.password, User.role, User.tier,
+    User.failed_login_attempts, User.is_locked, User.locked_until, User.password_updated_at
+)
 
 class PasswordExpiredError(Exception):
     def __init__(self, message, user):
@@ -23,236 +41,457 @@ class PasswordExpiredError(Exception):
         self.user = user
 
 class UserGateway:
-    
+
     @classmethod
-    def get_user_by_id(cls, user_id: int) -> Optional[User]:
-        with SessionLocal() as db:
-            user = db.query(User).filter(User.id == user_id).first()
-            return user
-    
+    async def get_user_by_id(cls, user_id: int) -> Optional[User]:
+        async with AsyncSessionLocal() as db:
+            return await db.get(User, user_id)
+
     @classmethod
-    def login_user(cls, login_identifier: str, password: str) -> User: 
-        with SessionLocal() as db:
-            user = db.query(User).filter(
-                or_(User.username == login_identifier, User.email == login_identifier)
-            ).first()
+    async def get_user_view(cls, user_id: int) -> Optional[UserType]:
+        """อ่าน UserType ผ่าน user_cache ถ้าไม่มีใน cache จึงค่อยอ่านจากฐานข้อมูล"""
+        cached = await user_cache.get_by_id(user_id)
+        if cached:
+            return cached
 
-            generic_error_msg = "Invalid username or password"
+        user = await cls.get_user_by_id(user_id)
+        if not user:
+            return None
+        user_type = UserType.from_model(user)
+        await user_cache.put(user_type)
+        return user_type
 
-            if not user:
-                cls._log_login_attempt(db, login_identifier, is_success=False)
-                raise ValueError(generic_error_msg)
+    @classmethod
+    async def login_user(cls, login_identifier: str, password: str, ip_address: str = None) -> UserType:
+        """
+        ตรวจ login ด้วย SELECT เดียว (โหลดเฉพาะคอลัมน์ที่ใช้) และเขียนฐานข้อมูลเฉพาะตอนสถานะล็อกเปลี่ยน
+        เมื่อต้องเขียน จะอัปเดต users และเพิ่ม LoginLog ใน commit เดียวกัน
+        กรณีอื่นส่ง LoginLog ให้ login_log_sink เขียนเป็น batch
+        """
+        try:
+            await login_guard.check(login_identifier, ip_address)
+        except LoginRejectedError:
+            cls._log_login_attempt(login_identifier, is_success=False, ip_address=ip_address)
+            raise
 
-            if user.is_locked:
-                if user.locked_until and datetime.utcnow() > user.locked_until:
-                    user.is_locked = False
-                    user.failed_login_attempts = 0
-                    user.locked_until = None
-                    db.commit()
-                else:
-                    remaining_time = user.locked_until - datetime.utcnow()
-                    minutes, _ = divmod(remaining_time.total_seconds(), 60)
-                    raise ValueError(f"Account is locked. Please try again in {int(minutes) + 1} minutes.")
-
-            if not bcrypt.checkpw(password.encode('utf-8'), user.password.encode('utf-8')):
-                user.failed_login_attempts += 1
-                if user.failed_login_attempts >= MAX_LOGIN_ATTEMPTS:
-                    user.is_locked = True
-                    user.locked_until = datetime.utcnow() + timedelta(minutes=15)
-                db.commit()
-                cls._log_login_attempt(db, login_identifier, is_success=False, user_id=user.id)
-                if user.is_locked:
-                    raise ValueError("Account has been locked for 15 minutes due to too many failed login attempts.")
-                else:
-                    raise ValueError(generic_error_msg)
-        
-            if datetime.utcnow() > user.password_updated_at + timedelta(days=PASSWORD_EXPIRY_DAYS):
-                 raise PasswordExpiredError("Password has expired. You must reset it.", user)
-
-            user.failed_login_attempts = 0
-            user.is_locked = False
-            user.locked_until = None
-            db.commit()
-            cls._log_login_attempt(db, login_identifier, is_success=True, user_id=user.id)
-            
-            return UserType(
-                id=user.id,
-                username=user.username,
-                email=user.email,
-                role=user.role.value,
-                tier=user.tier.value
+        # อ่านแล้วปิด session ทันที ไม่ถือ connection และ transaction ค้างไว้ระหว่างรอ bcrypt
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(User)
+                .options(load_only(*LOGIN_COLUMNS))
+                .where(or_(User.username == login_identifier, User.email == login_identifier))
             )
-    
+            user = result.scalars().first()
+
+        if not user:
+            cls._log_login_attempt(login_identifier, is_success=False, ip_address=ip_address)
+            raise ValueError(GENERIC_LOGIN_ERROR)
+
+        unlocked = False
+        if user.is_locked:
+            if user.locked_until and datetime.utcnow() > user.locked_until:
+                # ปลดล็อกใน transaction เดียวกับผลของการ login ครั้งนี้
+                cls._reset_lock_state(user)
+                unlocked = True
+                await login_guard.clear_lock((user.username, user.email))
+                await login_guard.clear_failures(user.id)
+            else:
+                await login_guard.remember_lock((user.username, user.email), cls._epoch(user.locked_until))
+                cls._log_login_attempt(login_identifier, is_success=False, user_id=user.id, ip_address=ip_address)
+                remaining_time = user.locked_until - datetime.utcnow()
+                minutes, _ = divmod(remaining_time.total_seconds(), 60)
+                raise ValueError(f"Account is locked. Please try again in {int(minutes) + 1} minutes.")
+
+        if not await password_hasher.check_password(password, user.password):
+            # นับครั้งที่ผิดใน login_guard และเขียนลงตาราง users เฉพาะตอนที่บัญชีถูกล็อก
+            failed_attempts = await login_guard.record_failure(user.id)
+            if failed_attempts >= MAX_LOGIN_ATTEMPTS:
+                user.failed_login_attempts = failed_attempts
+                user.is_locked = True
+                user.locked_until = datetime.utcnow() + timedelta(minutes=LOCKOUT_MINUTES)
+            if user.is_locked or unlocked:
+                await cls._save_login_state(user, login_identifier, is_success=False, ip_address=ip_address)
+                await user_cache.invalidate(user.id)
+            else:
+                cls._log_login_attempt(login_identifier, is_success=False, user_id=user.id, ip_address=ip_address)
+            if user.is_locked:
+                await login_guard.clear_failures(user.id)
+                await login_guard.remember_lock((user.username, user.email), cls._epoch(user.locked_until))
+                raise ValueError(f"Account has been locked for {LOCKOUT_MINUTES} minutes due to too many failed login attempts.")
+            else:
+                raise ValueError(GENERIC_LOGIN_ERROR)
+
+        if datetime.utcnow() > user.password_updated_at + timedelta(days=PASSWORD_EXPIRY_DAYS):
+            if unlocked:
+                await cls._save_login_state(user)
+                await user_cache.invalidate(user.id)
+            raise PasswordExpiredError("Password has expired. You must reset it.", user)
+
+        await login_guard.clear_failures(user.id)
+        if unlocked or user.failed_login_attempts or user.locked_until:
+            cls._reset_lock_state(user)
+            await cls._save_login_state(user, login_identifier, is_success=True, ip_address=ip_address)
+            if unlocked:
+                await user_cache.invalidate(user.id)
+        else:
+            cls._log_login_attempt(login_identifier, is_success=True, user_id=user.id, ip_address=ip_address)
+
+        return UserType.from_model(user)
+
     # --- Helper Methods ---
     @staticmethod
-    def _log_login_attempt(db: Session, username: str, is_success: bool, user_id: int = None):
-        log_entry = LoginLog(
-            username_attempt=username,
-            is_success=is_success,
-            user_id=user_id
-        )
-        db.add(log_entry)
-        db.commit()
+    def _epoch(naive_utc: datetime) -> float:
+        return naive_utc.replace(tzinfo=timezone.utc).timestamp()
 
     @staticmethod
-    def _validate_password_complexity(password: str) -> List[str]:
-        
-        errors = []
-        if len(password) < 8:
-            errors.append("Password must be at least 8 characters long.")
-        if not re.search(r"[a-z]", password):
-            errors.append("Password must contain a lowercase letter (a-z).")
-        if not re.search(r"[A-Z]", password):
-            errors.append("Password must contain an uppercase letter (A-Z).")
-        if not re.search(r"[0-9]", password):
-            errors.append("Password must contain a number (0-9).")
-        if not re.search(r"[!@#$%^&*()_+\-=\[\]{};':\"\\|,.<>\/?~]", password):
-            errors.append("Password must contain a special character (e.g., !@#$%).")
-        return errors
+    def _reset_lock_state(user: User):
+        user.failed_login_attempts = 0
+        user.is_locked = False
+        user.locked_until = None
+
+    @staticmethod
+    async def _save_login_state(user: User, username: str = None, is_success: bool = False, ip_address: str = None):
+        """
+        เขียนสถานะล็อกของผู้ใช้ (และ LoginLog เมื่อระบุ username) ใน transaction สั้น ๆ ครั้งเดียว
+        แทนการส่งเข้า login_log_sink เพื่อให้ log ตรงกับสถานะที่เปลี่ยน
+        """
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(User)
+                .where(User.id == user.id)
+                .values(
+                    failed_login_attempts=user.failed_login_attempts,
+                    is_locked=user.is_locked,
+                    locked_until=user.locked_until,
+                )
+            )
+            if username is not None:
+                db.add(LoginLog(
+                    username_attempt=username,
+                    is_success=is_success,
+                    user_id=user.id,
+                    ip_address=ip_address,
+                    timestamp=datetime.utcnow()
+                ))
+            await db.commit()
+
+    @staticmethod
+    def _log_login_attempt(username: str, is_success: bool, user_id: int = None, ip_address: str = None):
+        login_log_sink.record(username, is_success, user_id=user_id, ip_address=ip_address)
+
+    _validate_password_complexity = staticmethod(validate_password_complexity)
 
     # --- User Management ---
     @classmethod
-    def register_customer(cls, username: str, email: str, password: str) -> UserType:
+    async def register_customer(cls, username: str, email: str, password: str) -> UserType:
         password_errors = cls._validate_password_complexity(password)
         if password_errors:
             raise ValueError("\n".join(password_errors))
-        
-        hashed_pw = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode('utf-8')
-        with SessionLocal() as db:
-            if db.query(User).filter(or_(User.username == username, User.email == email)).first():
-                raise ValueError("Username or email already in use.")
-            
-            new_user = User(
-                username=username,
-                email=email,
-                password=hashed_pw,
-                role=UserRole.USER
-            )
-            db.add(new_user)
-            db.commit()
-            db.refresh(new_user)
-            
-            return UserType(
-                id=new_user.id,
-                username=new_user.username,
-                email=new_user.email,
-                role=new_user.role.value,
-                tier=new_user.tier.value
-            )
-        
+
+        hashed_pw = await password_hasher.hash_password(password)
+        return await cls._insert_user(username, email, hashed_pw, UserRole.USER)
+
     @classmethod
-    def create_admin(cls, username: str, email: str, password: str) -> UserType: # 👈 เปลี่ยน return type เป็น UserType
+    async def create_admin(cls, username: str, email: str, password: str) -> UserType: # 👈 เปลี่ยน return type เป็น UserType
         password_errors = cls._validate_password_complexity(password)
         if password_errors:
             raise ValueError("\n".join(password_errors))
 
-        hashed_pw = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode('utf-8')
-        with SessionLocal() as db:
-            if db.query(User).filter(or_(User.username == username, User.email == email)).first():
+        hashed_pw = await password_hasher.hash_password(password)
+        return await cls._insert_user(username, email, hashed_pw, UserRole.ADMIN)
+
+    @staticmethod
+    async def _insert_user(username: str, email: str, hashed_pw: str, role: UserRole) -> UserType:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(User.id).where(or_(User.username == username, User.email == email)))
+            if result.first():
                 raise ValueError("Username or email already in use.")
 
-            new_admin = User(
+            new_user = User(
                 username=username,
                 email=email,
                 password=hashed_pw,
-                role=UserRole.ADMIN
-            )
-            db.add(new_admin)
-            db.commit()
-            db.refresh(new_admin)
-            
-            return UserType(
-                id=new_admin.id,
-                username=new_admin.username,
-                email=new_admin.email,
-                role=new_admin.role.value,
-                tier=new_admin.tier.value
+                role=role
             )
-    
-    @staticmethod
-    def _generate_short_token(length: int = 6) -> str:
-        """Generates a random token with uppercase letters and digits."""
-        chars = string.ascii_uppercase + string.digits
-        return ''.join(random.choices(chars, k=length))
-    
+            db.add(new_user)
+            await db.commit()
+            await db.refresh(new_user)
+            await user_cache.invalidate(new_user.id)
+
+            return UserType.from_model(new_user)
+
     @classmethod
-    def generate_and_send_reset_token(cls, email: str):
-        with SessionLocal() as db:
-            user = db.query(User).filter(User.email == email).first()
+    async def generate_and_send_reset_token(cls, email: str):
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(User.id, User.email).where(User.email == email))
+            user = result.first()
             if not user:
                 raise ValueError("Email address not found in our records.")
-            
-            token = cls._generate_short_token()
-            user.reset_token = token
-            user.reset_token_expiry = datetime.utcnow() + timedelta(minutes=15)
-            db.commit()
-            
+
+            token = await reset_token_store.issue(db, user.id)
+            await db.commit()
+
             try:
                 send_reset_email(recipient_email=user.email, token=token)
             except Exception as e:
                 raise ConnectionError("Failed to send email. Please try again later.")
-            
+
     @classmethod
-    def verify_reset_token(cls, token: str) -> bool:
-        with SessionLocal() as db:
-            user = db.query(User).filter(User.reset_token == token).first()
-            
-            if not user or user.reset_token_expiry < datetime.utcnow():
+    async def verify_reset_token(cls, token: str, email: str, ip_address: str = None) -> bool:
+        await login_guard.check_reset(email, ip_address)
+        async with AsyncSessionLocal() as db:
+            if not await reset_token_store.check(db, token, email):
                 raise ValueError("Invalid or expired token.")
-            
+
             return True
-    
 
-    
     @classmethod
-    def reset_password_with_token(cls, token: str, new_password: str) -> bool:
+    async def reset_password_with_token(cls, token: str, new_password: str, email: str,
+                                        ip_address: str = None) -> bool:
         password_errors = cls._validate_password_complexity(new_password)
         if password_errors:
             raise ValueError("\n".join(password_errors))
 
-        with SessionLocal() as db:
-            user = db.query(User).filter(User.reset_token == token).first()
-            if not user or user.reset_token_expiry < datetime.utcnow():
+        # ตรวจ token ก่อน hash เพื่อไม่ให้ token สุ่มใช้ CPU และช่องของ password_hasher ได้
+        await login_guard.check_reset(email, ip_address)
+        async with AsyncSessionLocal() as db:
+            entry = await reset_token_store.check(db, token, email)
+        if not entry:
+            return False
+
+        hashed_pw = await password_hasher.hash_password(new_password)
+        async with AsyncSessionLocal() as db:
+            if not await reset_token_store.consume(db, entry):
                 return False
-            user.password = bcrypt.hashpw(new_password.encode(), bcrypt.gensalt()).decode('utf-8')
-            user.password_updated_at = datetime.utcnow()
-            user.reset_token = None
-            user.reset_token_expiry = None
-            db.commit()
-            return True
+            await db.execute(
+                update(User)
+                .where(User.id == entry.user_id)
+                .values(password=hashed_pw, password_updated_at=datetime.utcnow())
+            )
+            await db.commit()
+        await user_cache.invalidate(entry.user_id)
+        return True
 
     # --- Admin Functions ---
     @classmethod
-    def assign_user_tier(cls, user_id: int, tier: UserTier) -> UserType: 
-        with SessionLocal() as db:
-            user = db.query(User).filter(User.id == user_id).first()
+    async def assign_user_tier(cls, user_id: int, tier: UserTier) -> UserType:
+        async with AsyncSessionLocal() as db:
+            user = await db.get(User, user_id)
             if not user:
                 return None
             user.tier = tier
-            db.commit()
-            db.refresh(user)
-
-            return UserType(
-                id=user.id,
-                username=user.username,
-                email=user.email,
-                role=user.role.value,
-                tier=user.tier.value
+            await db.commit()
+            await user_cache.invalidate(user.id)
+
+            user_type = UserType.from_model(user)
+            await broker.publish(tier_channel(user.id), vars(user_type))
+            return user_type
+
+    @classmethod
+    async def bulk_assign_tier(cls, user_ids: List[int], tier: UserTier) -> List[TierAssignmentResult]:
+        """
+        กำหนด tier ให้ผู้ใช้หลายคนด้วย UPDATE ... WHERE id IN (...) ครั้งเดียว
+        แล้วอ่านผลกลับด้วย SELECT ครั้งเดียว คืนผลลัพธ์แยกตาม id ตามลำดับที่ส่งมา
+        """
+        unique_ids = list(dict.fromkeys(user_ids))
+        if len(unique_ids) > MAX_BULK_ASSIGN:
+            raise ValueError(f"Cannot assign more than {MAX_BULK_ASSIGN} users at once.")
+        if not unique_ids:
+            return []
+
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(User).where(User.id.in_(unique_ids)).values(tier=tier).execution_options(synchronize_session=False)
             )
+            await db.commit()
+            users = (await db.execute(select(User).where(User.id.in_(unique_ids)))).scalars().all()
+
+        found = {}
+        for user in users:
+            user_type = UserType.from_model(user)
+            found[user.id] = user_type
+            await user_cache.invalidate(user.id)
+            await broker.publish(tier_channel(user.id), vars(user_type))
+
+        return [
+            TierAssignmentResult(userId=user_id, success=True, message="Tier assigned.", user=found[user_id])
+            if user_id in found else
+            TierAssignmentResult(userId=user_id, success=False, message="User not found", user=None)
+            for user_id in unique_ids
+        ]
+
+    @classmethod
+    async def list_users(cls, tier: Optional[UserTier] = None, role: Optional[UserRole] = None,
+                         created_after: Optional[datetime] = None, after: Optional[str] = None,
+                         first: int = 50) -> UserConnection:
+        """รายชื่อผู้ใช้สำหรับ admin เรียงจากสมัครก่อนไปหลัง (keyset บน created_at, id)"""
+        page_size = clamp_page_size(first)
+        stmt = select(User)
+        if tier is not None:
+            stmt = stmt.where(User.tier == tier)
+        if role is not None:
+            stmt = stmt.where(User.role == role)
+        if created_after is not None:
+            stmt = stmt.where(User.created_at >= created_after)
+        if after:
+            stmt = stmt.where(keyset_condition(User.created_at, User.id, after, descending=False))
+        stmt = stmt.order_by(User.created_at.asc(), User.id.asc()).limit(page_size + 1)
+
+        async with AsyncSessionLocal() as db:
+            users = (await db.execute(stmt)).scalars().all()
+
+        has_next_page = len(users) > page_size
+        users = users[:page_size]
+        return UserConnection(
+            items=[
+                UserType.from_model(user)
+                for user in users
+            ],
+            endCursor=encode_cursor(users[-1].created_at, users[-1].id) if users else None,
+            hasNextPage=has_next_page
+        )
 
     # --- Order Functions ---
     @classmethod
-    def create_order(cls, user_id: int, item_names: list[str]) -> Order:
-        with SessionLocal() as db:
-            user = db.query(User).filter(User.id == user_id).first()
-            if not user:
-                raise ValueError("User not found")
+    async def create_order(cls, user_id: int, item_names: list[str], client_key: Optional[str] = None):
+        """
+        บันทึก order พร้อมรายการแยกแถวใน order_items และบวกยอดเข้า kitchen_demand_rollups
+        ภายใน transaction เดียวกัน ถ้าส่ง client_key เดิมซ้ำจะได้ order เดิมกลับไปโดยไม่สร้างใหม่
+        """
+        request = await cls._prepare_order(user_id, item_names, client_key)
+        return await order_writer.submit(request)
+
+    @classmethod
+    async def create_orders(cls, orders: List[OrderInput]) -> List[OrderResult]:
+        """ตรวจ order ทีละรายการ แล้วเขียนรายการที่ผ่านทั้งหมดด้วย INSERT หลายแถวใน transaction เดียว"""
+        if len(orders) > MAX_BATCH_ORDERS:
+            raise ValueError(f"Cannot create more than {MAX_BATCH_ORDERS} orders at once.")
+
+        prepared, results = [], []
+        for order in orders:
+            try:
+                prepared.append(await cls._prepare_order(order.userId, order.itemNames, order.clientKey))
+                results.append(None)
+            except ValueError as e:
+                results.append(OrderResult(clientKey=order.clientKey or "", success=False, message=str(e), order=None))
+
+        if prepared:
+            async with AsyncSessionLocal() as db:
+                rows = iter(await write_orders(db, prepared))
+            requests = iter(prepared)
+            results = [result or cls._order_result(next(requests), next(rows)) for result in results]
+        return results
 
-            new_order = Order(
-                user_id=user.id,
-                items=item_names
+    @staticmethod
+    def _order_result(request: OrderRequest, row) -> OrderResult:
+        if isinstance(row, Exception):
+            return OrderResult(clientKey=request.client_key, success=False, message=str(row), order=None)
+        return OrderResult(clientKey=request.client_key, success=True, message="Order created.",
+                           order=OrderType.from_model(row))
+
+    @classmethod
+    async def _prepare_order(cls, user_id: int, item_names: List[str], client_key: Optional[str]) -> OrderRequest:
+        """ตรวจรายการและ tier ของผู้ใช้ผ่าน user_cache (ไม่ต้อง SELECT users ถ้าอยู่ใน cache)"""
+        if client_key is not None and not 0 < len(client_key) <= MAX_CLIENT_KEY_LENGTH:
+            raise ValueError(f"clientKey must be 1-{MAX_CLIENT_KEY_LENGTH} characters.")
+        lines = parse_order_lines(item_names)
+        user = await cls.get_user_view(user_id)
+        if not user:
+            raise ValueError("User not found")
+        await cls._validate_order_items(UserTier[user.tier], lines)
+        return OrderRequest(user_id=user.id, client_key=client_key or uuid.uuid4().hex, lines=lines)
+
+    @staticmethod
+    async def _validate_order_items(tier: UserTier, lines: List[tuple]):
+        allowed = await menu_catalog.allowed_items(tier)
+        if not allowed:
+            raise ValueError("Your account has not been assigned a meal plan yet.")
+        not_allowed = [name for name, _ in lines if name not in allowed]
+        if not_allowed:
+            raise ValueError(f"These items are not available for the {tier.value} tier: {', '.join(not_allowed)}")
+
+    @classmethod
+    async def kitchen_demand(cls, since: datetime, until: datetime, bucket: str = "HOUR") -> List[DemandLine]:
+        """รวมยอดที่สั่งของแต่ละเมนูตามช่วงเวลา (MINUTE/HOUR/DAY) จากตาราง rollup รายนาที"""
+        if until <= since:
+            raise ValueError("'until' must be later than 'since'.")
+
+        async with AsyncSessionLocal() as db:
+            bucket_start = demand_bucket_expression(db.bind.dialect.name, bucket).label('bucket_start')
+            total = func.sum(KitchenDemandRollup.quantity).label('quantity')
+            result = await db.execute(
+                select(bucket_start, KitchenDemandRollup.item_name, total)
+                .where(KitchenDemandRollup.bucket_start >= minute_bucket(since))
+                .where(KitchenDemandRollup.bucket_start < until)
+                .group_by(bucket_start, KitchenDemandRollup.item_name)
+                .order_by(bucket_start, KitchenDemandRollup.item_name)
             )
-            db.add(new_order)
-            db.commit()
-            db.refresh(new_order)
-            return new_order
\ No newline at end of file
+            return [
+                DemandLine(
+                    bucketStart=datetime.fromisoformat(str(row.bucket_start)),
+                    itemName=row.item_name,
+                    quantity=int(row.quantity)
+                )
+                for row in result
+            ]
+
+    @classmethod
+    async def login_stats(cls, since: datetime, identifier: Optional[str] = None) -> List[LoginStatsLine]:
+        """
+        จำนวน login สำเร็จ/ไม่สำเร็จรายชั่วโมงต่อ identifier ตั้งแต่ชั่วโมงของ since จากตาราง rollup
+        (ข้อมูลช่วงล่าสุดตามหลัง login จริงไม่เกินรอบของ login_log_compactor)
+        """
+        stmt = (
+            select(LoginStatsHourly)
+            .where(LoginStatsHourly.bucket_start >= hour_bucket(since))
+            .order_by(LoginStatsHourly.bucket_start, LoginStatsHourly.identifier)
+        )
+        if identifier:
+            stmt = stmt.where(LoginStatsHourly.identifier == identifier.strip().lower())
+
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(stmt)
+            return [
+                LoginStatsLine(
+                    bucketStart=row.bucket_start,
+                    identifier=row.identifier,
+                    successCount=row.success_count,
+                    failureCount=row.failure_count
+                )
+                for row in result.scalars()
+            ]
+
+    @classmethod
+    async def list_orders_by_user(cls, user_id: int, after: Optional[str] = None, first: int = 20) -> OrderConnection:
+        stmt = select(Order).where(Order.user_id == user_id)
+        return await cls._fetch_order_page(stmt, after, first)
+
+    @classmethod
+    async def list_recent_orders(cls, after: Optional[str] = None, first: int = 50,
+                                 since: Optional[datetime] = None) -> OrderConnection:
+        stmt = select(Order)
+        if since is not None:
+            stmt = stmt.where(Order.ordered_at >= since)
+        return await cls._fetch_order_page(stmt, after, first)
+
+    @staticmethod
+    async def _fetch_order_page(stmt, after: Optional[str], first: int) -> OrderConnection:
+        """อ่านหน้าละ first แถว เรียงจากใหม่ไปเก่าด้วย keyset (ordered_at, id) อ่านเกิน 1 แถวเพื่อรู้ว่ามีหน้าถัดไปหรือไม่"""
+        page_size = clamp_page_size(first)
+        if after:
+            stmt = stmt.where(keyset_condition(Order.ordered_at, Order.id, after))
+        stmt = stmt.order_by(Order.ordered_at.desc(), Order.id.desc()).limit(page_size + 1)
+
+        async with AsyncSessionLocal() as db:
+            orders = (await db.execute(stmt)).scalars().all()
+
+        has_next_page = len(orders) > page_size
+        orders = orders[:page_size]
+        return OrderConnection(
+            items=[
+                OrderType.from_model(order)
+                for order in orders
+            ],
+            endCursor=encode_cursor(orders[-1].ordered_at, orders[-1].id) if orders else None,
+            hasNextPage=has_next_page
+        )